@@ -2,6 +2,7 @@ import argparse
 from os.path import exists
 
 from src.core.simulation import Simulation
+from src.setup.scenario_compiler import ScenarioCompiler
 
 
 def create_simulation(config_file: str) -> Simulation:
@@ -26,6 +27,29 @@ def create_simulation(config_file: str) -> Simulation:
     return simulation
 
 
+def compile_scenario(config_file: str, bundle_dir: str) -> str:
+    """
+    This function compiles the scenario into a bundle that is loaded faster by later runs.
+
+    Parameters
+    ----------
+    config_file : str
+        The path to the config file.
+    bundle_dir : str
+        The directory of the bundle, a directory next to the config file if empty.
+
+    Returns
+    -------
+    str
+        The path to the config file of the bundle.
+    """
+    if not exists(config_file):
+        raise FileNotFoundError("Config file not found: %s" % config_file)
+
+    scenario_compiler = ScenarioCompiler(config_file, bundle_dir)
+    return scenario_compiler.compile()
+
+
 def run_simulation(simulation: Simulation):
     """
     This function initiates the simulation.
@@ -42,13 +66,31 @@ def run_simulation(simulation: Simulation):
 if __name__ == "__main__":
     # Create the argument parser
     parser = argparse.ArgumentParser(description="Run the simulation.")
+    parser.add_argument(
+        "mode",
+        nargs="?",
+        default="run",
+        choices=["run", "compile"],
+        help="Run the simulation or compile the scenario into a bundle.",
+    )
     parser.add_argument("--config", type=str, help="The path to the config file.")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="",
+        help="The directory of the compiled bundle.",
+    )
 
     # Parse the arguments
     args = parser.parse_args()
 
-    # Create the simulation object
-    net_simulation = create_simulation(args.config)
+    if args.mode == "compile":
+        # Compile the scenario, the bundle config file is used for later runs.
+        bundle_config_file = compile_scenario(args.config, args.output)
+        print("Compiled scenario config file: %s" % bundle_config_file)
+    else:
+        # Create the simulation object
+        net_simulation = create_simulation(args.config)
 
-    # Run the simulation
-    run_simulation(net_simulation)
+        # Run the simulation
+        run_simulation(net_simulation)
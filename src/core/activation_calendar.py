@@ -0,0 +1,161 @@
+import logging
+
+from numpy import argsort, asarray, concatenate, ndarray, repeat, searchsorted, zeros
+
+logger = logging.getLogger(__name__)
+
+
+class EventQueue:
+    def __init__(self):
+        """
+        Initialize the event queue. The events are kept in arrays sorted by time, and a cursor
+        points to the first event that is not yet popped.
+        """
+        self._times: ndarray[int] = zeros(0, dtype=int)
+        self._device_ids: ndarray[int] = zeros(0, dtype=int)
+        self._cursor: int = 0
+
+    def __len__(self) -> int:
+        """Get the number of pending events."""
+        return len(self._times) - self._cursor
+
+    def add_events(self, times: ndarray[int], device_ids: ndarray[int]) -> None:
+        """
+        Add new events to the queue. Only the pending events are merged with the new events.
+
+        Parameters
+        ----------
+        times : ndarray[int]
+            The times of the events.
+        device_ids : ndarray[int]
+            The ids of the devices.
+        """
+        if len(times) == 0:
+            return
+
+        times = concatenate([self._times[self._cursor :], asarray(times, dtype=int)])
+        device_ids = concatenate(
+            [self._device_ids[self._cursor :], asarray(device_ids, dtype=int)]
+        )
+
+        order = argsort(times, kind="stable")
+        self._times = times[order]
+        self._device_ids = device_ids[order]
+        self._cursor = 0
+
+    def pop_events(self, time_step: int) -> ndarray[int]:
+        """
+        Pop all the events up to the given time step. The events before the time step, which
+        fall between the time steps or belong to devices added after their time, are past due
+        and popped along with the events at the time step.
+
+        Parameters
+        ----------
+        time_step : int
+            The time step.
+
+        Returns
+        -------
+        ndarray[int]
+            The ids of the devices with an event at or before the time step.
+        """
+        pending_times = self._times[self._cursor :]
+        past_due = searchsorted(pending_times, time_step, side="left")
+        end = self._cursor + searchsorted(pending_times, time_step, side="right")
+
+        if past_due > 0:
+            logger.warning(
+                f"Applying {past_due} past due events at time step {time_step}."
+            )
+
+        start = self._cursor
+        self._cursor = end
+        return self._device_ids[start:end]
+
+
+class ActivationCalendar:
+    def __init__(self, device_types: list[str]):
+        """
+        Initialize the activation calendar.
+
+        Parameters
+        ----------
+        device_types : list[str]
+            The device types in the calendar.
+        """
+        self._activations: dict[str, EventQueue] = {
+            device_type: EventQueue() for device_type in device_types
+        }
+        self._deactivations: dict[str, EventQueue] = {
+            device_type: EventQueue() for device_type in device_types
+        }
+
+    def add_devices(
+        self,
+        device_type: str,
+        device_ids: list[int],
+        start_times: list[ndarray[int]],
+        end_times: list[ndarray[int]],
+    ) -> None:
+        """
+        Add the activation and deactivation times of new devices.
+
+        Parameters
+        ----------
+        device_type : str
+            The type of the devices.
+        device_ids : list[int]
+            The ids of the devices.
+        start_times : list[ndarray[int]]
+            The activation times of each device.
+        end_times : list[ndarray[int]]
+            The deactivation times of each device.
+        """
+        if len(device_ids) == 0:
+            return
+
+        interval_counts = [len(times) for times in start_times]
+        interval_ids = repeat(asarray(device_ids, dtype=int), interval_counts)
+
+        self._activations[device_type].add_events(
+            concatenate(start_times).astype(int), interval_ids
+        )
+        self._deactivations[device_type].add_events(
+            concatenate(end_times).astype(int), interval_ids
+        )
+
+    def pop_activations(self, device_type: str, time_step: int) -> ndarray[int]:
+        """
+        Pop the devices to activate at the given time step.
+
+        Parameters
+        ----------
+        device_type : str
+            The type of the devices.
+        time_step : int
+            The time step.
+
+        Returns
+        -------
+        ndarray[int]
+            The ids of the devices to activate.
+        """
+        return self._activations[device_type].pop_events(time_step)
+
+    def pop_deactivations(self, device_type: str, time_step: int) -> ndarray[int]:
+        """
+        Pop the devices to deactivate at the given time step.
+
+        Parameters
+        ----------
+        device_type : str
+            The type of the devices.
+        time_step : int
+            The time step.
+
+        Returns
+        -------
+        ndarray[int]
+            The ids of the devices to deactivate.
+        """
+        return self._deactivations[device_type].pop_events(time_step)
@@ -32,6 +32,7 @@ VEHICLE_TRACE_COLUMN_DTYPES: dict[str, type] = {
     Y: float,
 }
 
+# Link columns are space separated strings, parquet files may also store them as list columns.
 V2V_LINKS_COLUMN_NAMES: list[str] = [VEHICLE_ID, TIME_STEP, NEIGHBOURS, DISTANCES]
 V2V_LINKS_COLUMN_DTYPES: dict[str, type] = {
     VEHICLE_ID: int,
@@ -71,9 +72,14 @@ ACTIVATION_TIMES_COLUMN_DTYPES: dict[str, type] = {
 # File extensions
 PARQUET: str = "parquet"
 CSV: str = "csv"
+ARROW: str = "arrow"
+
+# File extensions of the Arrow IPC files
+ARROW_FILE_EXTENSIONS: list[str] = [ARROW, "feather", "ipc"]
 
 # Space keys
 SPACE_X_MIN = "x_min"
 SPACE_X_MAX = "x_max"
 SPACE_Y_MIN = "y_min"
 SPACE_Y_MAX = "y_max"
+SPACE_ENABLED = "enabled"
@@ -14,6 +14,8 @@ SIMULATION_START_TIME = "start_time"
 SIMULATION_END_TIME = "end_time"
 SIMULATION_TIME_STEP = "time_step"
 DATA_STREAMING_INTERVAL = "data_streaming_interval"
+VEHICLE_ENGINE = "vehicle_engine"
+PREFETCH_INPUT_DATA = "prefetch_input_data"
 
 # Logging settings keys
 LOGGING_LEVEL = "logging_level"
@@ -27,6 +29,10 @@ OUTPUT_LOCATION = "output_location"
 DEFAULT_LOG_FILE = "simulation.log"
 DEFAULT_LOG_LEVEL = "INFO"
 
+# Compiled scenario bundle
+DEFAULT_BUNDLE_DIR = "compiled"
+BUNDLE_CONFIG_FILE = "config.toml"
+
 # Vehicle data keys
 VEHICLE_RATIO = "ratio"
 
@@ -36,6 +42,18 @@ NETWORKING_HARDWARE = "networking_hardware"
 WIRED = "wired"
 WIRELESS = "wireless"
 
+# Network hardware classes
+VEHICLE_WIRELESS = "vehicle_wireless"
+BASE_STATION_WIRELESS = "base_station_wireless"
+BASE_STATION_WIRED = "base_station_wired"
+CONTROLLER_WIRED = "controller_wired"
+NETWORK_HARDWARE_CLASSES = [
+    VEHICLE_WIRELESS,
+    BASE_STATION_WIRELESS,
+    BASE_STATION_WIRED,
+    CONTROLLER_WIRED,
+]
+
 # Model data keys
 MOBILITY = "mobility"
 DATA_SOURCE = "data_source"
@@ -55,17 +73,24 @@ DATA_SIDE_LINK = "side_link"
 DATA_PRIORITY = "priority"
 RETENTION_FACTOR = "retention_factor"
 COMPRESSION_FACTOR = "compression_factor"
+COMPRESSION_FACTORS = "compression_factors"
+RADIUS = "radius"
+STATION_COUNT = "station_count"
 
 # Model type keys
 STATIC_MOBILITY = "static"
 TRACE_MOBILITY = "trace"
 
 TRACE_V2V = "trace"
+RANGE_V2V = "range"
 NEAREST_V2B = "nearest"
+NEAREST_POSITION_V2B = "nearest_position"
 
 SIMPLE_VEHICLE_DATA_COLLECTOR = "simple"
 SIMPLE_VEHICLE_DATA_COMPOSER = "simple"
 SIMPLE_VEHICLE_DATA_SIMPLIFIER = "simple"
+PER_TYPE_VEHICLE_DATA_SIMPLIFIER = "per_type"
+PRIORITY_VEHICLE_DATA_SIMPLIFIER = "priority"
 
 SIMPLE_CONTROLLER_DATA_COLLECTOR = "simple"
 SIMPLE_CONTROLLER_DATA_COMPOSER = "simple"
@@ -73,6 +98,10 @@ SIMPLE_CONTROLLER_DATA_COMPOSER = "simple"
 SIMPLE_BASE_STATION_DATA_COMPOSER = "simple"
 SIMPLE_BASE_STATION_DATA_SIMPLIFIER = "simple"
 
+# Vehicle engine keys
+AGENT_VEHICLE_ENGINE = "agent"
+COLUMNAR_VEHICLE_ENGINE = "columnar"
+
 # Main progress bar keys
 PROGRESS_BAR_UNIT = " steps"
 
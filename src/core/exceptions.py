@@ -9,6 +9,21 @@ class UnsupportedInputFormatError(Exception):
         return f"The input file '{self.file_name}' has unsupported format."
 
 
+class UnsortedInputDataError(Exception):
+    """The streamed input file is not sorted by the time step."""
+
+    def __init__(self, file_name: str, time_step: int, message: str = ""):
+        super().__init__(message)
+        self.file_name = file_name
+        self.time_step = time_step
+
+    def __str__(self):
+        return (
+            f"The input file '{self.file_name}' is not sorted by time step, "
+            f"rows with time step {self.time_step} come after later time steps."
+        )
+
+
 class UnsupportedOutputFormatError(Exception):
     """The output format is not supported."""
 
@@ -30,3 +45,49 @@ class ModelTypeNotImplementedError(Exception):
 
     def __str__(self):
         return f"The model '{self.model_name}' with type '{self.model_type}' is not implemented."
+
+
+class UnknownDataTypeError(Exception):
+    """The data type is not generated by any data source."""
+
+    def __init__(self, data_type: str, model_type: str, message: str = ""):
+        super().__init__(message)
+        self.data_type = data_type
+        self.model_type = model_type
+
+    def __str__(self):
+        return (
+            f"The data type '{self.data_type}' of the model type '{self.model_type}' is not "
+            f"generated by any data source."
+        )
+
+
+class InvalidModelParameterError(Exception):
+    """The parameter of a model has an invalid value."""
+
+    def __init__(self, model_type: str, parameter: str, value, message: str = ""):
+        super().__init__(message)
+        self.model_type = model_type
+        self.parameter = parameter
+        self.value = value
+
+    def __str__(self):
+        return (
+            f"The parameter '{self.parameter}' of the model type '{self.model_type}' has an "
+            f"invalid value '{self.value}'."
+        )
+
+
+class MissingVehiclePositionError(Exception):
+    """The trace has no position for a vehicle when it is activated."""
+
+    def __init__(self, vehicle_ids: list[int], time_step: int, message: str = ""):
+        super().__init__(message)
+        self.vehicle_ids = vehicle_ids
+        self.time_step = time_step
+
+    def __str__(self):
+        return (
+            f"The vehicles {self.vehicle_ids} have no trace position at or before the "
+            f"time step {self.time_step}."
+        )
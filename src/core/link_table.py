@@ -0,0 +1,286 @@
+import logging
+from itertools import chain
+
+from numpy import (
+    arange,
+    array,
+    concatenate,
+    cumsum,
+    empty,
+    float32,
+    fromiter,
+    full,
+    int32,
+    int64,
+    lexsort,
+    ndarray,
+    r_,
+    repeat,
+    searchsorted,
+    unique,
+    where,
+    zeros,
+)
+from pandas import DataFrame, Series
+
+import src.core.common_constants as cc
+
+logger = logging.getLogger(__name__)
+
+
+def link_column_to_csr(column: Series, dtype: type) -> tuple[ndarray, ndarray]:
+    """
+    Convert a link column to flat offsets and values. The column can hold lists or arrays
+    read from list columns, or the space separated strings of the old format.
+
+    Parameters
+    ----------
+    column : Series
+        The link column.
+    dtype : type
+        The data type of the values.
+
+    Returns
+    -------
+    tuple[ndarray, ndarray]
+        The offsets of each row and the values of all rows.
+    """
+    entries = column.to_list()
+    if len(entries) > 0 and isinstance(entries[0], str):
+        entries = [entry.split(" ") if entry else [] for entry in entries]
+        values = array(list(chain.from_iterable(entries)), dtype=dtype)
+    else:
+        entries = [entry if entry is not None else [] for entry in entries]
+        values = (
+            concatenate(entries).astype(dtype, copy=False)
+            if len(entries) > 0
+            else empty(0, dtype=dtype)
+        )
+
+    offsets = zeros(len(entries) + 1, dtype=int64)
+    cumsum(
+        fromiter(map(len, entries), dtype=int64, count=len(entries)), out=offsets[1:]
+    )
+    return offsets, values
+
+
+def expand_csr_rows(
+    offsets: ndarray[int], rows: ndarray[int]
+) -> tuple[ndarray[int], ndarray[int]]:
+    """
+    Get the value indices of several rows of flat offsets at once. Negative rows have no
+    values.
+
+    Parameters
+    ----------
+    offsets : ndarray[int]
+        The offsets of the rows, including the end of the last row.
+    rows : ndarray[int]
+        The rows to expand.
+
+    Returns
+    -------
+    tuple[ndarray[int], ndarray[int]]
+        The position of the row in the given rows and the index of the value, for every value
+        of the rows in order.
+    """
+    valid = rows >= 0
+    starts = zeros(len(rows), dtype=int64)
+    counts = zeros(len(rows), dtype=int64)
+    starts[valid] = offsets[rows[valid]]
+    counts[valid] = offsets[rows[valid] + 1] - starts[valid]
+
+    positions = repeat(arange(len(rows)), counts)
+    value_indices = repeat(starts - (cumsum(counts) - counts), counts) + arange(
+        counts.sum()
+    )
+    return positions, value_indices
+
+
+class LinkTable:
+    def __init__(self, links_df: DataFrame, target_column: str):
+        """
+        Initialize the link table. The rows are sorted by time step and vehicle id, and the
+        links of each row are stored as slices of flat arrays. The rows of a time step form a
+        contiguous window, in which the vehicles are found by binary search.
+
+        Parameters
+        ----------
+        links_df : DataFrame
+            The links data with the time step, vehicle id, target and distance columns.
+        target_column : str
+            The column with the ids of the linked devices.
+        """
+        time_steps = links_df[cc.TIME_STEP].to_numpy(dtype=int)
+        vehicle_ids = links_df[cc.VEHICLE_ID].to_numpy(dtype=int)
+        order = lexsort((vehicle_ids, time_steps))
+
+        self._vehicle_ids: ndarray[int] = vehicle_ids[order]
+
+        # Offsets of the rows of each time step
+        self._time_steps, time_starts = unique(time_steps[order], return_index=True)
+        self._time_offsets: ndarray[int] = r_[time_starts, len(order)]
+
+        self._target_offsets, self._targets = link_column_to_csr(
+            links_df[target_column].iloc[order], int32
+        )
+        self._distance_offsets, self._distances = link_column_to_csr(
+            links_df[cc.DISTANCES].iloc[order], float32
+        )
+        logger.debug(
+            f"Created link table with {len(self._vehicle_ids)} rows and {len(self._targets)} links."
+        )
+
+    def __len__(self) -> int:
+        """Get the number of rows."""
+        return len(self._vehicle_ids)
+
+    def time_window(self, time_step: int) -> tuple[int, int]:
+        """
+        Get the rows of the time step.
+
+        Parameters
+        ----------
+        time_step : int
+            The time step.
+
+        Returns
+        -------
+        tuple[int, int]
+            The first row and the end of the rows, an empty window if there are no links.
+        """
+        idx = searchsorted(self._time_steps, time_step)
+        if idx == len(self._time_steps) or self._time_steps[idx] != time_step:
+            return 0, 0
+        return int(self._time_offsets[idx]), int(self._time_offsets[idx + 1])
+
+    def find_row(self, vehicle_id: int, window: tuple[int, int]) -> int:
+        """
+        Find the row of the vehicle in the time window. When a vehicle has several rows at
+        the same time step, the last one is used.
+
+        Parameters
+        ----------
+        vehicle_id : int
+            The id of the vehicle.
+        window : tuple[int, int]
+            The rows of the time step.
+
+        Returns
+        -------
+        int
+            The row in the table, -1 if the vehicle has no links.
+        """
+        start, stop = window
+        idx = start + searchsorted(
+            self._vehicle_ids[start:stop], vehicle_id, side="right"
+        )
+        if idx == start or self._vehicle_ids[idx - 1] != vehicle_id:
+            return -1
+        return int(idx - 1)
+
+    def find_rows(
+        self, vehicle_ids: ndarray[int], window: tuple[int, int]
+    ) -> ndarray[int]:
+        """
+        Find the rows of several vehicles in the time window at once.
+
+        Parameters
+        ----------
+        vehicle_ids : ndarray[int]
+            The ids of the vehicles.
+        window : tuple[int, int]
+            The rows of the time step.
+
+        Returns
+        -------
+        ndarray[int]
+            The rows in the table, -1 for the vehicles without links.
+        """
+        start, stop = window
+        window_ids = self._vehicle_ids[start:stop]
+        idx = searchsorted(window_ids, vehicle_ids, side="right") - 1
+
+        found = idx >= 0
+        found[found] = window_ids[idx[found]] == vehicle_ids[found]
+        return where(found, idx + start, -1)
+
+    def targets_of_rows(
+        self, rows: ndarray[int]
+    ) -> tuple[ndarray[int], ndarray[int32]]:
+        """
+        Get the linked device ids of several rows at once.
+
+        Parameters
+        ----------
+        rows : ndarray[int]
+            The rows in the table, -1 for no row.
+
+        Returns
+        -------
+        tuple[ndarray[int], ndarray[int32]]
+            The position of the row in the given rows and the linked device id, for every
+            link of the rows in order.
+        """
+        positions, value_indices = expand_csr_rows(self._target_offsets, rows)
+        return positions, self._targets[value_indices]
+
+    def first_targets(self, rows: ndarray[int]) -> ndarray[int]:
+        """
+        Get the first linked device id of several rows at once.
+
+        Parameters
+        ----------
+        rows : ndarray[int]
+            The rows in the table, -1 for no row.
+
+        Returns
+        -------
+        ndarray[int]
+            The first linked device id of each row, -1 for the rows without links.
+        """
+        has_targets = rows >= 0
+        has_targets[has_targets] = (
+            self._target_offsets[rows[has_targets] + 1]
+            > self._target_offsets[rows[has_targets]]
+        )
+
+        first_targets = full(len(rows), -1, dtype=int)
+        first_targets[has_targets] = self._targets[
+            self._target_offsets[rows[has_targets]]
+        ]
+        return first_targets
+
+    def targets(self, row: int) -> ndarray[int32]:
+        """
+        Get the linked device ids of the row. The returned array is a view.
+
+        Parameters
+        ----------
+        row : int
+            The row in the table.
+
+        Returns
+        -------
+        ndarray[int32]
+            The linked device ids.
+        """
+        return self._targets[self._target_offsets[row] : self._target_offsets[row + 1]]
+
+    def distances(self, row: int) -> ndarray[float32]:
+        """
+        Get the distances to the linked devices of the row. The returned array is a view.
+
+        Parameters
+        ----------
+        row : int
+            The row in the table.
+
+        Returns
+        -------
+        ndarray[float32]
+            The distances to the linked devices.
+        """
+        return self._distances[
+            self._distance_offsets[row] : self._distance_offsets[row + 1]
+        ]
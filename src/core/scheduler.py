@@ -1,8 +1,12 @@
 from dataclasses import dataclass
+from typing import Callable
 
 from mesa import Model, Agent
 from mesa.time import BaseScheduler
 
+# Suffix of the optional static method that runs a stage for all the agents of a type at once.
+BATCH_STAGE_SUFFIX: str = "_batch"
+
 
 @dataclass
 class TypeStage:
@@ -37,8 +41,49 @@ class OrderedMultiStageScheduler(BaseScheduler):
         self.shuffle = shuffle
         self.stage_time = 1 / len(self.types_with_stages)
         self.agents_by_type: dict[type[Agent], dict[int, Agent]] = {}
+
+        # Order of the agents of each type, rebuilt only when agents are added or removed.
+        self._ordered_agents: dict[type[Agent], list[Agent]] = {}
+        self._order_is_stale: dict[type[Agent], bool] = {}
+
+        # Handlers that run a stage for all the agents of a type in one call.
+        self._batch_handlers: dict[
+            tuple[type[Agent], str], Callable[[list[Agent]], None]
+        ] = {}
+
         for type_stage in self.types_with_stages:
             self.agents_by_type[type_stage.type] = {}
+            self._ordered_agents[type_stage.type] = []
+            self._order_is_stale[type_stage.type] = False
+
+            batch_handler = getattr(
+                type_stage.type, type_stage.stage + BATCH_STAGE_SUFFIX, None
+            )
+            if batch_handler is not None:
+                self.register_batch_handler(
+                    type_stage.type, type_stage.stage, batch_handler
+                )
+
+    def register_batch_handler(
+        self,
+        agent_type: type[Agent],
+        stage: str,
+        handler: Callable[[list[Agent]], None],
+    ) -> None:
+        """
+        Register a handler that runs the stage for all the agents of the type in one call.
+        Stages without a handler fall back to calling the stage on each agent.
+
+        Parameters
+        ----------
+        agent_type : type[Agent]
+            The type of the agents.
+        stage : str
+            The name of the stage.
+        handler : Callable[[list[Agent]], None]
+            The handler that takes the agents of the type in the order to run them in.
+        """
+        self._batch_handlers[(agent_type, stage)] = handler
 
     def add(self, agent: Agent) -> None:
         """
@@ -52,6 +97,7 @@ class OrderedMultiStageScheduler(BaseScheduler):
         super().add(agent)
         agent_class: type[Agent] = type(agent)
         self.agents_by_type[agent_class][agent.unique_id] = agent
+        self._order_is_stale[agent_class] = True
 
     def remove(self, agent: Agent) -> None:
         """
@@ -65,23 +111,63 @@ class OrderedMultiStageScheduler(BaseScheduler):
         super().remove(agent)
         agent_class: type[Agent] = type(agent)
         self.agents_by_type[agent_class].pop(agent.unique_id)
+        self._order_is_stale[agent_class] = True
+
+    def _get_ordered_agents(
+        self, agent_type: type[Agent], shuffled_types: set[type[Agent]]
+    ) -> list[Agent]:
+        """
+        Get the agents of the type in the order to run them in. The order is shuffled in place at
+        most once per step and reused by all the stages of the type, an order rebuilt during the
+        step after agents are added or removed is shuffled again.
+
+        Parameters
+        ----------
+        agent_type : type[Agent]
+            The type of the agents.
+        shuffled_types : set[type[Agent]]
+            The types that are already shuffled in the current step.
+
+        Returns
+        -------
+        list[Agent]
+            The ordered agents.
+        """
+        if self._order_is_stale[agent_type]:
+            self._ordered_agents[agent_type] = list(
+                self.agents_by_type[agent_type].values()
+            )
+            self._order_is_stale[agent_type] = False
+            shuffled_types.discard(agent_type)
+
+        if self.shuffle and agent_type not in shuffled_types:
+            self.model.random.shuffle(self._ordered_agents[agent_type])
+            shuffled_types.add(agent_type)
+
+        return self._ordered_agents[agent_type]
 
     def step(self) -> None:
         """
         Executes all the stages for all agents. This method is called by the model.
+
+        Agents removed while a stage is running are skipped for the rest of the stage, agents
+        added while a stage is running are picked up from the next stage.
         """
+        shuffled_types: set[type[Agent]] = set()
         for type_stage in self.types_with_stages:
             # Get the agents of the type
-            agent_keys = list(self.agents_by_type[type_stage.type].keys())
-
-            if self.shuffle:
-                self.model.random.shuffle(agent_keys)
+            agents = self._get_ordered_agents(type_stage.type, shuffled_types)
 
             # Get the stage and run this stage for the agents
             stage = type_stage.stage
-            for agent_key in agent_keys:
-                if agent_key in self.agents_by_type[type_stage.type]:
-                    getattr(self.agents_by_type[type_stage.type][agent_key], stage)()
+            batch_handler = self._batch_handlers.get((type_stage.type, stage))
+            if batch_handler is not None:
+                batch_handler(agents)
+            else:
+                agents_in_schedule = self.agents_by_type[type_stage.type]
+                for agent in agents:
+                    if agent.unique_id in agents_in_schedule:
+                        getattr(agent, stage)()
 
             self.time += self.stage_time
 
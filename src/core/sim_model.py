@@ -1,21 +1,72 @@
 import logging
+from typing import Iterable
 
-from mesa import Model, DataCollector
+from mesa import Agent, Model, DataCollector
 from mesa.space import ContinuousSpace
 from numpy import ndarray
 
 import src.core.common_constants as cc
 import src.core.constants as constants
+from src.core.activation_calendar import ActivationCalendar
 from src.core.scheduler import OrderedMultiStageScheduler, TypeStage
 from src.device.base_station import BaseStation
 from src.device.controller import CentralController
+from src.device.hardware import NetworkCapacityLedger
+from src.device.payload import PayloadArena
 from src.device.vehicle import Vehicle
+from src.device.vehicle_engine import ColumnarVehicleEngine
 from src.orchestrator.cloud_orchestrator import CloudOrchestrator
 from src.orchestrator.edge_orchestrator import EdgeOrchestrator
 
 logger = logging.getLogger(__name__)
 
 
+class SimDataCollector(DataCollector):
+    def __init__(
+        self,
+        model_reporters: dict,
+        agent_reporters: dict,
+        vehicle_engine: ColumnarVehicleEngine | None = None,
+    ):
+        """
+        Initialize the data collector. The columnar vehicle engine is a single agent, so its
+        row in the agent data is replaced by a row for each active vehicle.
+
+        Parameters
+        ----------
+        model_reporters : dict
+            The reporters of the model variables.
+        agent_reporters : dict
+            The reporters of the agent variables, the vehicle data, the vehicles in range and
+            the agent type in this order.
+        vehicle_engine : ColumnarVehicleEngine | None, optional
+            The columnar vehicle engine, by default None.
+        """
+        super().__init__(
+            model_reporters=model_reporters, agent_reporters=agent_reporters
+        )
+        self._vehicle_engine: ColumnarVehicleEngine | None = vehicle_engine
+
+    def _record_agents(self, model: Model) -> Iterable[tuple]:
+        """
+        Record the agent data, with the rows of the vehicles of the columnar engine.
+        """
+        agent_records = super()._record_agents(model)
+        if self._vehicle_engine is None:
+            return agent_records
+
+        step = model.schedule.steps
+        engine_id = self._vehicle_engine.unique_id
+        records = [record for record in agent_records if record[1] != engine_id]
+        records.extend(
+            (step, vehicle_id, data_generated, vehicles_in_range, constants.VEHICLES)
+            for vehicle_id, data_generated, vehicles_in_range in (
+                self._vehicle_engine.vehicle_reports()
+            )
+        )
+        return records
+
+
 class SimModel(Model):
     def __init__(
         self,
@@ -27,34 +78,46 @@ class SimModel(Model):
         space_settings: dict,
         start_time: int,
         end_time: int,
+        vehicle_engine: ColumnarVehicleEngine | None = None,
+        network_ledger: NetworkCapacityLedger | None = None,
     ):
         """
         Initialize the simulation model.
         """
         super().__init__()
         self._vehicles: dict[int, Vehicle] = vehicles
+        self._vehicle_engine: ColumnarVehicleEngine | None = vehicle_engine
+        self._network_ledger: NetworkCapacityLedger | None = network_ledger
+        self._payload_arena: PayloadArena = PayloadArena()
         self._base_stations: dict[int, BaseStation] = base_stations
         self._controllers: dict[int, CentralController] = controllers
 
         self._edge_orchestrator: EdgeOrchestrator = edge_orchestrator
         self._cloud_orchestrator: CloudOrchestrator = cloud_orchestrator
 
-        self._activation_times: dict[str, dict[int, set[int]]] = {
-            constants.VEHICLES: {},
-            constants.BASE_STATIONS: {},
-            constants.CONTROLLERS: {},
-        }
-        self._deactivation_times: dict[str, dict[int, set[int]]] = {
-            constants.VEHICLES: {},
-            constants.BASE_STATIONS: {},
-            constants.CONTROLLERS: {},
-        }
+        self._activation_calendar: ActivationCalendar = ActivationCalendar(
+            [constants.VEHICLES, constants.BASE_STATIONS, constants.CONTROLLERS]
+        )
 
         self._space_settings: dict = space_settings
+        self.space: ContinuousSpace | None = None
+
         self._start_time: int = start_time
         self._end_time: int = end_time
         self._current_time: int = -1
 
+    @property
+    def network_utilisation(self) -> dict[str, ndarray[float]]:
+        """Get the network utilisation of each hardware class in the last completed step."""
+        if self._network_ledger is None:
+            return {}
+        return self._network_ledger.utilisation_snapshot
+
+    @property
+    def payload_arena(self) -> PayloadArena:
+        """Get the arena of the payloads exchanged by the devices in a step."""
+        return self._payload_arena
+
     @property
     def current_time(self) -> int:
         """Get the current time."""
@@ -87,42 +150,53 @@ class SimModel(Model):
         logger.debug("Create data collector.")
         self._create_data_collector()
 
-    def save_device_activation_times(self) -> None:
+    def save_device_activation_times(
+        self,
+        vehicle_ids: list[int] | None = None,
+        base_station_ids: list[int] | None = None,
+        controller_ids: list[int] | None = None,
+    ) -> None:
         """
-        Extract the activation and deactivation times of the devices.
+        Add the activation and deactivation times of the devices to the activation calendar.
+
+        Parameters
+        ----------
+        vehicle_ids : list[int] | None, optional
+            The ids of the new vehicles, by default all the vehicles.
+        base_station_ids : list[int] | None, optional
+            The ids of the new base stations, by default all the base stations.
+        controller_ids : list[int] | None, optional
+            The ids of the new controllers, by default all the controllers.
         """
         logger.debug("Extracting activation and deactivation times for vehicles.")
-        for vehicle_id, vehicle in self._vehicles.items():
-            start_times = vehicle.get_activation_times()
-            end_times = vehicle.get_deactivation_times()
-            logger.debug(
-                f"Vehicle {vehicle_id} has activation times {start_times} and deactivation times {end_times}."
-            )
-            self._save_activation_data(
-                start_times, end_times, vehicle_id, constants.VEHICLES
+        if self._vehicle_engine is not None:
+            settings = self._vehicle_engine.activation_settings
+            if vehicle_ids is None:
+                vehicle_ids = list(settings.keys())
+            self._activation_calendar.add_devices(
+                constants.VEHICLES,
+                vehicle_ids,
+                [settings[vehicle_id].enable_times for vehicle_id in vehicle_ids],
+                [settings[vehicle_id].disable_times for vehicle_id in vehicle_ids],
             )
+        else:
+            if vehicle_ids is None:
+                vehicle_ids = list(self._vehicles.keys())
+            self._save_activation_data(self._vehicles, vehicle_ids, constants.VEHICLES)
 
         logger.debug("Extracting activation and deactivation times for base stations.")
-        for base_station_id, base_station in self._base_stations.items():
-            start_times = base_station.get_activation_times()
-            end_times = base_station.get_deactivation_times()
-            logger.debug(
-                f"Base station {base_station_id} has activation times {start_times} and deactivation times {end_times}."
-            )
-            self._save_activation_data(
-                start_times, end_times, base_station_id, constants.BASE_STATIONS
-            )
+        if base_station_ids is None:
+            base_station_ids = list(self._base_stations.keys())
+        self._save_activation_data(
+            self._base_stations, base_station_ids, constants.BASE_STATIONS
+        )
 
         logger.debug("Extracting activation and deactivation times for controllers.")
-        for controller_id, controller in self._controllers.items():
-            start_times = controller.get_activation_times()
-            end_times = controller.get_deactivation_times()
-            logger.debug(
-                f"Controller {controller_id} has activation times {start_times} and deactivation times {end_times}."
-            )
-            self._save_activation_data(
-                start_times, end_times, controller_id, constants.CONTROLLERS
-            )
+        if controller_ids is None:
+            controller_ids = list(self._controllers.keys())
+        self._save_activation_data(
+            self._controllers, controller_ids, constants.CONTROLLERS
+        )
 
     def _initialize_scheduler(self) -> None:
         """
@@ -131,10 +205,14 @@ class SimModel(Model):
         # Prepare the type stage list.
         type_stage_list: list[TypeStage] = []
 
+        # Vehicles are run either by the columnar engine or as individual agents.
+        if self._vehicle_engine is not None:
+            vehicle_type = type(self._vehicle_engine)
+        else:
+            vehicle_type = type(list(self._vehicles.values())[0])
+
         # Add the vehicle type to the type stage list for the uplink stage.
-        vehicle_type_stage = TypeStage(
-            type=type(list(self._vehicles.values())[0]), stage="uplink_stage"
-        )
+        vehicle_type_stage = TypeStage(type=vehicle_type, stage="uplink_stage")
         type_stage_list.append(vehicle_type_stage)
 
         # Add the edge orchestrator type to the type stage list for the uplink stage.
@@ -186,17 +264,19 @@ class SimModel(Model):
         type_stage_list.append(edge_orchestrator_type_stage)
 
         # Add the vehicle type to the type stage list for the downlink stage.
-        vehicle_type_stage = TypeStage(
-            type=type(list(self._vehicles.values())[0]), stage="downlink_stage"
-        )
+        vehicle_type_stage = TypeStage(type=vehicle_type, stage="downlink_stage")
         type_stage_list.append(vehicle_type_stage)
 
         self.schedule = OrderedMultiStageScheduler(self, type_stage_list, shuffle=True)
 
     def _initialize_space(self) -> None:
         """
-        Initialize the space.
+        Initialize the space. The space can be disabled when no model queries it.
         """
+        if self._space_settings.get(cc.SPACE_ENABLED, "yes") != "yes":
+            logger.info("The 2D space is disabled.")
+            return
+
         self.space = ContinuousSpace(
             x_max=self._space_settings[cc.SPACE_X_MAX] + constants.BUFFER_SPACE,
             y_max=self._space_settings[cc.SPACE_Y_MAX] + constants.BUFFER_SPACE,
@@ -205,6 +285,37 @@ class SimModel(Model):
             y_min=self._space_settings[cc.SPACE_Y_MIN] - constants.BUFFER_SPACE,
         )
 
+    def place_agent(self, agent: Agent, position: tuple[float, float]) -> None:
+        """
+        Place a newly activated agent in the space.
+
+        Parameters
+        ----------
+        agent : Agent
+            The agent to place.
+        position : tuple[float, float]
+            The position of the agent.
+        """
+        if self.space is None:
+            return
+        self.space.place_agent(agent, position)
+
+    def move_agent(self, agent: Agent, position: tuple[float, float]) -> None:
+        """
+        Move an agent in the space. The space updates its cached agent points in place, so
+        the queries later in the step see the new position.
+
+        Parameters
+        ----------
+        agent : Agent
+            The agent to move.
+        position : tuple[float, float]
+            The new position of the agent.
+        """
+        if self.space is None:
+            return
+        self.space.move_agent(agent, position)
+
     def _add_orchestrators_to_scheduler(self) -> None:
         """
         Add the orchestrators to the scheduler.
@@ -215,6 +326,11 @@ class SimModel(Model):
         self.schedule.add(self._edge_orchestrator)
         self.schedule.add(self._cloud_orchestrator)
 
+        # The columnar vehicle engine stays in the schedule for the entire simulation.
+        if self._vehicle_engine is not None:
+            self._vehicle_engine.model = self
+            self.schedule.add(self._vehicle_engine)
+
     def _assign_sim_model_to_devices(self) -> None:
         """
         Assign the simulation model to the devices.
@@ -230,7 +346,7 @@ class SimModel(Model):
         """
         Create the data collector.
         """
-        self.data_collector = DataCollector(
+        self.data_collector = SimDataCollector(
             model_reporters={
                 "active_vehicles": self._edge_orchestrator.active_vehicle_count,
                 "active_base_stations": self._edge_orchestrator.active_base_station_count,
@@ -242,7 +358,7 @@ class SimModel(Model):
             },
             agent_reporters={
                 "vehicle_data": lambda v: v.data_generated_at_device
-                if v.type == constants.VEHICLES
+                if v.type == constants.VEHICLES or v.type == constants.VEHICLE_ENGINE
                 else None,
                 "vehicles_in_range": lambda b: b.vehicles_in_range
                 if b.type != constants.CLOUD_ORCHESTRATOR
@@ -250,30 +366,36 @@ class SimModel(Model):
                 else None,
                 "agent_type": lambda a: a.type,
             },
+            vehicle_engine=self._vehicle_engine,
         )
 
     def _save_activation_data(
         self,
-        activate_time: ndarray[int],
-        deactivate_time: ndarray[int],
-        device_id: int,
+        devices: dict[int, Vehicle | BaseStation | CentralController],
+        device_ids: list[int],
         device_type: str,
     ) -> None:
         """
-        Update the activation time of the device.
-        """
-        for i in range(len(activate_time)):
-            start_time_stamp = activate_time[i]
-            if start_time_stamp not in self._activation_times[device_type]:
-                self._activation_times[device_type][start_time_stamp] = {device_id}
-            else:
-                self._activation_times[device_type][start_time_stamp].add(device_id)
+        Add the activation and deactivation times of the devices to the activation calendar.
 
-            end_time_stamp = deactivate_time[i]
-            if end_time_stamp not in self._deactivation_times[device_type]:
-                self._deactivation_times[device_type][end_time_stamp] = {device_id}
-            else:
-                self._deactivation_times[device_type][end_time_stamp].add(device_id)
+        Parameters
+        ----------
+        devices : dict[int, Vehicle | BaseStation | CentralController]
+            The devices, indexed by the device id.
+        device_ids : list[int]
+            The ids of the devices to add.
+        device_type : str
+            The type of the devices.
+        """
+        start_times = [
+            devices[device_id].get_activation_times() for device_id in device_ids
+        ]
+        end_times = [
+            devices[device_id].get_deactivation_times() for device_id in device_ids
+        ]
+        self._activation_calendar.add_devices(
+            device_type, device_ids, start_times, end_times
+        )
 
     def step(self) -> None:
         """
@@ -293,12 +415,19 @@ class SimModel(Model):
         # Collect data from the previous time step
         self.data_collector.collect(self)
 
+        # Start counting the network consumption of this step
+        if self._network_ledger is not None:
+            self._network_ledger.start_step()
+
         # Activate the devices, if any
         self._do_device_activations()
 
         # Step through the schedule object
         self.schedule.step()
 
+        # The messages of this step are delivered, reuse the payloads in the next steps
+        self._payload_arena.recycle()
+
         # Deactivate the devices, if any
         self._do_device_deactivations()
 
@@ -348,35 +477,65 @@ class SimModel(Model):
         """
         Activate the devices in the current time step.
         """
-        if self._current_time in self._activation_times[constants.VEHICLES]:
-            self._activate_vehicles()
-        if self._current_time in self._activation_times[constants.BASE_STATIONS]:
-            self._activate_base_stations()
-        if self._current_time in self._activation_times[constants.CONTROLLERS]:
-            self._activate_controllers()
+        vehicle_ids = self._activation_calendar.pop_activations(
+            constants.VEHICLES, self._current_time
+        )
+        if len(vehicle_ids) > 0:
+            self._activate_vehicles(vehicle_ids)
+
+        base_station_ids = self._activation_calendar.pop_activations(
+            constants.BASE_STATIONS, self._current_time
+        )
+        if len(base_station_ids) > 0:
+            self._activate_base_stations(base_station_ids)
+
+        controller_ids = self._activation_calendar.pop_activations(
+            constants.CONTROLLERS, self._current_time
+        )
+        if len(controller_ids) > 0:
+            self._activate_controllers(controller_ids)
 
     def _do_device_deactivations(self) -> None:
         """
         Deactivate the devices in the current time step.
         """
-        if self._current_time in self._deactivation_times[constants.VEHICLES]:
-            self._deactivate_vehicles()
-        if self._current_time in self._deactivation_times[constants.BASE_STATIONS]:
-            self._deactivate_base_stations()
-        if self._current_time in self._deactivation_times[constants.CONTROLLERS]:
-            self._deactivate_controllers()
+        vehicle_ids = self._activation_calendar.pop_deactivations(
+            constants.VEHICLES, self._current_time
+        )
+        if len(vehicle_ids) > 0:
+            self._deactivate_vehicles(vehicle_ids)
+
+        base_station_ids = self._activation_calendar.pop_deactivations(
+            constants.BASE_STATIONS, self._current_time
+        )
+        if len(base_station_ids) > 0:
+            self._deactivate_base_stations(base_station_ids)
+
+        controller_ids = self._activation_calendar.pop_deactivations(
+            constants.CONTROLLERS, self._current_time
+        )
+        if len(controller_ids) > 0:
+            self._deactivate_controllers(controller_ids)
 
-    def _activate_vehicles(self) -> None:
+    def _activate_vehicles(self, vehicles_to_activate: ndarray[int]) -> None:
         """
         Activate the vehicles in the current time step.
+
+        Parameters
+        ----------
+        vehicles_to_activate : ndarray[int]
+            The ids of the vehicles.
         """
-        vehicles_to_activate = self._activation_times[constants.VEHICLES][
-            self._current_time
-        ]
         logger.debug(
             f"Activating vehicles {vehicles_to_activate} at time {self._current_time}"
         )
 
+        if self._vehicle_engine is not None:
+            self._vehicle_engine.activate_vehicles(
+                vehicles_to_activate, self._current_time
+            )
+            return
+
         for vehicle_id in vehicles_to_activate:
             vehicle = self._vehicles[vehicle_id]
             vehicle.activate_vehicle(self._current_time)
@@ -385,17 +544,25 @@ class SimModel(Model):
             self.schedule.add(vehicle)
             self._edge_orchestrator.add_vehicle(vehicle)
 
-    def _deactivate_vehicles(self) -> None:
+    def _deactivate_vehicles(self, vehicles_to_deactivate: ndarray[int]) -> None:
         """
         Deactivate the vehicles in the current time step.
+
+        Parameters
+        ----------
+        vehicles_to_deactivate : ndarray[int]
+            The ids of the vehicles.
         """
-        vehicles_to_deactivate = self._deactivation_times[constants.VEHICLES][
-            self._current_time
-        ]
         logger.debug(
             f"Deactivating vehicles {vehicles_to_deactivate} at time {self._current_time}"
         )
 
+        if self._vehicle_engine is not None:
+            self._vehicle_engine.deactivate_vehicles(
+                vehicles_to_deactivate, self._current_time
+            )
+            return
+
         for vehicle_id in vehicles_to_deactivate:
             vehicle = self._vehicles[vehicle_id]
             vehicle.deactivate_vehicle(self._current_time)
@@ -404,13 +571,15 @@ class SimModel(Model):
             self.schedule.remove(vehicle)
             self._edge_orchestrator.remove_vehicle(vehicle_id)
 
-    def _activate_base_stations(self) -> None:
+    def _activate_base_stations(self, base_stations_to_activate: ndarray[int]) -> None:
         """
         Activate the base stations in the current time step.
+
+        Parameters
+        ----------
+        base_stations_to_activate : ndarray[int]
+            The ids of the base stations.
         """
-        base_stations_to_activate = self._activation_times[constants.BASE_STATIONS][
-            self._current_time
-        ]
         logger.debug(
             f"Activating base stations {base_stations_to_activate} at time {self._current_time}"
         )
@@ -424,13 +593,17 @@ class SimModel(Model):
             self._edge_orchestrator.add_base_station(base_station)
             self._cloud_orchestrator.add_base_station(base_station)
 
-    def _deactivate_base_stations(self) -> None:
+    def _deactivate_base_stations(
+        self, base_stations_to_deactivate: ndarray[int]
+    ) -> None:
         """
         Deactivate the base stations in the current time step.
+
+        Parameters
+        ----------
+        base_stations_to_deactivate : ndarray[int]
+            The ids of the base stations.
         """
-        base_stations_to_deactivate = self._deactivation_times[constants.BASE_STATIONS][
-            self._current_time
-        ]
         logger.debug(
             f"Deactivating base stations {base_stations_to_deactivate} at time {self._current_time}"
         )
@@ -444,13 +617,15 @@ class SimModel(Model):
             self._edge_orchestrator.remove_base_station(base_station_id)
             self._cloud_orchestrator.remove_base_station(base_station_id)
 
-    def _activate_controllers(self) -> None:
+    def _activate_controllers(self, controllers_to_activate: ndarray[int]) -> None:
         """
         Activate the controllers in the current time step.
+
+        Parameters
+        ----------
+        controllers_to_activate : ndarray[int]
+            The ids of the controllers.
         """
-        controllers_to_activate = self._activation_times[constants.CONTROLLERS][
-            self._current_time
-        ]
         logger.debug(
             f"Activating controllers {controllers_to_activate} at time {self._current_time}"
         )
@@ -463,13 +638,15 @@ class SimModel(Model):
             self.schedule.add(controller)
             self._cloud_orchestrator.add_controller(controller)
 
-    def _deactivate_controllers(self) -> None:
+    def _deactivate_controllers(self, controllers_to_deactivate: ndarray[int]) -> None:
         """
         Deactivate the controllers in the current time step.
+
+        Parameters
+        ----------
+        controllers_to_deactivate : ndarray[int]
+            The ids of the controllers.
         """
-        controllers_to_deactivate = self._deactivation_times[constants.CONTROLLERS][
-            self._current_time
-        ]
         logger.debug(
             f"Deactivating controllers {controllers_to_deactivate} at time {self._current_time}"
         )
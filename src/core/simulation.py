@@ -9,11 +9,16 @@ from core.sim_model import SimModel
 from output.agent_data import *
 from output.model_data import *
 from src.core.exceptions import UnsupportedInputFormatError
+from src.device.hardware import NetworkCapacityLedger
+from src.device.payload import DataTypeRegistry
+from src.device.vehicle_engine import ColumnarVehicleEngine
+from src.models.mobility import TracePositionStore
 from src.orchestrator.cloud_orchestrator import CloudOrchestrator
 from src.orchestrator.edge_orchestrator import EdgeOrchestrator
 from src.output.writer_factory import OutputWriterFactory
 from src.setup.device_factory import DeviceFactory
-from src.setup.file_reader import ParquetDataReader, CSVDataReader
+from src.setup.file_reader import ArrowDataReader, ParquetDataReader, CSVDataReader
+from src.setup.input_prefetcher import InputDataPrefetcher
 from src.setup.input_helper import SimulationInputHelper
 
 logger = logging.getLogger(__name__)
@@ -37,6 +42,9 @@ class Simulation:
         self._vehicles: dict = {}
         self._base_stations: dict = {}
         self._controllers: dict = {}
+        self._vehicle_engine: ColumnarVehicleEngine | None = None
+        self._network_ledger: NetworkCapacityLedger | None = None
+        self._data_type_registry: DataTypeRegistry | None = None
 
         # Main simulation model
         self._simulation_model: SimModel | None = None
@@ -51,10 +59,15 @@ class Simulation:
         self.time_step: int = -1
         self.current_time: int = -1
         self.data_stream_interval: int = -1
+        self.vehicle_engine: str = constants.AGENT_VEHICLE_ENGINE
+        self.prefetch_input_data: bool = False
 
         # Helper to read input data
         self.sim_input_helper: SimulationInputHelper | None = None
 
+        # Reads the next chunk of the input data in the background
+        self._input_prefetcher: InputDataPrefetcher | None = None
+
         # Activation data
         self._vehicle_activations_data: DataFrame = DataFrame()
         self._base_station_activations_data: DataFrame = DataFrame()
@@ -82,18 +95,24 @@ class Simulation:
 
         logger.info("Streaming the first chunk of the input data.")
         self._read_first_chunk_input_data()
+        self._start_input_prefetcher()
 
-        logger.info("Creating devices.")
-        self._create_devices()
+        try:
+            logger.info("Creating devices.")
+            self._create_devices()
 
-        logger.info("Creating edge and cloud orchestrators.")
-        self._create_orchestrators()
+            logger.info("Creating edge and cloud orchestrators.")
+            self._create_orchestrators()
 
-        logger.info("Creating output writers.")
-        self._create_output_writers()
+            logger.info("Creating output writers.")
+            self._create_output_writers()
 
-        logger.info("Creating device model.")
-        self._create_simulation_model()
+            logger.info("Creating device model.")
+            self._create_simulation_model()
+        except BaseException:
+            # Do not leave the prefetcher thread running when the setup fails.
+            self._stop_input_prefetcher()
+            raise
 
         logger.info("Initializing simulation.")
 
@@ -138,6 +157,14 @@ class Simulation:
             constants.DATA_STREAMING_INTERVAL
         ]
 
+        self.vehicle_engine: str = simulation_data.get(
+            constants.VEHICLE_ENGINE, constants.AGENT_VEHICLE_ENGINE
+        )
+
+        self.prefetch_input_data: bool = (
+            simulation_data.get(constants.PREFETCH_INPUT_DATA, "no") == "yes"
+        )
+
         self.current_time: int = self.start_time
 
         logger.debug("Simulation parameters: ")
@@ -146,6 +173,8 @@ class Simulation:
         logger.debug(f"Time step: {self.time_step}")
         logger.debug(f"Data streaming interval: {self.data_stream_interval}")
         logger.debug(f"Current time: {self.current_time}")
+        logger.debug(f"Vehicle engine: {self.vehicle_engine}")
+        logger.debug(f"Prefetch input data: {self.prefetch_input_data}")
 
     def _read_activations_data(self) -> None:
         """
@@ -162,7 +191,7 @@ class Simulation:
         )
 
     def _read_file(
-        self, data_reader: ParquetDataReader | CSVDataReader | None
+        self, data_reader: ParquetDataReader | CSVDataReader | ArrowDataReader | None
     ) -> DataFrame:
         """
         Read the input data from the file.
@@ -188,6 +217,9 @@ class Simulation:
                 f"Reading partial data from {data_reader.input_file} file until timestamp {self.data_stream_interval}."
             )
             return data_reader.read_data_until_timestamp(self.data_stream_interval)
+        elif data_reader.type == cc.ARROW:
+            logger.debug(f"Reading the entire data from {data_reader.input_file} file.")
+            return data_reader.read_all_data()
         else:
             raise UnsupportedInputFormatError(data_reader.input_file)
 
@@ -195,6 +227,28 @@ class Simulation:
         """
         Create the devices in the simulation.
         """
+        # Intern the data types of the vehicles, which index the columns of the payloads.
+        self._data_type_registry = DataTypeRegistry()
+        self._data_type_registry.intern_data_sources(
+            self.sim_input_helper.vehicle_models_data
+        )
+
+        # Positions of the trace driven vehicles, shared by all of them.
+        trace_positions = TracePositionStore()
+
+        # Capacity of the network hardware of all the devices.
+        self._network_ledger = NetworkCapacityLedger()
+
+        # Create the columnar vehicle engine if the vehicles are not run as agents.
+        if self.vehicle_engine == constants.COLUMNAR_VEHICLE_ENGINE:
+            logger.debug("Creating the columnar vehicle engine.")
+            self._vehicle_engine = ColumnarVehicleEngine(
+                self.sim_input_helper.vehicle_models_data,
+                trace_positions,
+                self._network_ledger,
+                self._data_type_registry,
+            )
+
         # Create the device factory object.
         logger.debug("Creating the device factory.")
         self._device_factory = DeviceFactory(
@@ -203,6 +257,10 @@ class Simulation:
             self._controller_activations_data,
             self.start_time,
             self.end_time,
+            self._vehicle_engine,
+            trace_positions,
+            self._network_ledger,
+            self._data_type_registry,
         )
 
         # Create a device factory object and create the participants
@@ -234,6 +292,7 @@ class Simulation:
             self.v2v_links_data,
             self.v2b_links_data,
             self.sim_input_helper.orchestrator_models_data[constants.EDGE_ORCHESTRATOR],
+            self._vehicle_engine,
         )
 
         self.cloud_orchestrator = CloudOrchestrator(
@@ -269,6 +328,8 @@ class Simulation:
             self.sim_input_helper.space_settings,
             self.start_time,
             self.end_time,
+            self._vehicle_engine,
+            self._network_ledger,
         )
 
     def _create_progress_bar(self) -> None:
@@ -319,11 +380,11 @@ class Simulation:
         )
 
     def _read_first_chunk(
-        self, data_reader: CSVDataReader | ParquetDataReader
+        self, data_reader: CSVDataReader | ParquetDataReader | ArrowDataReader | None
     ) -> DataFrame:
         """
-        Read the first chunk of the input data. CSVs are read completely while parquet
-        files are read partially.
+        Read the first chunk of the input data. Files with time steps are streamed, the
+        other files are read completely. Optional files that are not given have no data.
 
         Parameters
         ----------
@@ -335,9 +396,10 @@ class Simulation:
         DataFrame
             The input data.
         """
-        if data_reader.type == cc.CSV:
-            return data_reader.read_all_data()
-        elif data_reader.type == cc.PARQUET:
+        if data_reader is None:
+            return DataFrame()
+
+        if data_reader.type in (cc.CSV, cc.PARQUET, cc.ARROW):
             return data_reader.read_data_until_timestamp(
                 self.current_time + self.data_stream_interval
             )
@@ -346,30 +408,52 @@ class Simulation:
 
     def _update_devices_with_new_data(self) -> None:
         """
-        Update the devices with the newly streamed data.
+        Update the devices with the newly streamed data. Only the newly created devices are
+        added to the simulation model.
         """
+        new_vehicle_ids: list[int] = []
         if not self.vehicle_trace_data.empty:
             self._device_factory.create_new_vehicles(
                 self.vehicle_trace_data, self.sim_input_helper.vehicle_models_data
             )
-            updated_vehicles = self._device_factory.vehicles
-            self._simulation_model.update_vehicles(updated_vehicles)
+            new_vehicle_ids = self._device_factory.new_vehicle_ids
+            self._simulation_model.update_vehicles(
+                {
+                    vehicle_id: self._device_factory.vehicles[vehicle_id]
+                    for vehicle_id in new_vehicle_ids
+                    if vehicle_id in self._device_factory.vehicles
+                }
+            )
 
+        new_base_station_ids: list[int] = []
         if not self.base_stations_data.empty:
             self._device_factory.create_new_base_stations(
                 self.base_stations_data, self.sim_input_helper.base_station_models_data
             )
-            updated_base_stations = self._device_factory.base_stations
-            self._simulation_model.update_base_stations(updated_base_stations)
+            new_base_station_ids = self._device_factory.new_base_station_ids
+            self._simulation_model.update_base_stations(
+                {
+                    base_station_id: self._device_factory.base_stations[base_station_id]
+                    for base_station_id in new_base_station_ids
+                }
+            )
 
+        new_controller_ids: list[int] = []
         if not self.controller_data.empty:
             self._device_factory.create_new_controllers(
                 self.controller_data, self.sim_input_helper.controller_models_data
             )
-            updated_controllers = self._device_factory.controllers
-            self._simulation_model.update_controllers(updated_controllers)
+            new_controller_ids = self._device_factory.new_controller_ids
+            self._simulation_model.update_controllers(
+                {
+                    controller_id: self._device_factory.controllers[controller_id]
+                    for controller_id in new_controller_ids
+                }
+            )
 
-        self._simulation_model.save_device_activation_times()
+        self._simulation_model.save_device_activation_times(
+            new_vehicle_ids, new_base_station_ids, new_controller_ids
+        )
 
     def _update_orchestrators_with_new_data(self) -> None:
         """
@@ -384,51 +468,117 @@ class Simulation:
         if not self.b2c_links_data.empty:
             self.cloud_orchestrator.update_b2c_links(self.b2c_links_data)
 
+    def _start_input_prefetcher(self) -> None:
+        """
+        Start reading the chunk of the first streaming boundary in the background.
+        """
+        if not self.prefetch_input_data:
+            return
+
+        logger.debug("Starting the input data prefetcher.")
+        self._input_prefetcher = InputDataPrefetcher(self._read_input_chunk)
+
+        interval = self.data_stream_interval
+        first_boundary = (self.current_time // interval + 1) * interval
+        self._prefetch_input_data(first_boundary)
+
+    def _stop_input_prefetcher(self) -> None:
+        """
+        Stop the input data prefetcher, if it is running.
+        """
+        if self._input_prefetcher is None:
+            return
+
+        logger.debug("Stopping the input data prefetcher.")
+        self._input_prefetcher.shutdown()
+        self._input_prefetcher = None
+
+    def _prefetch_input_data(self, boundary_time: int) -> None:
+        """
+        Prefetch the chunk that is streamed at the boundary time.
+
+        Parameters
+        ----------
+        boundary_time : int
+            The time at which the chunk is streamed.
+        """
+        if boundary_time > self.end_time:
+            return
+        self._input_prefetcher.prefetch(boundary_time + self.data_stream_interval)
+
     def _stream_next_input_data(self) -> None:
         """
-        Refresh the input data until the next streaming interval.
+        Refresh the input data until the next streaming interval. The chunk is taken from the
+        prefetcher when it is enabled, and the chunk of the next boundary is prefetched.
         """
-        self.vehicle_trace_data = self._read_next_chunk(
-            self.sim_input_helper.file_readers[cc.VEHICLE_TRACE_FILE]
-        )
-        self.v2v_links_data = self._read_next_chunk(
-            self.sim_input_helper.file_readers[cc.V2V_LINKS_FILE]
-        )
-        self.base_stations_data = self._read_next_chunk(
-            self.sim_input_helper.file_readers[cc.BASE_STATIONS_FILE]
-        )
-        self.v2b_links_data = self._read_next_chunk(
-            self.sim_input_helper.file_readers[cc.V2B_LINKS_FILE]
-        )
-        self.controller_data = self._read_next_chunk(
-            self.sim_input_helper.file_readers[cc.CONTROLLERS_FILE]
-        )
-        self.b2c_links_data = self._read_next_chunk(
-            self.sim_input_helper.file_readers[cc.B2C_LINKS_FILE]
-        )
+        until_timestamp = self.current_time + self.data_stream_interval
+        if self._input_prefetcher is None:
+            input_chunk = self._read_input_chunk(until_timestamp)
+        else:
+            input_chunk = self._input_prefetcher.get_chunk(until_timestamp)
+            self._prefetch_input_data(self.current_time + self.data_stream_interval)
 
+        self.vehicle_trace_data = input_chunk[cc.VEHICLE_TRACE_FILE]
+        self.v2v_links_data = input_chunk[cc.V2V_LINKS_FILE]
+        self.base_stations_data = input_chunk[cc.BASE_STATIONS_FILE]
+        self.v2b_links_data = input_chunk[cc.V2B_LINKS_FILE]
+        self.controller_data = input_chunk[cc.CONTROLLERS_FILE]
+        self.b2c_links_data = input_chunk[cc.B2C_LINKS_FILE]
+
+    def _read_input_chunk(self, until_timestamp: int) -> dict[str, DataFrame]:
+        """
+        Read the next chunk of all the streamed input files. This runs in the worker thread
+        of the prefetcher when it is enabled.
+
+        Parameters
+        ----------
+        until_timestamp : int
+            The timestamp until which the data is read.
+
+        Returns
+        ----------
+        dict[str, DataFrame]
+            The input data of each file.
+        """
+        file_readers = self.sim_input_helper.file_readers
+        return {
+            file_key: self._read_next_chunk(file_readers[file_key], until_timestamp)
+            for file_key in [
+                cc.VEHICLE_TRACE_FILE,
+                cc.V2V_LINKS_FILE,
+                cc.BASE_STATIONS_FILE,
+                cc.V2B_LINKS_FILE,
+                cc.CONTROLLERS_FILE,
+                cc.B2C_LINKS_FILE,
+            ]
+        }
+
+    @staticmethod
     def _read_next_chunk(
-        self, data_reader: CSVDataReader | ParquetDataReader
+        data_reader: CSVDataReader | ParquetDataReader | ArrowDataReader | None,
+        until_timestamp: int,
     ) -> DataFrame:
         """
-        Read the next chunk of the input data. Only parquet files are read partially.
+        Read the next chunk of the input data. Files without time steps and optional files
+        that are not given return no new data.
 
         Parameters
         ----------
         data_reader: InputDataReader
             The input data reader object.
+        until_timestamp : int
+            The timestamp until which the data is read.
 
         Returns
         ----------
         DataFrame
             The input data.
         """
-        if data_reader.type == cc.CSV:
+        if data_reader is None:
             return DataFrame()
-        elif data_reader.type == cc.PARQUET:
-            return data_reader.read_data_until_timestamp(
-                self.current_time + self.data_stream_interval
-            )
+
+        if data_reader.type in (cc.CSV, cc.PARQUET, cc.ARROW):
+            return data_reader.read_data_until_timestamp(until_timestamp)
         else:
             raise UnsupportedInputFormatError(data_reader.input_file)
 
@@ -443,9 +593,12 @@ class Simulation:
         self._create_progress_bar()
 
         logger.info("Starting the simulation.")
-        while self.current_time < self.end_time:
-            self._progress_bar.update(self.time_step)
-            self.step()
+        try:
+            while self.current_time < self.end_time:
+                self._progress_bar.update(self.time_step)
+                self.step()
+        finally:
+            self._stop_input_prefetcher()
 
         self._close_progress_bar()
 
@@ -7,9 +7,9 @@ import src.core.constants as constants
 from src.device.activation import ActivationSettings
 from src.device.hardware import ComputingHardware, NetworkHardware
 from src.device.payload import (
-    VehiclePayload,
     BaseStationPayload,
     BaseStationResponse,
+    PayloadBatch,
     VehicleResponse,
 )
 from src.models.model_factory import ModelFactory
@@ -60,7 +60,7 @@ class BaseStation(Agent):
         self._activation_settings: ActivationSettings = activation_settings
 
         # Incoming vehicle data from the vehicles, set by the edge orchestrator
-        self._uplink_vehicle_data: dict[int, VehiclePayload] = {}
+        self._uplink_vehicle_data: PayloadBatch = PayloadBatch.empty(-1)
 
         # Uplink payload generated at the base station after receiving the vehicle data
         self._uplink_payload: BaseStationPayload | None = None
@@ -149,7 +149,7 @@ class BaseStation(Agent):
         self._mobility_model.current_time = time_step
         self._mobility_model.step()
         self._location = self._mobility_model.current_location
-        self.model.space.place_agent(self, self._location)
+        self.model.place_agent(self, self._location)
 
     def deactivate_base_station(self, time_step: int) -> None:
         """
@@ -157,14 +157,19 @@ class BaseStation(Agent):
         """
         pass
 
-    def set_uplink_vehicle_data(self, incoming_data: dict[int, VehiclePayload]) -> None:
+    def set_uplink_vehicle_data(self, uplink_data: PayloadBatch) -> None:
         """
         Set the incoming data for the base station.
+
+        Parameters
+        ----------
+        uplink_data : PayloadBatch
+            The payloads of the vehicles assigned to the base station.
         """
-        self._uplink_vehicle_data = incoming_data
+        self._uplink_vehicle_data = uplink_data
         logger.debug(
             f"Vehicles near base station {self.unique_id} are "
-            f"{[x.source for x in self._uplink_vehicle_data.values()]} at time {self.model.current_time}."
+            f"{uplink_data.sources.tolist()} at time {self.model.current_time}."
         )
 
     def _create_models(self, base_station_models_data: dict) -> None:
@@ -203,9 +208,7 @@ class BaseStation(Agent):
         Use the network hardware to transfer data in the uplink direction.
         """
         # Find the data size of the uplink data
-        uplink_data_size = 0.0
-        for vehicle_payload in self._uplink_vehicle_data.values():
-            uplink_data_size += vehicle_payload.total_data_size
+        uplink_data_size = float(self._uplink_vehicle_data.total_data_sizes.sum())
 
         self._wireless_hardware.consume_capacity(uplink_data_size)
 
@@ -217,6 +220,16 @@ class BaseStation(Agent):
             sum(self._downlink_response.downlink_data)
         )
 
+    def release_step_data(self) -> None:
+        """
+        Drop the payloads of the current step, they are recycled at the end of the step.
+        The downlink vehicle data is replaced as the edge orchestrator keeps the current one
+        until it has sent it to the vehicles.
+        """
+        self._uplink_payload = None
+        self._downlink_response = None
+        self._downlink_vehicle_data = {}
+
     def uplink_stage(self) -> None:
         """
         Uplink stage of the base station. Create data to be sent to the central controller.
@@ -235,11 +248,13 @@ class BaseStation(Agent):
 
         if self._mobility_model.type != constants.STATIC_MOBILITY:
             self._location = self._mobility_model.current_location
-            self.model.space.move_agent(self, self._location)
+            self.model.move_agent(self, self._location)
 
         # Create base station payload if the base station has received data from the vehicles.
         self._uplink_payload = self._data_composer.compose_basestation_payload(
-            self.model.current_time, self._uplink_vehicle_data
+            self.model.current_time,
+            self._uplink_vehicle_data,
+            self.model.payload_arena,
         )
         self._received_veh_data_size = self._uplink_payload.uplink_data_size
         self._vehicles_in_range = len(self._uplink_payload.sources)
@@ -253,7 +268,7 @@ class BaseStation(Agent):
         Downlink stage of the base station.
         """
         # Clear the uplink vehicle data as the transfer is complete.
-        self._uplink_vehicle_data.clear()
+        self._uplink_vehicle_data = PayloadBatch.empty(self.model.current_time)
 
         logger.debug(
             f"Downlink stage for base station {self.unique_id} at time {self.model.current_time}."
@@ -267,12 +282,12 @@ class BaseStation(Agent):
                 continue
 
             # Create the downlink vehicle response.
-            self._downlink_vehicle_data[vehicle_id] = VehicleResponse(
-                destination=vehicle_id,
-                status=True,
-                timestamp=self.model.current_time,
-                downlink_data=self._downlink_response.downlink_data[
-                    vehicle_index_in_data
-                ],
+            self._downlink_vehicle_data[
+                vehicle_id
+            ] = self.model.payload_arena.vehicle_response(
+                self.model.current_time,
+                vehicle_id,
+                self._downlink_response.downlink_data[vehicle_index_in_data],
+                True,
             )
             vehicle_index_in_data += 1
@@ -6,7 +6,11 @@ from numpy import ndarray
 import src.core.constants as constants
 from src.device.activation import ActivationSettings
 from src.device.hardware import *
-from src.device.payload import BaseStationPayload, BaseStationResponse
+from src.device.payload import (
+    BaseStationPayload,
+    BaseStationResponse,
+    DataTypeRegistry,
+)
 from src.models.model_factory import ModelFactory
 
 logger = logging.getLogger(__name__)
@@ -21,6 +25,7 @@ class CentralController(Agent):
         wireless_hardware: NetworkHardware,
         activation_settings: ActivationSettings,
         controller_models: dict,
+        data_type_registry: DataTypeRegistry,
     ):
         """
         Initialize the central controller.
@@ -39,6 +44,8 @@ class CentralController(Agent):
             The wireless hardware of the controller.
         activation_settings : ActivationSettings
             The activation settings of the controller.
+        data_type_registry : DataTypeRegistry
+            The registry of the data types of the simulation.
         """
         super().__init__(controller_id, None)
 
@@ -58,7 +65,7 @@ class CentralController(Agent):
         self._vehicles_in_range: int = 0
 
         controller_models[constants.MOBILITY][constants.POSITION] = controller_position
-        self._create_models(controller_models)
+        self._create_models(controller_models, data_type_registry)
 
     @property
     def location(self) -> list[float]:
@@ -88,7 +95,7 @@ class CentralController(Agent):
     @property
     def vehicles_in_range(self) -> int:
         """Get the number of vehicles in range."""
-        return len(self._controller_collector.all_vehicles)
+        return self._controller_collector.visible_vehicle_count
 
     @property
     def data_sizes_by_type(self) -> dict[str, float]:
@@ -124,7 +131,7 @@ class CentralController(Agent):
         self._mobility_model.current_time = time_step
         self._mobility_model.step()
         self._location = self._mobility_model.current_location
-        self.model.space.place_agent(self, self._location)
+        self.model.place_agent(self, self._location)
 
     def deactivate_controller(self, time_step: int) -> None:
         """
@@ -132,7 +139,9 @@ class CentralController(Agent):
         """
         pass
 
-    def _create_models(self, controller_models: dict) -> None:
+    def _create_models(
+        self, controller_models: dict, data_type_registry: DataTypeRegistry
+    ) -> None:
         """
         Create the models for the base station.
         """
@@ -142,13 +151,19 @@ class CentralController(Agent):
         )
 
         self._controller_collector = model_factory.create_controller_collector(
-            controller_models[constants.DATA_COLLECTOR]
+            controller_models[constants.DATA_COLLECTOR], data_type_registry
         )
 
         self._data_composer = model_factory.create_controller_data_composer(
             controller_models[constants.DATA_COMPOSER]
         )
 
+    def release_step_data(self) -> None:
+        """
+        Drop the responses of the current step, they are recycled at the end of the step.
+        """
+        self._downlink_response = {}
+
     def use_network_for_uplink(self) -> None:
         """
         Use the network hardware to transfer data in the uplink direction.
@@ -176,15 +191,18 @@ class CentralController(Agent):
 
         if self._mobility_model.type != constants.STATIC_MOBILITY:
             self._location = self._mobility_model.current_location
-            self.model.space.move_agent(self, self._location)
+            self.model.move_agent(self, self._location)
 
         self._controller_collector.collect_data(self._received_data)
 
         # Create base station response.
         self._downlink_response = self._data_composer.generate_basestation_response(
-            self.model.current_time, self._received_data
+            self.model.current_time, self._received_data, self.model.payload_arena
         )
 
+        # The received payloads are recycled at the end of the step, do not keep them.
+        self._received_data = {}
+
     def downlink_stage(self) -> None:
         """
         Step through the central controller for the downlink stage.
@@ -1,3 +1,6 @@
+from numpy import bincount, divide, ndarray, zeros, zeros_like
+
+import src.core.constants as constants
 from src.device.payload import VehiclePayload
 
 
@@ -69,15 +72,198 @@ class ComputingHardware:
         )
 
 
+class NetworkCapacityLedger:
+    def __init__(self, initial_capacity: int = 1024):
+        """
+        Initialize the network capacity ledger. The capacity and the consumption of all the
+        network hardware are stored in one array per hardware class, indexed by the slot of
+        the hardware.
+
+        Parameters
+        ----------
+        initial_capacity : int, optional
+            The number of slots to allocate initially for each class, by default 1024.
+        """
+        self._hardware_counts: dict[str, int] = {}
+        self._capacities: dict[str, ndarray[float]] = {}
+        self._consumed: dict[str, ndarray[float]] = {}
+        self._step_consumed: dict[str, ndarray[float]] = {}
+
+        for hardware_class in constants.NETWORK_HARDWARE_CLASSES:
+            self._hardware_counts[hardware_class] = 0
+            self._capacities[hardware_class] = zeros(initial_capacity)
+            self._consumed[hardware_class] = zeros(initial_capacity)
+            self._step_consumed[hardware_class] = zeros(initial_capacity)
+
+        # Utilisation of each hardware in the last completed step
+        self._utilisation_snapshot: dict[str, ndarray[float]] = {
+            hardware_class: zeros(0)
+            for hardware_class in constants.NETWORK_HARDWARE_CLASSES
+        }
+
+    @property
+    def utilisation_snapshot(self) -> dict[str, ndarray[float]]:
+        """Get the utilisation of the hardware of each class in the last completed step."""
+        return self._utilisation_snapshot
+
+    def hardware_count(self, hardware_class: str) -> int:
+        """
+        Get the number of hardware of the class.
+
+        Parameters
+        ----------
+        hardware_class : str
+            The hardware class.
+        """
+        return self._hardware_counts[hardware_class]
+
+    def add_hardware(self, hardware_class: str, capacity: float) -> int:
+        """
+        Add a new hardware to the ledger.
+
+        Parameters
+        ----------
+        hardware_class : str
+            The hardware class.
+        capacity : float
+            The capacity of the hardware.
+
+        Returns
+        -------
+        int
+            The slot of the hardware.
+        """
+        slot = self._hardware_counts[hardware_class]
+        if slot == len(self._capacities[hardware_class]):
+            self._grow(hardware_class)
+
+        self._capacities[hardware_class][slot] = capacity
+        self._hardware_counts[hardware_class] = slot + 1
+        return slot
+
+    def _grow(self, hardware_class: str) -> None:
+        """
+        Double the number of slots of the hardware class, keeping the existing data.
+
+        Parameters
+        ----------
+        hardware_class : str
+            The hardware class.
+        """
+        for arrays in (self._capacities, self._consumed, self._step_consumed):
+            old_array = arrays[hardware_class]
+            arrays[hardware_class] = zeros(2 * len(old_array))
+            arrays[hardware_class][: len(old_array)] = old_array
+
+    def consume(self, hardware_class: str, slot: int, data_size: float) -> None:
+        """
+        Consume the capacity of one hardware.
+
+        Parameters
+        ----------
+        hardware_class : str
+            The hardware class.
+        slot : int
+            The slot of the hardware.
+        data_size : float
+            The transferred data size.
+        """
+        self._consumed[hardware_class][slot] += data_size
+        self._step_consumed[hardware_class][slot] += data_size
+
+    def consume_many(
+        self, hardware_class: str, slots: ndarray[int], data_sizes: ndarray[float]
+    ) -> None:
+        """
+        Consume the capacity of several hardware at once.
+
+        Parameters
+        ----------
+        hardware_class : str
+            The hardware class.
+        slots : ndarray[int]
+            The slots of the hardware. Slots can be repeated.
+        data_sizes : ndarray[float]
+            The data size transferred by each entry.
+        """
+        count = self._hardware_counts[hardware_class]
+        consumed = bincount(slots, weights=data_sizes, minlength=count)
+        self._consumed[hardware_class][:count] += consumed
+        self._step_consumed[hardware_class][:count] += consumed
+
+    def remaining_capacity(
+        self, hardware_class: str, slots: ndarray[int] | int
+    ) -> ndarray[float] | float:
+        """
+        Get the remaining capacity of the hardware.
+
+        Parameters
+        ----------
+        hardware_class : str
+            The hardware class.
+        slots : ndarray[int] | int
+            The slots of the hardware.
+        """
+        return (
+            self._capacities[hardware_class][slots]
+            - self._consumed[hardware_class][slots]
+        )
+
+    def start_step(self) -> None:
+        """
+        Store the utilisation of the last step and start counting the consumption of the new
+        step.
+        """
+        for hardware_class in constants.NETWORK_HARDWARE_CLASSES:
+            count = self._hardware_counts[hardware_class]
+            capacities = self._capacities[hardware_class][:count]
+            step_consumed = self._step_consumed[hardware_class][:count]
+
+            utilisation = zeros_like(step_consumed)
+            divide(step_consumed, capacities, out=utilisation, where=capacities > 0)
+            self._utilisation_snapshot[hardware_class] = utilisation
+
+            step_consumed[:] = 0.0
+
+
 class NetworkHardware:
-    def __init__(self, networking_hardware: dict):
-        self._capacity: float = networking_hardware["capacity"]
+    def __init__(
+        self,
+        networking_hardware: dict,
+        network_ledger: NetworkCapacityLedger,
+        hardware_class: str,
+    ):
+        """
+        Initialize the network hardware. The capacity is kept in the network capacity ledger.
+
+        Parameters
+        ----------
+        networking_hardware : dict
+            The networking hardware settings.
+        network_ledger : NetworkCapacityLedger
+            The ledger of all the network hardware.
+        hardware_class : str
+            The class of the hardware in the ledger.
+        """
         self._max_connections: int = networking_hardware["max_connections"]
 
+        self._network_ledger: NetworkCapacityLedger = network_ledger
+        self._hardware_class: str = hardware_class
+        self._slot: int = network_ledger.add_hardware(
+            hardware_class, networking_hardware["capacity"]
+        )
+
+    @property
+    def slot(self) -> int:
+        """Get the slot of the hardware in the network capacity ledger."""
+        return self._slot
+
     @property
     def capacity(self) -> float:
-        """Get the capacity."""
-        return self._capacity
+        """Get the remaining capacity."""
+        return float(
+            self._network_ledger.remaining_capacity(self._hardware_class, self._slot)
+        )
 
     @property
     def max_connections(self) -> int:
@@ -88,4 +274,4 @@ class NetworkHardware:
         """
         Send data to the base station.
         """
-        self._capacity -= data_size
+        self._network_ledger.consume(self._hardware_class, self._slot, data_size)
@@ -1,30 +1,237 @@
 from dataclasses import dataclass, field
 
+from numpy import asarray, concatenate, empty, ndarray, stack, zeros
 
-@dataclass
-class DataPayload:
-    type: str = "Empty"
-    count: int = 1
-    data_size: float = 0.01
+import src.core.constants as constants
 
 
-@dataclass
+class DataTypeRegistry:
+    def __init__(self):
+        """
+        Initialize the registry of the data types. Each data type is interned to a small integer
+        id, which is the column of the data type in the payload matrices.
+        """
+        self._data_types: list[str] = []
+        self._data_type_ids: dict[str, int] = {}
+
+        # Composers of the vehicle types, built on the data type ids of this registry
+        self._type_composers: dict[tuple, object] = {}
+
+    @property
+    def data_types(self) -> list[str]:
+        """Get the data types, indexed by their id."""
+        return self._data_types
+
+    @property
+    def count(self) -> int:
+        """Get the number of data types."""
+        return len(self._data_types)
+
+    @property
+    def type_composers(self) -> dict[tuple, object]:
+        """Get the composers of the vehicle types, keyed by their data sources."""
+        return self._type_composers
+
+    def intern(self, data_type: str) -> int:
+        """
+        Get the id of the data type, adding it to the registry if it is new.
+
+        Parameters
+        ----------
+        data_type : str
+            The name of the data type.
+
+        Returns
+        -------
+        int
+            The id of the data type.
+        """
+        data_type_id = self._data_type_ids.get(data_type)
+        if data_type_id is None:
+            data_type_id = len(self._data_types)
+            self._data_type_ids[data_type] = data_type_id
+            self._data_types.append(data_type)
+        return data_type_id
+
+    def id_of(self, data_type: str) -> int:
+        """
+        Get the id of the data type without adding it to the registry.
+
+        Parameters
+        ----------
+        data_type : str
+            The name of the data type.
+
+        Returns
+        -------
+        int
+            The id of the data type, -1 if it is not in the registry.
+        """
+        return self._data_type_ids.get(data_type, -1)
+
+    def intern_data_sources(self, vehicle_models: dict) -> None:
+        """
+        Intern the data types of the data sources of all the vehicle types.
+
+        Parameters
+        ----------
+        vehicle_models : dict
+            The model data of all the vehicle types from the config file.
+        """
+        for models in vehicle_models.values():
+            for params in models[constants.DATA_COMPOSER][constants.DATA_SOURCE]:
+                self.intern(params[constants.DATA_SOURCE_TYPE])
+
+
+@dataclass(slots=True)
 class VehiclePayload:
     source: int = -1
     timestamp: int = -1
     total_data_size: float = 0.01
-    data_payload_list: list[DataPayload] = field(default_factory=lambda: [])
+    # Size, count and presence of each data type, indexed by the data type id
+    data_sizes: ndarray[float] = field(default_factory=lambda: zeros(0))
+    data_counts: ndarray[float] = field(default_factory=lambda: zeros(0))
+    data_present: ndarray[bool] = field(default_factory=lambda: zeros(0, dtype=bool))
+
+
+@dataclass(slots=True)
+class PayloadBatch:
+    """
+    Payloads of many vehicles in a time step, with a row for each vehicle and a column for each
+    data type.
+    """
+
+    timestamp: int
+    sources: ndarray[int]
+    total_data_sizes: ndarray[float]
+    data_sizes: ndarray[float]
+    data_counts: ndarray[float]
+    data_present: ndarray[bool]
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def take(self, rows: ndarray[int]) -> "PayloadBatch":
+        """
+        Get the batch with the given rows.
+
+        Parameters
+        ----------
+        rows : ndarray[int]
+            The rows to take.
+
+        Returns
+        -------
+        PayloadBatch
+            The batch with the rows.
+        """
+        return PayloadBatch(
+            self.timestamp,
+            self.sources[rows],
+            self.total_data_sizes[rows],
+            self.data_sizes[rows],
+            self.data_counts[rows],
+            self.data_present[rows],
+        )
+
+    @classmethod
+    def empty(cls, timestamp: int) -> "PayloadBatch":
+        """
+        Create a batch without any payloads. The batch has no data type columns either, the
+        empty batches are skipped when batches are joined.
+
+        Parameters
+        ----------
+        timestamp : int
+            The time of the batch.
+
+        Returns
+        -------
+        PayloadBatch
+            The empty batch.
+        """
+        return cls(
+            timestamp,
+            empty(0, dtype=int),
+            zeros(0),
+            zeros((0, 0)),
+            zeros((0, 0)),
+            zeros((0, 0), dtype=bool),
+        )
+
+    @classmethod
+    def from_payloads(
+        cls, timestamp: int, payloads: list[VehiclePayload]
+    ) -> "PayloadBatch":
+        """
+        Create a batch from the payloads of the vehicles.
+
+        Parameters
+        ----------
+        timestamp : int
+            The time of the batch.
+        payloads : list[VehiclePayload]
+            The payloads, one row for each payload.
+
+        Returns
+        -------
+        PayloadBatch
+            The batch of the payloads.
+        """
+        if len(payloads) == 0:
+            return cls.empty(timestamp)
 
+        return cls(
+            timestamp,
+            asarray([payload.source for payload in payloads], dtype=int),
+            asarray([payload.total_data_size for payload in payloads]),
+            stack([payload.data_sizes for payload in payloads]),
+            stack([payload.data_counts for payload in payloads]),
+            stack([payload.data_present for payload in payloads]),
+        )
 
-@dataclass
+    @classmethod
+    def concatenate(
+        cls, timestamp: int, batches: list["PayloadBatch"]
+    ) -> "PayloadBatch":
+        """
+        Join the rows of the batches into one batch.
+
+        Parameters
+        ----------
+        timestamp : int
+            The time of the batch.
+        batches : list[PayloadBatch]
+            The batches to join.
+
+        Returns
+        -------
+        PayloadBatch
+            The joined batch.
+        """
+        batches = [batch for batch in batches if len(batch) > 0]
+        if len(batches) == 0:
+            return cls.empty(timestamp)
+
+        return cls(
+            timestamp,
+            concatenate([batch.sources for batch in batches]),
+            concatenate([batch.total_data_sizes for batch in batches]),
+            concatenate([batch.data_sizes for batch in batches]),
+            concatenate([batch.data_counts for batch in batches]),
+            concatenate([batch.data_present for batch in batches]),
+        )
+
+
+@dataclass(slots=True)
 class BaseStationPayload:
     timestamp: int = -1
     uplink_data_size: float = 0.01
     sources: list[int] = field(default_factory=lambda: [])
-    uplink_data: list[VehiclePayload] = field(default_factory=lambda: [])
+    uplink_data: PayloadBatch = field(default_factory=lambda: PayloadBatch.empty(-1))
 
 
-@dataclass
+@dataclass(slots=True)
 class VehicleResponse:
     timestamp: int = -1
     destination: int = -1
@@ -32,9 +239,210 @@ class VehicleResponse:
     status: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class BaseStationResponse:
     destination_vehicles: list[int] = field(default_factory=lambda: [])
     timestamp: int = -1
     downlink_data: list[float] = field(default_factory=lambda: [])
     status: bool = False
+
+
+class PayloadArena:
+    def __init__(self):
+        """
+        Initialize the payload arena of a simulation model. The payloads handed out in a time
+        step are reused in the later steps once the arena is recycled, so that the message path
+        does not allocate new objects in every step. The devices drop their references to the
+        payloads by the end of the step.
+        """
+        self._free_vehicle_payloads: list[VehiclePayload] = []
+        self._free_base_station_payloads: list[BaseStationPayload] = []
+        self._free_vehicle_responses: list[VehicleResponse] = []
+        self._free_base_station_responses: list[BaseStationResponse] = []
+
+        # Payloads handed out in the current time step
+        self._used_vehicle_payloads: list[VehiclePayload] = []
+        self._used_base_station_payloads: list[BaseStationPayload] = []
+        self._used_vehicle_responses: list[VehicleResponse] = []
+        self._used_base_station_responses: list[BaseStationResponse] = []
+
+    @property
+    def used_payload_count(self) -> int:
+        """Get the number of payloads handed out in the current time step."""
+        return (
+            len(self._used_vehicle_payloads)
+            + len(self._used_base_station_payloads)
+            + len(self._used_vehicle_responses)
+            + len(self._used_base_station_responses)
+        )
+
+    def vehicle_payload(
+        self,
+        source: int,
+        timestamp: int,
+        total_data_size: float,
+        data_sizes: ndarray[float],
+        data_counts: ndarray[float],
+        data_present: ndarray[bool],
+    ) -> VehiclePayload:
+        """
+        Get a vehicle payload from the arena.
+
+        Parameters
+        ----------
+        source : int
+            The id of the vehicle.
+        timestamp : int
+            The time of the payload.
+        total_data_size : float
+            The total size of the data.
+        data_sizes : ndarray[float]
+            The size of each data type.
+        data_counts : ndarray[float]
+            The count of each data type.
+        data_present : ndarray[bool]
+            Whether the payload has each data type.
+
+        Returns
+        -------
+        VehiclePayload
+            The vehicle payload.
+        """
+        if self._free_vehicle_payloads:
+            payload = self._free_vehicle_payloads.pop()
+        else:
+            payload = VehiclePayload()
+        payload.source = source
+        payload.timestamp = timestamp
+        payload.total_data_size = total_data_size
+        payload.data_sizes = data_sizes
+        payload.data_counts = data_counts
+        payload.data_present = data_present
+
+        self._used_vehicle_payloads.append(payload)
+        return payload
+
+    def base_station_payload(
+        self,
+        timestamp: int,
+        uplink_data_size: float,
+        sources: list[int],
+        uplink_data: PayloadBatch,
+    ) -> BaseStationPayload:
+        """
+        Get a base station payload from the arena.
+
+        Parameters
+        ----------
+        timestamp : int
+            The time of the payload.
+        uplink_data_size : float
+            The size of the uplink data.
+        sources : list[int]
+            The ids of the vehicles that sent the data.
+        uplink_data : PayloadBatch
+            The payloads of the vehicles.
+
+        Returns
+        -------
+        BaseStationPayload
+            The base station payload.
+        """
+        if self._free_base_station_payloads:
+            payload = self._free_base_station_payloads.pop()
+        else:
+            payload = BaseStationPayload()
+        payload.timestamp = timestamp
+        payload.uplink_data_size = uplink_data_size
+        payload.sources = sources
+        payload.uplink_data = uplink_data
+
+        self._used_base_station_payloads.append(payload)
+        return payload
+
+    def vehicle_response(
+        self, timestamp: int, destination: int, downlink_data: float, status: bool
+    ) -> VehicleResponse:
+        """
+        Get a vehicle response from the arena.
+
+        Parameters
+        ----------
+        timestamp : int
+            The time of the response.
+        destination : int
+            The id of the vehicle.
+        downlink_data : float
+            The size of the downlink data.
+        status : bool
+            The status of the response.
+
+        Returns
+        -------
+        VehicleResponse
+            The vehicle response.
+        """
+        if self._free_vehicle_responses:
+            response = self._free_vehicle_responses.pop()
+        else:
+            response = VehicleResponse()
+        response.timestamp = timestamp
+        response.destination = destination
+        response.downlink_data = downlink_data
+        response.status = status
+
+        self._used_vehicle_responses.append(response)
+        return response
+
+    def base_station_response(
+        self,
+        destination_vehicles: list[int],
+        timestamp: int,
+        downlink_data: list[float],
+        status: bool,
+    ) -> BaseStationResponse:
+        """
+        Get a base station response from the arena.
+
+        Parameters
+        ----------
+        destination_vehicles : list[int]
+            The ids of the vehicles to send the data to.
+        timestamp : int
+            The time of the response.
+        downlink_data : list[float]
+            The size of the downlink data of each vehicle.
+        status : bool
+            The status of the response.
+
+        Returns
+        -------
+        BaseStationResponse
+            The base station response.
+        """
+        if self._free_base_station_responses:
+            response = self._free_base_station_responses.pop()
+        else:
+            response = BaseStationResponse()
+        response.destination_vehicles = destination_vehicles
+        response.timestamp = timestamp
+        response.downlink_data = downlink_data
+        response.status = status
+
+        self._used_base_station_responses.append(response)
+        return response
+
+    def recycle(self) -> None:
+        """
+        Return all the payloads handed out in the current time step to the free lists. The
+        payloads must not be used after this call.
+        """
+        self._free_vehicle_payloads.extend(self._used_vehicle_payloads)
+        self._free_base_station_payloads.extend(self._used_base_station_payloads)
+        self._free_vehicle_responses.extend(self._used_vehicle_responses)
+        self._free_base_station_responses.extend(self._used_base_station_responses)
+
+        self._used_vehicle_payloads.clear()
+        self._used_base_station_payloads.clear()
+        self._used_vehicle_responses.clear()
+        self._used_base_station_responses.clear()
@@ -2,12 +2,18 @@ import logging
 
 from mesa import Agent
 from numpy import ndarray
-from pandas import DataFrame
 
 import src.core.constants as constants
 from src.device.activation import ActivationSettings
 from src.device.hardware import *
-from src.device.payload import VehiclePayload, VehicleResponse
+from src.device.payload import (
+    DataTypeRegistry,
+    PayloadBatch,
+    VehiclePayload,
+    VehicleResponse,
+)
+from src.models.composer import VehicleDataComposer
+from src.models.mobility import TracePositionStore
 from src.models.model_factory import ModelFactory
 
 logger = logging.getLogger(__name__)
@@ -21,6 +27,7 @@ class Vehicle(Agent):
         wireless_hardware: NetworkHardware,
         activation_settings: ActivationSettings,
         vehicle_models: dict,
+        data_type_registry: DataTypeRegistry,
     ) -> None:
         """
         Initialize the vehicle.
@@ -37,6 +44,8 @@ class Vehicle(Agent):
             The activation settings of the vehicle.
         vehicle_models : dict
             The model data of the vehicle.
+        data_type_registry : DataTypeRegistry
+            The registry of the data types of the simulation.
         """
         super().__init__(vehicle_id, None)
         self.model = None
@@ -48,8 +57,9 @@ class Vehicle(Agent):
         self.sidelink_payload: VehiclePayload | None = None
         self.downlink_response: VehicleResponse | None = None
 
-        # Received data from other vehicles
-        self._sidelink_received_data: dict[int, VehiclePayload] = {}
+        # Data received from other vehicles in the current step, summed over the senders
+        self._sidelink_received_data: PayloadBatch = PayloadBatch.empty(-1)
+        self._sidelink_sender_count: int = 0
 
         self._computing_hardware: ComputingHardware = computing_hardware
         self._network_hardware: NetworkHardware = wireless_hardware
@@ -60,7 +70,7 @@ class Vehicle(Agent):
         self._total_data_generated: float = 0.0
         self._vehicles_in_range: int = 0
 
-        self._create_models(vehicle_models)
+        self._create_models(vehicle_models, data_type_registry)
 
     @property
     def uplink_payload(self) -> VehiclePayload:
@@ -99,18 +109,25 @@ class Vehicle(Agent):
         """
         return self._activation_settings.disable_times
 
-    def add_sidelink_received_data(self, payload: VehiclePayload) -> None:
+    def set_sidelink_received_data(
+        self, received_data: PayloadBatch, sender_count: int
+    ) -> None:
         """
-        Add received data from another vehicle.
+        Set the data received from other vehicles in the current step.
 
         Parameters
         ----------
-        payload : VehiclePayload
-            The payload of the vehicle.
+        received_data : PayloadBatch
+            The received data summed over the senders, in a single row.
+        sender_count : int
+            The number of vehicles that sent the data.
         """
-        self._sidelink_received_data[payload.source] = payload
+        self._sidelink_received_data = received_data
+        self._sidelink_sender_count = sender_count
 
-    def _create_models(self, model_data: dict) -> None:
+    def _create_models(
+        self, model_data: dict, data_type_registry: DataTypeRegistry
+    ) -> None:
         """
         Create the models for this vehicle.
         """
@@ -122,35 +139,35 @@ class Vehicle(Agent):
         )
 
         self._data_composer = model_factory.create_vehicle_data_composer(
-            model_data[constants.DATA_COMPOSER]
+            model_data[constants.DATA_COMPOSER], data_type_registry
         )
 
         self._data_simplifier = model_factory.create_vehicle_data_simplifier(
-            model_data[constants.DATA_SIMPLIFIER]
+            model_data[constants.DATA_SIMPLIFIER], data_type_registry
         )
 
         self._data_collector = model_factory.create_vehicle_data_collector(
-            model_data[constants.DATA_COLLECTOR]
+            model_data[constants.DATA_COLLECTOR], data_type_registry
         )
 
-    def update_mobility_data(self, mobility_data: DataFrame | list[float]) -> None:
+    def update_mobility_data(
+        self, mobility_data: TracePositionStore | list[float]
+    ) -> None:
         """
         Update the mobility data depending on the mobility model.
 
         Parameters
         ----------
-        mobility_data : DataFrame | list[float]
-            The mobility data to update.
+        mobility_data : TracePositionStore | list[float]
+            The trace positions shared by all the vehicles, or the position of the vehicle.
         """
         match self._mobility_model.type:
             case constants.STATIC_MOBILITY:
                 logger.debug(f"Updating position for vehicle {self.unique_id}")
                 self._mobility_model.update_position(mobility_data)
             case constants.TRACE_MOBILITY:
-                logger.debug(
-                    f"Updating trace for vehicle {self.unique_id} with length {len(mobility_data)}"
-                )
-                self._mobility_model.update_positions(mobility_data)
+                logger.debug(f"Setting trace positions for vehicle {self.unique_id}")
+                self._mobility_model.set_trace_positions(mobility_data, self.unique_id)
 
     def activate_vehicle(self, time_step: int) -> None:
         """
@@ -165,7 +182,7 @@ class Vehicle(Agent):
         self._location = self._mobility_model.current_location
 
         # Place the vehicle in the network
-        self.model.space.place_agent(self, self._location)
+        self.model.place_agent(self, self._location)
 
     def deactivate_vehicle(self, time_step: int) -> None:
         """
@@ -193,34 +210,102 @@ class Vehicle(Agent):
 
     def uplink_stage(self) -> None:
         """
-        Downlink stage for the vehicle.
+        Uplink stage for the vehicle.
         """
         logger.debug(
             f"Uplink stage for vehicle {self.unique_id} at time {self.model.current_time}"
         )
+        self._run_uplink_stage(self.model.current_time)
+
+    @staticmethod
+    def uplink_stage_batch(vehicles: list["Vehicle"]) -> None:
+        """
+        Uplink stage for all the vehicles in the schedule.
+
+        Parameters
+        ----------
+        vehicles : list[Vehicle]
+            The vehicles in the order to run them in.
+        """
+        if len(vehicles) == 0:
+            return
+
+        current_time = vehicles[0].model.current_time
+        logger.debug(
+            f"Uplink stage for {len(vehicles)} vehicles at time {current_time}"
+        )
+        for vehicle in vehicles:
+            vehicle._update_location(current_time)
+
+        # Compose and simplify the data of all the vehicles of each type at once
+        (
+            uplink_payloads,
+            sidelink_payloads,
+        ) = VehicleDataComposer.compose_payloads_of_vehicles(
+            current_time,
+            [vehicle._data_composer for vehicle in vehicles],
+            [vehicle._data_simplifier for vehicle in vehicles],
+            vehicles[0].model.payload_arena,
+        )
+        for vehicle, uplink_payload, sidelink_payload in zip(
+            vehicles, uplink_payloads, sidelink_payloads
+        ):
+            vehicle._set_payloads(uplink_payload, sidelink_payload)
+
+    def _run_uplink_stage(self, current_time: int) -> None:
+        """
+        Run the uplink stage for the vehicle at the given time.
+
+        Parameters
+        ----------
+        current_time : int
+            The current time.
+        """
+        self._update_location(current_time)
+        self._set_payloads(
+            *self._data_composer.compose_payloads(
+                current_time, self._data_simplifier, self.model.payload_arena
+            )
+        )
+
+    def _update_location(self, current_time: int) -> None:
+        """
+        Update the location of the vehicle at the given time.
 
-        # Update the previous base station
+        Parameters
+        ----------
+        current_time : int
+            The current time.
+        """
+        # Update the previous base station and clear the sidelink data of the last step
         self._previous_bs = self.selected_bs
+        self._sidelink_received_data = PayloadBatch.empty(current_time)
+        self._sidelink_sender_count = 0
 
         # Propagate the mobility model and get the current location
-        self._mobility_model.current_time = self.model.current_time
+        self._mobility_model.current_time = current_time
         self._mobility_model.step()
 
         if self._mobility_model.type != constants.STATIC_MOBILITY:
             self._location = self._mobility_model.current_location
-            self.model.space.move_agent(self, self._location)
+            self.model.move_agent(self, self._location)
 
-        # Compose the data using the data composer
-        self._uplink_payload = self._data_composer.compose_uplink_payload(
-            self.model.current_time
-        )
-        self._uplink_payload.source = self.unique_id
-        self._uplink_payload = self._data_simplifier.simplify_data(self._uplink_payload)
+    def _set_payloads(
+        self, uplink_payload: VehiclePayload, sidelink_payload: VehiclePayload
+    ) -> None:
+        """
+        Set the payloads composed by the data composer.
 
-        # Compose the side link payload
-        self.sidelink_payload = self._data_composer.compose_sidelink_payload(
-            self.model.current_time
-        )
+        Parameters
+        ----------
+        uplink_payload : VehiclePayload
+            The uplink payload.
+        sidelink_payload : VehiclePayload
+            The side link payload.
+        """
+        uplink_payload.source = self.unique_id
+        self._uplink_payload = uplink_payload
+        self.sidelink_payload = sidelink_payload
 
         self._total_data_generated = (
             self._uplink_payload.total_data_size + self.sidelink_payload.total_data_size
@@ -233,6 +318,34 @@ class Vehicle(Agent):
         logger.debug(
             f"Downlink stage for vehicle {self.unique_id} at time {self.model.current_time}"
         )
+        self._run_downlink_stage()
 
-        self._vehicles_in_range = len(self._sidelink_received_data)
+    @staticmethod
+    def downlink_stage_batch(vehicles: list["Vehicle"]) -> None:
+        """
+        Downlink stage for all the vehicles in the schedule.
+
+        Parameters
+        ----------
+        vehicles : list[Vehicle]
+            The vehicles in the order to run them in.
+        """
+        if len(vehicles) == 0:
+            return
+
+        logger.debug(
+            f"Downlink stage for {len(vehicles)} vehicles at time {vehicles[0].model.current_time}"
+        )
+        for vehicle in vehicles:
+            vehicle._run_downlink_stage()
+
+    def _run_downlink_stage(self) -> None:
+        """
+        Run the downlink stage for the vehicle.
+        """
+        self._vehicles_in_range = self._sidelink_sender_count
         self._data_collector.collect_data(self._sidelink_received_data)
+
+        # The payloads are recycled at the end of the step, do not keep them.
+        self._uplink_payload = None
+        self.downlink_response = None
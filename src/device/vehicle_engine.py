@@ -0,0 +1,594 @@
+import logging
+
+from mesa import Agent
+from numpy import (
+    asarray,
+    bincount,
+    flatnonzero,
+    floor,
+    full,
+    isnan,
+    nan,
+    ndarray,
+    zeros,
+)
+
+import src.core.constants as constants
+from src.core.exceptions import (
+    MissingVehiclePositionError,
+    ModelTypeNotImplementedError,
+)
+from src.device.activation import ActivationSettings
+from src.device.hardware import NetworkCapacityLedger
+from src.device.payload import DataTypeRegistry, PayloadBatch
+from src.models.mobility import TracePositionStore
+from src.models.model_factory import ModelFactory
+from src.models.simplifier import (
+    PerTypeVehicleDataSimplifier,
+    PriorityVehicleDataSimplifier,
+    VehicleDataSimplifier,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnarVehicleEngine(Agent):
+    _SLOT_ARRAYS: tuple[str, ...] = (
+        "_vehicle_ids",
+        "_type_index",
+        "_active",
+        "_locations",
+        "_position_slots",
+        "_selected_bs",
+        "_previous_bs",
+        "_previous_time",
+        "_uplink_data_size",
+        "_uplink_data_sizes",
+        "_uplink_data_counts",
+        "_sidelink_data_size",
+        "_data_generated",
+        "_network_slots",
+        "_downlink_data",
+        "_sidelink_received_size",
+        "_sidelink_sender_count",
+        "_vehicles_in_range",
+    )
+
+    def __init__(
+        self,
+        vehicle_models: dict,
+        trace_positions: TracePositionStore,
+        network_ledger: NetworkCapacityLedger,
+        data_type_registry: DataTypeRegistry,
+        initial_capacity: int = 1024,
+    ):
+        """
+        Initialize the columnar vehicle engine.
+
+        All the vehicles are stored as rows of NumPy arrays indexed by a dense vehicle slot. The
+        uplink and downlink stages are run for all the active vehicles at once.
+
+        Parameters
+        ----------
+        vehicle_models : dict
+            The model data of all the vehicle types from the config file.
+        trace_positions : TracePositionStore
+            The positions of the trace driven vehicles, shared with the device factory.
+        network_ledger : NetworkCapacityLedger
+            The ledger that holds the network capacity of the vehicles.
+        data_type_registry : DataTypeRegistry
+            The registry of the data types of the simulation.
+        initial_capacity : int, optional
+            The number of vehicle slots to allocate initially, by default 1024.
+        """
+        super().__init__(990002, None)
+        self.type: str = constants.VEHICLE_ENGINE
+        self.model = None
+        self._data_type_registry: DataTypeRegistry = data_type_registry
+
+        # Vehicle types and the data types generated by them
+        self._vehicle_types: list[str] = list(vehicle_models.keys())
+        self._create_type_tables(vehicle_models)
+
+        # Mapping between the vehicle ids and the slots
+        self._vehicle_count: int = 0
+        self._slot_lookup: ndarray[int] = full(initial_capacity, -1, dtype=int)
+        self._active_slots: ndarray[int] | None = None
+        self.activation_settings: dict[int, ActivationSettings] = {}
+
+        # Positions of the trace driven vehicles
+        self._trace_positions: TracePositionStore = trace_positions
+
+        # Network capacity of the vehicles
+        self._network_ledger: NetworkCapacityLedger = network_ledger
+
+        self._allocate_slots(initial_capacity)
+
+    def _create_type_tables(self, vehicle_models: dict) -> None:
+        """
+        Create the per vehicle type parameter tables.
+
+        Parameters
+        ----------
+        vehicle_models : dict
+            The model data of all the vehicle types.
+        """
+        for vehicle_type in self._vehicle_types:
+            self._check_supported_models(vehicle_models[vehicle_type])
+        self._data_type_registry.intern_data_sources(vehicle_models)
+
+        type_count = len(self._vehicle_types)
+        data_type_count = self._data_type_registry.count
+        self._data_rates: ndarray[float] = zeros((type_count, data_type_count))
+        self._data_unit_sizes: ndarray[float] = zeros((type_count, data_type_count))
+        self._sidelink_sources: ndarray[float] = zeros((type_count, data_type_count))
+        self._source_masks: ndarray[bool] = zeros(
+            (type_count, data_type_count), dtype=bool
+        )
+        self._data_priorities: ndarray[int] = zeros(
+            (type_count, data_type_count), dtype=int
+        )
+        self._simplifiers: list[
+            VehicleDataSimplifier
+            | PerTypeVehicleDataSimplifier
+            | PriorityVehicleDataSimplifier
+        ] = []
+        self._network_capacities: ndarray[float] = zeros(type_count)
+        self._is_trace_type: ndarray[bool] = zeros(type_count, dtype=bool)
+        self._static_positions: ndarray[float] = full((type_count, 2), nan)
+
+        for type_idx, vehicle_type in enumerate(self._vehicle_types):
+            models = vehicle_models[vehicle_type]
+            for params in models[constants.DATA_COMPOSER][constants.DATA_SOURCE]:
+                data_idx = self._data_type_registry.intern(
+                    params[constants.DATA_SOURCE_TYPE]
+                )
+                self._source_masks[type_idx, data_idx] = True
+                self._data_rates[type_idx, data_idx] = params[constants.DATA_COUNTS]
+                self._data_unit_sizes[type_idx, data_idx] = params[constants.DATA_SIZE]
+                self._data_priorities[type_idx, data_idx] = params[
+                    constants.DATA_PRIORITY
+                ]
+                if params[constants.DATA_SIDE_LINK] == "yes":
+                    self._sidelink_sources[type_idx, data_idx] = 1.0
+
+            self._simplifiers.append(
+                ModelFactory.create_vehicle_data_simplifier(
+                    models[constants.DATA_SIMPLIFIER], self._data_type_registry
+                )
+            )
+            self._network_capacities[type_idx] = models[constants.NETWORKING_HARDWARE][
+                "capacity"
+            ]
+
+            mobility = models[constants.MOBILITY]
+            if mobility[constants.MODEL_NAME] == constants.TRACE_MOBILITY:
+                self._is_trace_type[type_idx] = True
+            else:
+                self._static_positions[type_idx] = mobility[constants.POSITION]
+
+    @staticmethod
+    def _check_supported_models(models: dict) -> None:
+        """
+        Check that the models of a vehicle type can be run by the columnar engine.
+
+        Parameters
+        ----------
+        models : dict
+            The model data of the vehicle type.
+        """
+        supported_models = {
+            constants.MOBILITY: [constants.STATIC_MOBILITY, constants.TRACE_MOBILITY],
+            constants.DATA_COMPOSER: [constants.SIMPLE_VEHICLE_DATA_COMPOSER],
+            constants.DATA_SIMPLIFIER: [
+                constants.SIMPLE_VEHICLE_DATA_SIMPLIFIER,
+                constants.PER_TYPE_VEHICLE_DATA_SIMPLIFIER,
+                constants.PRIORITY_VEHICLE_DATA_SIMPLIFIER,
+            ],
+            constants.DATA_COLLECTOR: [constants.SIMPLE_VEHICLE_DATA_COLLECTOR],
+        }
+        for model_key, model_names in supported_models.items():
+            if models[model_key][constants.MODEL_NAME] not in model_names:
+                raise ModelTypeNotImplementedError(
+                    model_key, models[model_key][constants.MODEL_NAME]
+                )
+
+    def _allocate_slots(self, capacity: int) -> None:
+        """
+        Allocate the per vehicle arrays.
+
+        Parameters
+        ----------
+        capacity : int
+            The number of vehicle slots.
+        """
+        data_type_count = self._data_type_registry.count
+        self._capacity: int = capacity
+
+        self._vehicle_ids: ndarray[int] = full(capacity, -1, dtype=int)
+        self._type_index: ndarray[int] = zeros(capacity, dtype=int)
+        self._active: ndarray[bool] = zeros(capacity, dtype=bool)
+        self._locations: ndarray[float] = full((capacity, 2), nan)
+        self._position_slots: ndarray[int] = full(capacity, -1, dtype=int)
+
+        self._selected_bs: ndarray[int] = full(capacity, -1, dtype=int)
+        self._previous_bs: ndarray[int] = full(capacity, -1, dtype=int)
+        self._previous_time: ndarray[int] = zeros(capacity, dtype=int)
+
+        self._uplink_data_size: ndarray[float] = zeros(capacity)
+        self._uplink_data_sizes: ndarray[float] = zeros((capacity, data_type_count))
+        self._uplink_data_counts: ndarray[float] = zeros((capacity, data_type_count))
+        self._sidelink_data_size: ndarray[float] = zeros(capacity)
+        self._data_generated: ndarray[float] = zeros(capacity)
+
+        self._network_slots: ndarray[int] = full(capacity, -1, dtype=int)
+        self._downlink_data: ndarray[float] = zeros(capacity)
+
+        self._sidelink_received_size: ndarray[float] = zeros(capacity)
+        self._sidelink_sender_count: ndarray[int] = zeros(capacity, dtype=int)
+        self._vehicles_in_range: ndarray[int] = zeros(capacity, dtype=int)
+
+    def _grow_slots(self) -> None:
+        """
+        Double the number of vehicle slots, keeping the existing data.
+        """
+        old_arrays = {name: getattr(self, name) for name in self._SLOT_ARRAYS}
+        self._allocate_slots(self._capacity * 2)
+        for name, old_array in old_arrays.items():
+            getattr(self, name)[: len(old_array)] = old_array
+
+    @property
+    def data_types(self) -> list[str]:
+        """Get the data types generated by the vehicles."""
+        return self._data_type_registry.data_types
+
+    @property
+    def active_count(self) -> int:
+        """Get the number of active vehicles."""
+        return len(self.active_slots)
+
+    @property
+    def active_slots(self) -> ndarray[int]:
+        """Get the slots of the active vehicles."""
+        if self._active_slots is None:
+            self._active_slots = flatnonzero(self._active[: self._vehicle_count])
+        return self._active_slots
+
+    @property
+    def active_vehicle_ids(self) -> ndarray[int]:
+        """Get the ids of the active vehicles."""
+        return self._vehicle_ids[self.active_slots]
+
+    @property
+    def data_generated_at_device(self) -> float:
+        """Get the total data generated by the active vehicles."""
+        return float(self._data_generated[self.active_slots].sum())
+
+    @property
+    def vehicles_in_range(self) -> int:
+        """Get the total number of vehicles in range of the active vehicles."""
+        return int(self._vehicles_in_range[self.active_slots].sum())
+
+    def vehicle_reports(self) -> list[tuple[int, float, int]]:
+        """
+        Get the agent data of the active vehicles, as the vehicle agents report it.
+
+        Returns
+        -------
+        list[tuple[int, float, int]]
+            The id, the total generated data and the number of vehicles in range of each active
+            vehicle.
+        """
+        slots = self.active_slots
+        return list(
+            zip(
+                self._vehicle_ids[slots].tolist(),
+                self._data_generated[slots].tolist(),
+                self._vehicles_in_range[slots].tolist(),
+            )
+        )
+
+    @property
+    def uplink_data_size(self) -> ndarray[float]:
+        """Get the uplink data size of all the slots."""
+        return self._uplink_data_size
+
+    @property
+    def sidelink_data_size(self) -> ndarray[float]:
+        """Get the sidelink data size of all the slots."""
+        return self._sidelink_data_size
+
+    @property
+    def locations(self) -> ndarray[float]:
+        """Get the locations of all the slots."""
+        return self._locations
+
+    @property
+    def selected_bs(self) -> ndarray[int]:
+        """Get the selected base station of all the slots."""
+        return self._selected_bs
+
+    @property
+    def network_capacity(self) -> ndarray[float]:
+        """Get the remaining network capacity of all the vehicles."""
+        return self._network_ledger.remaining_capacity(
+            constants.VEHICLE_WIRELESS, self._network_slots[: self._vehicle_count]
+        )
+
+    def slots_of(self, vehicle_ids: ndarray[int]) -> ndarray[int]:
+        """
+        Get the slots of the given vehicles.
+
+        Parameters
+        ----------
+        vehicle_ids : ndarray[int]
+            The ids of the vehicles.
+
+        Returns
+        -------
+        ndarray[int]
+            The slots of the vehicles, -1 for the unknown vehicles.
+        """
+        vehicle_ids = asarray(vehicle_ids, dtype=int)
+        slots = full(len(vehicle_ids), -1, dtype=int)
+        known = (vehicle_ids >= 0) & (vehicle_ids < len(self._slot_lookup))
+        slots[known] = self._slot_lookup[vehicle_ids[known]]
+        return slots
+
+    def add_vehicle(
+        self,
+        vehicle_id: int,
+        vehicle_type: str,
+        activation_settings: ActivationSettings,
+    ) -> None:
+        """
+        Add a new vehicle to the engine.
+
+        Parameters
+        ----------
+        vehicle_id : int
+            The id of the vehicle.
+        vehicle_type : str
+            The type of the vehicle in the config file.
+        activation_settings : ActivationSettings
+            The activation settings of the vehicle.
+        """
+        if self._vehicle_count == self._capacity:
+            self._grow_slots()
+
+        if vehicle_id >= len(self._slot_lookup):
+            new_lookup = full(max(vehicle_id + 1, 2 * len(self._slot_lookup)), -1)
+            new_lookup[: len(self._slot_lookup)] = self._slot_lookup
+            self._slot_lookup = new_lookup
+
+        slot = self._vehicle_count
+        type_idx = self._vehicle_types.index(vehicle_type)
+
+        self._slot_lookup[vehicle_id] = slot
+        self._vehicle_ids[slot] = vehicle_id
+        self._type_index[slot] = type_idx
+        self._network_slots[slot] = self._network_ledger.add_hardware(
+            constants.VEHICLE_WIRELESS, self._network_capacities[type_idx]
+        )
+        self._locations[slot] = self._static_positions[type_idx]
+        if self._is_trace_type[type_idx]:
+            self._position_slots[slot] = self._trace_positions.slot_of(vehicle_id)
+        self.activation_settings[vehicle_id] = activation_settings
+
+        self._vehicle_count += 1
+
+    def has_vehicle(self, vehicle_id: int) -> bool:
+        """
+        Check if the vehicle is already added to the engine.
+
+        Parameters
+        ----------
+        vehicle_id : int
+            The id of the vehicle.
+        """
+        return vehicle_id in self.activation_settings
+
+    def _update_locations(self, time_step: int) -> None:
+        """
+        Move the trace driven vehicles to their positions at the given time step.
+
+        Parameters
+        ----------
+        time_step : int
+            The time step.
+        """
+        self._trace_positions.move_to(time_step)
+
+        slots = flatnonzero(self._position_slots[: self._vehicle_count] >= 0)
+        locations = self._trace_positions.locations_of(self._position_slots[slots])
+
+        # Vehicles without any trace position yet keep their current location.
+        known = ~isnan(locations[:, 0])
+        self._locations[slots[known]] = locations[known]
+
+    def activate_vehicles(self, vehicle_ids: ndarray[int], time_step: int) -> None:
+        """
+        Activate the vehicles.
+
+        Parameters
+        ----------
+        vehicle_ids : ndarray[int]
+            The ids of the vehicles to activate.
+        time_step : int
+            The time step.
+        """
+        slots = self.slots_of(vehicle_ids)
+        self._active[slots] = True
+        self._active_slots = None
+
+        # Set previous time for data composition
+        self._previous_time[slots] = time_step
+
+        # Get the current location of the vehicles
+        self._update_locations(time_step)
+        is_missing = isnan(self._locations[slots]).any(axis=1)
+        if is_missing.any():
+            raise MissingVehiclePositionError(
+                self._vehicle_ids[slots[is_missing]].tolist(), time_step
+            )
+
+    def deactivate_vehicles(self, vehicle_ids: ndarray[int], time_step: int) -> None:
+        """
+        Deactivate the vehicles.
+
+        Parameters
+        ----------
+        vehicle_ids : ndarray[int]
+            The ids of the vehicles to deactivate.
+        time_step : int
+            The time step.
+        """
+        slots = self.slots_of(vehicle_ids)
+        self._active[slots] = False
+        self._active_slots = None
+
+    def use_network(self, slots: ndarray[int], data_sizes: ndarray[float]) -> None:
+        """
+        Consume the network capacity of the vehicles.
+
+        Parameters
+        ----------
+        slots : ndarray[int]
+            The slots of the vehicles. Slots can be repeated.
+        data_sizes : ndarray[float]
+            The data size transferred by each vehicle.
+        """
+        self._network_ledger.consume_many(
+            constants.VEHICLE_WIRELESS, self._network_slots[slots], data_sizes
+        )
+
+    def add_sidelink_received_data(
+        self, slots: ndarray[int], data_sizes: ndarray[float]
+    ) -> None:
+        """
+        Add the sidelink data received by the vehicles from their neighbours.
+
+        Parameters
+        ----------
+        slots : ndarray[int]
+            The slots of the receiving vehicles, one entry per sender.
+        data_sizes : ndarray[float]
+            The data size received from each sender.
+        """
+        count = self._vehicle_count
+        self._sidelink_received_size[:count] += bincount(
+            slots, weights=data_sizes, minlength=count
+        )
+        self._sidelink_sender_count[:count] += bincount(slots, minlength=count)
+
+    def set_downlink_data(
+        self, slots: ndarray[int], downlink_data: ndarray[float]
+    ) -> None:
+        """
+        Set the downlink data received by the vehicles.
+
+        Parameters
+        ----------
+        slots : ndarray[int]
+            The slots of the vehicles.
+        downlink_data : ndarray[float]
+            The downlink data size of each vehicle.
+        """
+        self._downlink_data[slots] = downlink_data
+
+    def uplink_batch(self, slots: ndarray[int]) -> PayloadBatch:
+        """
+        Get the uplink payloads of the vehicles from the columns.
+
+        Parameters
+        ----------
+        slots : ndarray[int]
+            The slots of the vehicles.
+
+        Returns
+        -------
+        PayloadBatch
+            The uplink payloads, in the same order as the slots.
+        """
+        return PayloadBatch(
+            self.model.current_time,
+            self._vehicle_ids[slots],
+            self._uplink_data_size[slots],
+            self._uplink_data_sizes[slots],
+            self._uplink_data_counts[slots],
+            self._source_masks[self._type_index[slots]],
+        )
+
+    def _compose_payloads(self, current_time: int, slots: ndarray[int]) -> None:
+        """
+        Compose the uplink and sidelink data of the vehicles.
+
+        Parameters
+        ----------
+        current_time : int
+            The current time.
+        slots : ndarray[int]
+            The slots of the vehicles.
+        """
+        types = self._type_index[slots]
+
+        # Calculate the number of units generated in the time interval
+        elapsed_time = (current_time - self._previous_time[slots]).astype(float)
+        data_counts = elapsed_time[:, None] * self._data_rates[types]
+        data_sizes = data_counts * self._data_unit_sizes[types]
+
+        # Simplify the uplink data of the vehicles of each type at once
+        unit_counts = floor(data_counts)
+        for type_idx, simplifier in enumerate(self._simplifiers):
+            type_rows = flatnonzero(types == type_idx)
+            if len(type_rows) == 0:
+                continue
+
+            type_slots = slots[type_rows]
+            (
+                self._uplink_data_sizes[type_slots],
+                self._uplink_data_counts[type_slots],
+            ) = simplifier.simplify_batch(
+                data_sizes[type_rows],
+                unit_counts[type_rows],
+                self._data_priorities[type_idx],
+            )
+        self._uplink_data_size[slots] = self._uplink_data_sizes[slots].sum(axis=1)
+
+        self._sidelink_data_size[slots] = (
+            data_sizes * self._sidelink_sources[types]
+        ).sum(axis=1)
+
+        self._previous_time[slots] = current_time
+        self._data_generated[slots] = (
+            self._uplink_data_size[slots] + self._sidelink_data_size[slots]
+        )
+
+    def uplink_stage(self) -> None:
+        """
+        Uplink stage for all the active vehicles.
+        """
+        current_time = self.model.current_time
+        logger.debug(f"Uplink stage for vehicle engine at time {current_time}")
+        active_slots = self.active_slots
+
+        # Update the previous base station and clear the sidelink data
+        self._previous_bs[active_slots] = self._selected_bs[active_slots]
+        self._sidelink_received_size[active_slots] = 0.0
+        self._sidelink_sender_count[active_slots] = 0
+
+        # Propagate the positions and compose the data
+        self._update_locations(current_time)
+        self._compose_payloads(current_time, active_slots)
+
+    def downlink_stage(self) -> None:
+        """
+        Downlink stage for all the active vehicles.
+        """
+        logger.debug(
+            f"Downlink stage for vehicle engine at time {self.model.current_time}"
+        )
+        active_slots = self.active_slots
+        self._vehicles_in_range[active_slots] = self._sidelink_sender_count[
+            active_slots
+        ]
@@ -1,13 +1,69 @@
-from src.device.payload import BaseStationPayload, VehiclePayload
+from numpy import around, bincount, empty, flatnonzero, ndarray, nonzero, rint, unique
+
+from src.device.payload import BaseStationPayload, DataTypeRegistry, PayloadBatch
+
+
+def _sum_by_type(
+    payload_batch: PayloadBatch, data_types: list[str]
+) -> tuple[dict, dict]:
+    """
+    Sum the data sizes and counts of the payloads by the data type.
+
+    Parameters
+    ----------
+    payload_batch : PayloadBatch
+        The payloads.
+    data_types : list[str]
+        The data types, indexed by their id.
+
+    Returns
+    -------
+    tuple[dict, dict]
+        The data sizes and counts of the data types in the payloads.
+    """
+    # Only the data types present in each payload are added, in the order of the payloads.
+    rows, data_type_ids = nonzero(payload_batch.data_present)
+    data_type_count = payload_batch.data_present.shape[1]
+
+    data_sizes = bincount(
+        data_type_ids,
+        weights=payload_batch.data_sizes[rows, data_type_ids],
+        minlength=data_type_count,
+    ).tolist()
+    # The weighted sums are floats, the counts are rounded back to integers. The float error
+    # of the sums is rounded away first so that it does not move a half count up or down.
+    data_counts = bincount(
+        data_type_ids,
+        weights=payload_batch.data_counts[rows, data_type_ids],
+        minlength=data_type_count,
+    )
+    data_counts = rint(around(data_counts, 6)).astype(int).tolist()
+    present_type_ids = flatnonzero(
+        bincount(data_type_ids, minlength=data_type_count)
+    ).tolist()
+
+    data_sizes_by_type = {data_types[idx]: data_sizes[idx] for idx in present_type_ids}
+    data_counts_by_type = {
+        data_types[idx]: data_counts[idx] for idx in present_type_ids
+    }
+    return data_sizes_by_type, data_counts_by_type
 
 
 class ControllerCollector:
-    def __init__(self):
+    def __init__(self, data_type_registry: DataTypeRegistry):
         """
         Initialize the data collector.
+
+        Parameters
+        ----------
+        data_type_registry : DataTypeRegistry
+            The registry of the data types of the simulation.
         """
+        self._data_type_registry: DataTypeRegistry = data_type_registry
         self._total_data_size: float = 0.0
-        self._all_vehicles: list[int] = []
+
+        # Sorted ids of the vehicles visible in the incoming data
+        self._visible_vehicle_ids: ndarray[int] = empty(0, dtype=int)
 
         self._data_sizes_by_type: dict[str, float] = {}
         self._data_counts_by_type: dict[str, int] = {}
@@ -18,9 +74,14 @@ class ControllerCollector:
         return self._total_data_size
 
     @property
-    def all_vehicles(self) -> list[int]:
-        """Get the list of all vehicles."""
-        return self._all_vehicles
+    def all_vehicles(self) -> ndarray[int]:
+        """Get the ids of all the visible vehicles."""
+        return self._visible_vehicle_ids
+
+    @property
+    def visible_vehicle_count(self) -> int:
+        """Get the number of visible vehicles."""
+        return len(self._visible_vehicle_ids)
 
     @property
     def data_sizes_by_type(self) -> dict[str, float]:
@@ -38,38 +99,34 @@ class ControllerCollector:
         """
         # Collect the statistics of the incoming data
         self._total_data_size = 0.0
-        self._all_vehicles: list[int] = []
 
-        self._data_sizes_by_type = {}
-        self._data_counts_by_type = {}
+        uplink_data: list[PayloadBatch] = []
         for base_station_id, base_station_payload in incoming_data.items():
-            # Calculate total data size and the list of all vehicles
+            # Calculate total data size
             self._total_data_size += base_station_payload.uplink_data_size
-            self._all_vehicles.extend(base_station_payload.sources)
+            uplink_data.append(base_station_payload.uplink_data)
+        all_uplink_data = PayloadBatch.concatenate(-1, uplink_data)
 
-            for vehicle_payload in base_station_payload.uplink_data:
-                # Collect the types and their sizes
-                for data_payload in vehicle_payload.data_payload_list:
-                    data_type = data_payload.type
+        # Store the vehicles visible in the data
+        self._visible_vehicle_ids = unique(all_uplink_data.sources)
 
-                    # Store data size by type
-                    data_size = data_payload.data_size
-                    if data_type not in self._data_sizes_by_type:
-                        self._data_sizes_by_type[data_type] = 0
-                    self._data_sizes_by_type[data_type] += data_size
-
-                    # Store data count by type
-                    data_count: int = data_payload.count
-                    if data_type not in self._data_counts_by_type:
-                        self._data_counts_by_type[data_type] = 0
-                    self._data_counts_by_type[data_type] += data_count
+        # Collect the sizes and counts of the data types of all the vehicles
+        self._data_sizes_by_type, self._data_counts_by_type = _sum_by_type(
+            all_uplink_data, self._data_type_registry.data_types
+        )
 
 
 class VehicleCollector:
-    def __init__(self):
+    def __init__(self, data_type_registry: DataTypeRegistry):
         """
         Initialize the data collector.
+
+        Parameters
+        ----------
+        data_type_registry : DataTypeRegistry
+            The registry of the data types of the simulation.
         """
+        self._data_type_registry: DataTypeRegistry = data_type_registry
         self._total_data_size: float = 0.0
         self._data_sizes_by_type: dict[str, float] = {}
         self._data_counts_by_type: dict[str, int] = {}
@@ -89,29 +146,12 @@ class VehicleCollector:
         """Get the data types and their counts."""
         return self._data_counts_by_type
 
-    def collect_data(self, incoming_data: dict[int, VehiclePayload]):
+    def collect_data(self, incoming_data: PayloadBatch):
         """
         Collect the data from the vehicle.
         """
         # Collect the statistics of the incoming data
-        self._total_data_size = 0.0
-        self._data_sizes_by_type = {}
-        self._data_counts_by_type = {}
-        for vehicle_id, vehicle_payload in incoming_data.items():
-            # Calculate total data size and the list of all vehicles
-            self._total_data_size += vehicle_payload.total_data_size
-
-            for data_payload in vehicle_payload.data_payload_list:
-                data_type = data_payload.type
-
-                # Store data size by type
-                data_size = data_payload.data_size
-                if data_type not in self._data_sizes_by_type:
-                    self._data_sizes_by_type[data_type] = 0
-                self._data_sizes_by_type[data_type] += data_size
-
-                # Store data count by type
-                data_count: int = data_payload.count
-                if data_type not in self._data_counts_by_type:
-                    self._data_counts_by_type[data_type] = 0
-                self._data_counts_by_type[data_type] += data_count
+        self._total_data_size = float(incoming_data.total_data_sizes.sum())
+        self._data_sizes_by_type, self._data_counts_by_type = _sum_by_type(
+            incoming_data, self._data_type_registry.data_types
+        )
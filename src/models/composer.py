@@ -1,9 +1,22 @@
 import logging
+from dataclasses import astuple
+
+from numpy import asarray, fromiter, ndarray, outer, trunc, zeros
 
 import src.core.constants as constants
 from src.device.payload import *
-
-__all__ = ["VehicleDataComposer", "BaseStationDataComposer", "ControllerDataComposer"]
+from src.models.simplifier import (
+    PerTypeVehicleDataSimplifier,
+    PriorityVehicleDataSimplifier,
+    VehicleDataSimplifier,
+)
+
+__all__ = [
+    "VehicleTypeDataComposer",
+    "VehicleDataComposer",
+    "BaseStationDataComposer",
+    "ControllerDataComposer",
+]
 logger = logging.getLogger(__name__)
 
 
@@ -16,8 +29,151 @@ class DataSource:
     side_link: str = "no"
 
 
+class VehicleTypeDataComposer:
+    def __init__(
+        self, data_sources: list[DataSource], data_type_registry: DataTypeRegistry
+    ):
+        """
+        Initialize the data composer of a vehicle type. All the vehicles of the type have the
+        same data sources, so their payloads are composed at once.
+
+        Parameters
+        ----------
+        data_sources : list[DataSource]
+            The data sources of the vehicle type.
+        data_type_registry : DataTypeRegistry
+            The registry of the data types of the simulation.
+        """
+        self._data_sources: list[DataSource] = data_sources
+
+        # Rates and unit sizes of the data sources, indexed by the data type id
+        data_type_ids = [
+            data_type_registry.intern(data_source.data_type)
+            for data_source in data_sources
+        ]
+        data_type_count = data_type_registry.count
+        self._data_rates: ndarray[float] = zeros(data_type_count)
+        self._data_unit_sizes: ndarray[float] = zeros(data_type_count)
+        self._all_sources_mask: ndarray[bool] = zeros(data_type_count, dtype=bool)
+        self._side_link_mask: ndarray[bool] = zeros(data_type_count, dtype=bool)
+        self._data_priorities: ndarray[int] = zeros(data_type_count, dtype=int)
+
+        for data_type_id, data_source in zip(data_type_ids, data_sources):
+            self._data_rates[data_type_id] = data_source.data_counts
+            self._data_unit_sizes[data_type_id] = data_source.data_size
+            self._all_sources_mask[data_type_id] = True
+            self._side_link_mask[data_type_id] = data_source.side_link == "yes"
+            self._data_priorities[data_type_id] = data_source.data_priority
+
+    @classmethod
+    def for_data_sources(
+        cls, data_sources: list[DataSource], data_type_registry: DataTypeRegistry
+    ) -> "VehicleTypeDataComposer":
+        """
+        Get the composer of the vehicle type with the data sources.
+
+        Parameters
+        ----------
+        data_sources : list[DataSource]
+            The data sources of the vehicle type.
+        data_type_registry : DataTypeRegistry
+            The registry of the data types of the simulation, which keeps the composers.
+
+        Returns
+        -------
+        VehicleTypeDataComposer
+            The composer shared by the vehicles with the same data sources.
+        """
+        key = tuple(astuple(data_source) for data_source in data_sources)
+        type_composers = data_type_registry.type_composers
+        if key not in type_composers:
+            type_composers[key] = cls(data_sources, data_type_registry)
+        return type_composers[key]
+
+    @property
+    def data_sources(self) -> list[DataSource]:
+        """Get the data sources of the vehicle type."""
+        return self._data_sources
+
+    def compose_payloads(
+        self,
+        current_time: int,
+        previous_times: ndarray[int],
+        simplifier: (
+            VehicleDataSimplifier
+            | PerTypeVehicleDataSimplifier
+            | PriorityVehicleDataSimplifier
+        ),
+        payload_arena: PayloadArena,
+    ) -> tuple[list[VehiclePayload], list[VehiclePayload]]:
+        """
+        Compose the uplink and sidelink payloads of the vehicles of the type. The uplink data
+        of all the vehicles is simplified at once. The uplink payloads are taken from the
+        payload arena, the sidelink payloads are not as the receiving vehicles keep them over
+        the time steps.
+
+        Parameters
+        ----------
+        current_time : int
+            The current time.
+        previous_times : ndarray[int]
+            The time each vehicle last composed its payloads.
+        simplifier : VehicleDataSimplifier | PerTypeVehicleDataSimplifier | PriorityVehicleDataSimplifier
+            The simplifier of the uplink data of the vehicles.
+        payload_arena : PayloadArena
+            The arena of the model to take the uplink payloads from.
+
+        Returns
+        -------
+        tuple[list[VehiclePayload], list[VehiclePayload]]
+            The uplink and the sidelink payloads, in the same order as the previous times.
+        """
+        # Calculate the number of units generated in the time interval by each data source
+        data_counts = outer(current_time - previous_times, self._data_rates)
+        data_sizes = data_counts * self._data_unit_sizes
+        unit_counts = trunc(data_counts)
+
+        sidelink_data_sizes = data_sizes * self._side_link_mask
+        sidelink_unit_counts = unit_counts * self._side_link_mask
+
+        sidelink_totals = sidelink_data_sizes.sum(axis=1)
+
+        # Simplify the uplink data of all the vehicles, the simplified data is sent uplink
+        uplink_data_sizes, uplink_unit_counts = simplifier.simplify_batch(
+            data_sizes, unit_counts, self._data_priorities
+        )
+        uplink_totals = uplink_data_sizes.sum(axis=1)
+        assert (uplink_totals >= 0).all(), "Uplink data size is negative."
+
+        uplink_payloads = [
+            payload_arena.vehicle_payload(
+                -1,
+                current_time,
+                total_data_size,
+                uplink_data_sizes[row],
+                uplink_unit_counts[row],
+                self._all_sources_mask,
+            )
+            for row, total_data_size in enumerate(uplink_totals.tolist())
+        ]
+        sidelink_payloads = [
+            VehiclePayload(
+                -1,
+                current_time,
+                total_data_size,
+                sidelink_data_sizes[row],
+                sidelink_unit_counts[row],
+                self._side_link_mask,
+            )
+            for row, total_data_size in enumerate(sidelink_totals.tolist())
+        ]
+        return uplink_payloads, sidelink_payloads
+
+
 class VehicleDataComposer:
-    def __init__(self, data_source_params: dict[dict]):
+    def __init__(
+        self, data_source_params: dict[dict], data_type_registry: DataTypeRegistry
+    ):
         """
         Initialize the data composer.
 
@@ -25,6 +181,8 @@ class VehicleDataComposer:
         ----------
         data_source_params : dict[dict]
             The data source parameters from the config file.
+        data_type_registry : DataTypeRegistry
+            The registry of the data types of the simulation.
         """
         self._all_data_sources: list[DataSource] = []
         self._side_links_sources: list[DataSource] = []
@@ -32,6 +190,17 @@ class VehicleDataComposer:
         self.previous_time: int = 0
         self._create_data_sources(data_source_params[constants.DATA_SOURCE])
 
+        self._type_composer: VehicleTypeDataComposer = (
+            VehicleTypeDataComposer.for_data_sources(
+                self._all_data_sources, data_type_registry
+            )
+        )
+
+    @property
+    def type_composer(self) -> VehicleTypeDataComposer:
+        """Get the composer shared by the vehicles of the same type."""
+        return self._type_composer
+
     def _create_data_sources(self, data_source_params: dict) -> None:
         """
         Create the data sources.
@@ -58,87 +227,101 @@ class VehicleDataComposer:
             if data_source.side_link == "yes":
                 self._side_links_sources.append(data_source)
 
-    def compose_uplink_payload(self, current_time: int) -> VehiclePayload:
-        """
-        Compose uplink payload using all the data sources.
-
-        Parameters
-        ----------
-        current_time : int
-            The current time.
-
-        Returns
-        -------
-        VehiclePayload
-            The uplink payload.
-        """
-        uplink_payload = self.compose_payload_with_sources(
-            current_time, self._all_data_sources
-        )
-        return uplink_payload
-
-    def compose_sidelink_payload(self, current_time: int):
+    def compose_payloads(
+        self,
+        current_time: int,
+        simplifier: (
+            VehicleDataSimplifier
+            | PerTypeVehicleDataSimplifier
+            | PriorityVehicleDataSimplifier
+        ),
+        payload_arena: PayloadArena,
+    ) -> tuple[VehiclePayload, VehiclePayload]:
         """
-        Compose sidelink payload using all the side link data sources.
+        Compose the uplink payload using all the data sources and the sidelink payload using
+        the side link data sources.
 
         Parameters
         ----------
         current_time : int
             The current time.
+        simplifier : VehicleDataSimplifier | PerTypeVehicleDataSimplifier | PriorityVehicleDataSimplifier
+            The simplifier of the uplink data.
+        payload_arena : PayloadArena
+            The arena of the model to take the uplink payload from.
 
         Returns
         -------
-        VehiclePayload
-            The sidelink payload.
+        tuple[VehiclePayload, VehiclePayload]
+            The uplink and the sidelink payload.
         """
-        sidelink_payload = self.compose_payload_with_sources(
-            current_time, self._side_links_sources
+        uplink_payloads, sidelink_payloads = self._type_composer.compose_payloads(
+            current_time, asarray([self.previous_time]), simplifier, payload_arena
         )
         self.previous_time = current_time
-        return sidelink_payload
-
-    def compose_payload_with_sources(
-        self, current_time: int, data_sources: list[DataSource]
-    ) -> VehiclePayload:
+        return uplink_payloads[0], sidelink_payloads[0]
+
+    @staticmethod
+    def compose_payloads_of_vehicles(
+        current_time: int,
+        composers: list["VehicleDataComposer"],
+        simplifiers: list[
+            VehicleDataSimplifier
+            | PerTypeVehicleDataSimplifier
+            | PriorityVehicleDataSimplifier
+        ],
+        payload_arena: PayloadArena,
+    ) -> tuple[list[VehiclePayload], list[VehiclePayload]]:
         """
-        Compose vehicle payload using the data sources.
+        Compose the uplink and sidelink payloads of many vehicles, composing and simplifying
+        the payloads of all the vehicles of a type at once.
 
         Parameters
         ----------
         current_time : int
             The current time.
-        data_sources : list[DataSource]
-            The data sources.
+        composers : list[VehicleDataComposer]
+            The composers of the vehicles.
+        simplifiers : list[VehicleDataSimplifier | PerTypeVehicleDataSimplifier | PriorityVehicleDataSimplifier]
+            The simplifiers of the vehicles, in the same order as the composers.
+        payload_arena : PayloadArena
+            The arena of the model to take the uplink payloads from.
 
         Returns
         -------
-        VehiclePayload
-            The vehicle payload.
+        tuple[list[VehiclePayload], list[VehiclePayload]]
+            The uplink and the sidelink payloads, in the same order as the composers.
         """
-        # Collect data from all the data sources and create data payload
-        data_payloads = []
-        all_data_size = 0.0
-        for data_source in data_sources:
-            data_payload = DataPayload()
-            data_payload.type = data_source.data_type
-
-            # Calculate the number of units generated in the time interval
-            data_counts = data_source.data_counts * (current_time - self.previous_time)
-            data_payload.count = int(data_counts)
-
-            # Calculate the data size and add to the payload
-            data_payload.data_size = data_source.data_size * data_counts
-            all_data_size += data_payload.data_size
-            data_payloads.append(data_payload)
-
-        # Create the vehicle payload
-        vehicle_payload = VehiclePayload()
-        vehicle_payload.timestamp = current_time
-        vehicle_payload.total_data_size = all_data_size
-        vehicle_payload.data_payload_list = data_payloads
-
-        assert vehicle_payload.total_data_size >= 0, "Uplink data size is negative."
-        return vehicle_payload
+        uplink_payloads: list[VehiclePayload | None] = [None] * len(composers)
+        sidelink_payloads: list[VehiclePayload | None] = [None] * len(composers)
+
+        # Group the vehicles by the vehicle type and the simplifier parameters
+        type_indices: dict[tuple, list[int]] = {}
+        for idx, (composer, simplifier) in enumerate(zip(composers, simplifiers)):
+            type_indices.setdefault(
+                (composer.type_composer, simplifier.key), []
+            ).append(idx)
+
+        for (type_composer, _), indices in type_indices.items():
+            previous_times = fromiter(
+                (composers[idx].previous_time for idx in indices),
+                dtype=int,
+                count=len(indices),
+            )
+            (
+                type_uplink_payloads,
+                type_sidelink_payloads,
+            ) = type_composer.compose_payloads(
+                current_time, previous_times, simplifiers[indices[0]], payload_arena
+            )
+            for idx, uplink_payload, sidelink_payload in zip(
+                indices, type_uplink_payloads, type_sidelink_payloads
+            ):
+                uplink_payloads[idx] = uplink_payload
+                sidelink_payloads[idx] = sidelink_payload
+                composers[idx].previous_time = current_time
+
+        return uplink_payloads, sidelink_payloads
 
 
 class BaseStationDataComposer:
@@ -150,20 +333,29 @@ class BaseStationDataComposer:
         self._previous_time: int = 0
 
     def compose_basestation_payload(
-        self, current_time: int, incoming_data: dict[int, VehiclePayload]
+        self,
+        current_time: int,
+        uplink_data: PayloadBatch,
+        payload_arena: PayloadArena,
     ) -> BaseStationPayload:
         """
         Generate data request by running the applications.
-        """
-        base_station_payload: BaseStationPayload = BaseStationPayload()
-        base_station_payload.timestamp = current_time
 
-        for vehicle_id, vehicle_payload in incoming_data.items():
-            base_station_payload.uplink_data_size += vehicle_payload.total_data_size
-            base_station_payload.sources.append(vehicle_id)
+        Parameters
+        ----------
+        current_time : int
+            The current time.
+        uplink_data : PayloadBatch
+            The payloads of the vehicles that sent data to the base station.
+        payload_arena : PayloadArena
+            The arena of the model to take the payload from.
+        """
+        uplink_data_size = 0.01 + float(uplink_data.total_data_sizes.sum())
 
-            # Collect the uplink and downlink data
-            base_station_payload.uplink_data.append(vehicle_payload)
+        # Collect the uplink and downlink data
+        base_station_payload = payload_arena.base_station_payload(
+            current_time, uplink_data_size, uplink_data.sources.tolist(), uplink_data
+        )
 
         self._previous_time = current_time
         return base_station_payload
@@ -178,7 +370,10 @@ class ControllerDataComposer:
         self._previous_time: int = 0
 
     def generate_basestation_response(
-        self, current_time: int, incoming_data: dict[int, BaseStationPayload]
+        self,
+        current_time: int,
+        incoming_data: dict[int, BaseStationPayload],
+        payload_arena: PayloadArena,
     ) -> dict[int, BaseStationResponse]:
         """
         Generate response by running the applications.
@@ -189,6 +384,8 @@ class ControllerDataComposer:
             The current time.
         incoming_data : dict[int, BaseStationPayload]
             The incoming data.
+        payload_arena : PayloadArena
+            The arena of the model to take the responses from.
 
         Returns
         -------
@@ -198,12 +395,12 @@ class ControllerDataComposer:
         base_station_responses: dict[int, BaseStationResponse] = {}
 
         for station_id, base_station_payload in incoming_data.items():
-            response: BaseStationResponse = BaseStationResponse()
-            response.status = True
-            response.timestamp = current_time
-            response.destination_vehicles = base_station_payload.sources
-            response.downlink_data = [1.0 for _ in base_station_payload.uplink_data]
-            base_station_responses[station_id] = response
+            base_station_responses[station_id] = payload_arena.base_station_response(
+                base_station_payload.sources,
+                current_time,
+                [1.0] * len(base_station_payload.uplink_data),
+                True,
+            )
 
         self._previous_time = current_time
         return base_station_responses
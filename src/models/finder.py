@@ -1,12 +1,44 @@
 import logging
 
 from mesa import Agent
-from numpy import ndarray, array, empty
+from numpy import (
+    arange,
+    argsort,
+    asarray,
+    bincount,
+    concatenate,
+    cumsum,
+    empty,
+    floor,
+    fromiter,
+    full,
+    hypot,
+    inf,
+    int64,
+    lexsort,
+    maximum,
+    ndarray,
+    repeat,
+    searchsorted,
+    sqrt,
+    stack,
+    tile,
+    unique,
+    zeros,
+)
 from pandas import DataFrame
 
 import src.core.common_constants as cc
+import src.core.constants as constants
+from src.core.exceptions import InvalidModelParameterError
+from src.core.link_table import LinkTable, expand_csr_rows
 
-__all__ = ["NearestNBaseStationFinder", "TraceVehicleNeighbourFinder"]
+__all__ = [
+    "NearestNBaseStationFinder",
+    "NearestPositionBaseStationFinder",
+    "TraceVehicleNeighbourFinder",
+    "RangeVehicleNeighbourFinder",
+]
 
 logger = logging.getLogger(__name__)
 
@@ -19,11 +51,10 @@ class NearestNBaseStationFinder(Agent):
         super().__init__(0, None)
         self._v2b_links_df: DataFrame = v2b_links_df
 
-        self._v2b_links_data: dict = {}
-        self._base_station_distances: dict = {}
+        self._v2b_links_table: LinkTable | None = None
 
-        self._filtered_v2b_links_data: dict = {}
-        self._filtered_base_station_distances: dict = {}
+        # Rows of the links at the current time step
+        self._v2b_links_window: tuple[int, int] = (0, 0)
         self.current_time: int = -1
 
         self._create_v2b_links_data()
@@ -32,18 +63,8 @@ class NearestNBaseStationFinder(Agent):
         """
         Create the v2b links data.
         """
-        # Convert the v2b links df to dictionary
-        self._v2b_links_data = (
-            self._v2b_links_df.groupby(cc.TIME_STEP)
-            .apply(lambda x: dict(zip(x[cc.VEHICLE_ID], x[cc.BASE_STATIONS])))
-            .to_dict()
-        )
-
-        self._base_station_distances = (
-            self._v2b_links_df.groupby(cc.TIME_STEP)
-            .apply(lambda x: dict(zip(x[cc.VEHICLE_ID], x[cc.DISTANCES])))
-            .to_dict()
-        )
+        # Convert the base station links to flat arrays sorted by time step once.
+        self._v2b_links_table = LinkTable(self._v2b_links_df, cc.BASE_STATIONS)
 
         del self._v2b_links_df
 
@@ -58,14 +79,7 @@ class NearestNBaseStationFinder(Agent):
         """
         Step through the base station finder.
         """
-        self._filtered_v2b_links_data.clear()
-        if self.current_time not in self._v2b_links_data:
-            return
-
-        self._filtered_v2b_links_data = self._v2b_links_data[self.current_time]
-        self._filtered_base_station_distances = self._base_station_distances[
-            self.current_time
-        ]
+        self._v2b_links_window = self._v2b_links_table.time_window(self.current_time)
 
     def select_n_stations_for_vehicle(self, vehicle_id: int, n: int) -> ndarray[int]:
         """
@@ -73,20 +87,384 @@ class NearestNBaseStationFinder(Agent):
         """
         logger.debug(f"Looking up base stations for vehicle {vehicle_id}")
 
-        if len(self._filtered_v2b_links_data) == 0:
+        row = self._v2b_links_table.find_row(vehicle_id, self._v2b_links_window)
+        if row < 0:
             return empty(0, dtype=int)
 
         # Get the base stations for the vehicle.
-        base_stations: str = self._filtered_v2b_links_data[vehicle_id]
-
-        # Split the base stations string into a numpy array of integers.
-        base_stations: ndarray[int] = array(base_stations.split(" ")).astype(int)
+        base_stations: ndarray[int] = self._v2b_links_table.targets(row)
 
         # Return the n nearest base stations.
-        if len(base_stations) < n:
-            return base_stations
         return base_stations[:n]
 
+    def select_stations_for_vehicles(self, vehicle_ids: ndarray[int]) -> ndarray[int]:
+        """
+        Select the nearest base station of several vehicles at once.
+
+        Parameters
+        ----------
+        vehicle_ids : ndarray[int]
+            The ids of the vehicles.
+
+        Returns
+        -------
+        ndarray[int]
+            The nearest base station of each vehicle, -1 for the vehicles without any.
+        """
+        rows = self._v2b_links_table.find_rows(
+            asarray(vehicle_ids, dtype=int), self._v2b_links_window
+        )
+        return self._v2b_links_table.first_targets(rows)
+
+    def select_n_distances_for_vehicle(self, vehicle_id: int, n: int) -> ndarray[float]:
+        """
+        Get the distances to the n nearest base stations of the vehicle.
+        """
+        row = self._v2b_links_table.find_row(vehicle_id, self._v2b_links_window)
+        if row < 0:
+            return empty(0)
+
+        return self._v2b_links_table.distances(row)[:n]
+
+
+class NearestPositionBaseStationFinder(Agent):
+    # Number of vehicles whose distances are computed at once
+    _QUERY_CHUNK_SIZE: int = 4096
+
+    def __init__(self, station_count: int = 1):
+        """
+        Initialize the nearest base station finder that uses the positions of the base
+        stations and the vehicles, so no v2b links are needed. The nearest base stations of
+        all the active vehicles are found at once in every step.
+
+        Parameters
+        ----------
+        station_count : int, optional
+            The number of nearest base stations found for each vehicle, by default 1.
+        """
+        super().__init__(0, None)
+        self._station_count: int = int(station_count)
+
+        # Locations of the active base stations, the arrays are rebuilt when they change
+        self._base_station_locations: dict[int, list[float]] = {}
+        self._base_station_ids: ndarray[int] = empty(0, dtype=int)
+        self._base_station_points: ndarray[float] = empty((0, 2))
+        self._base_stations_changed: bool = False
+
+        # Grid index of the base stations, the base station columns sorted by the cell key
+        self._grid_origin: ndarray[float] = zeros(2)
+        self._grid_cell_size: float = 1.0
+        self._grid_shape: ndarray[int] = zeros(2, dtype=int64)
+        self._grid_keys: ndarray[int] = empty(0, dtype=int64)
+        self._grid_columns: ndarray[int] = empty(0, dtype=int)
+
+        # Current locations of the active vehicles
+        self._vehicle_ids: ndarray[int] = empty(0, dtype=int)
+        self._vehicle_locations: ndarray[float] = empty((0, 2))
+
+        # Nearest base stations of each vehicle, sorted by the distance
+        self._vehicle_rows: dict[int, int] = {}
+        self._nearest_stations: ndarray[int] = empty((0, 0), dtype=int)
+        self._nearest_distances: ndarray[float] = empty((0, 0))
+
+        self.current_time: int = -1
+
+    def add_base_station(self, base_station_id: int, location: list[float]) -> None:
+        """
+        Add an active base station.
+
+        Parameters
+        ----------
+        base_station_id : int
+            The id of the base station.
+        location : list[float]
+            The location of the base station.
+        """
+        self._base_station_locations[base_station_id] = location
+        self._base_stations_changed = True
+
+    def remove_base_station(self, base_station_id: int) -> None:
+        """
+        Remove a deactivated base station.
+
+        Parameters
+        ----------
+        base_station_id : int
+            The id of the base station.
+        """
+        self._base_station_locations.pop(base_station_id)
+        self._base_stations_changed = True
+
+    def update_vehicle_locations(
+        self, vehicle_ids: ndarray[int], locations: ndarray[float]
+    ) -> None:
+        """
+        Update the locations of the active vehicles.
+
+        Parameters
+        ----------
+        vehicle_ids : ndarray[int]
+            The ids of the active vehicles.
+        locations : ndarray[float]
+            The locations of the vehicles, one row per vehicle.
+        """
+        self._vehicle_ids = asarray(vehicle_ids, dtype=int)
+        self._vehicle_locations = asarray(locations, dtype=float).reshape(-1, 2)
+
+    def _update_base_station_points(self) -> None:
+        """
+        Rebuild the base station arrays and the grid index of the base stations after base
+        stations are activated or deactivated. The grid has about one base station per cell.
+        """
+        self._base_station_ids = fromiter(
+            self._base_station_locations.keys(),
+            dtype=int,
+            count=len(self._base_station_locations),
+        )
+        self._base_station_points = asarray(
+            list(self._base_station_locations.values()), dtype=float
+        ).reshape(-1, 2)
+        self._base_stations_changed = False
+
+        station_count = len(self._base_station_ids)
+        if station_count == 0:
+            return
+
+        self._grid_origin = self._base_station_points.min(axis=0)
+        extent = self._base_station_points.max(axis=0) - self._grid_origin
+        self._grid_cell_size = max(
+            float(sqrt(extent[0] * extent[1] / station_count)),
+            float(extent.max()) / station_count,
+        )
+        if self._grid_cell_size == 0.0:
+            self._grid_cell_size = 1.0
+
+        cells = floor(
+            (self._base_station_points - self._grid_origin) / self._grid_cell_size
+        ).astype(int64)
+        self._grid_shape = cells.max(axis=0) + 1
+        cell_keys = cells[:, 0] * self._grid_shape[1] + cells[:, 1]
+
+        # Base station columns sorted by the cell, so the stations of a cell are contiguous.
+        self._grid_columns = argsort(cell_keys, kind="stable")
+        self._grid_keys = cell_keys[self._grid_columns]
+
+    def step(self) -> None:
+        """
+        Step through the base station finder.
+        """
+        if self._base_stations_changed:
+            self._update_base_station_points()
+
+        vehicle_count = len(self._vehicle_ids)
+        k = min(self._station_count, len(self._base_station_ids))
+
+        self._vehicle_rows = dict(zip(self._vehicle_ids.tolist(), range(vehicle_count)))
+        self._nearest_stations = empty((vehicle_count, k), dtype=int)
+        self._nearest_distances = empty((vehicle_count, k))
+        if k == 0:
+            return
+
+        for start in range(0, vehicle_count, self._QUERY_CHUNK_SIZE):
+            stop = min(start + self._QUERY_CHUNK_SIZE, vehicle_count)
+            columns, distances = self._find_nearest(
+                self._vehicle_locations[start:stop], k
+            )
+            self._nearest_stations[start:stop] = self._base_station_ids[columns]
+            self._nearest_distances[start:stop] = distances
+
+    @staticmethod
+    def _ring_offsets(ring: int) -> ndarray[int]:
+        """
+        Get the offsets of the grid cells at the Chebyshev distance of the ring.
+
+        Parameters
+        ----------
+        ring : int
+            The distance of the ring in cells.
+
+        Returns
+        -------
+        ndarray[int]
+            The cell offsets, one row per cell.
+        """
+        if ring == 0:
+            return zeros((1, 2), dtype=int64)
+
+        span = arange(-ring, ring + 1)
+        inner = arange(-ring + 1, ring)
+        return concatenate(
+            [
+                stack([full(len(span), -ring), span], axis=1),
+                stack([full(len(span), ring), span], axis=1),
+                stack([inner, full(len(inner), -ring)], axis=1),
+                stack([inner, full(len(inner), ring)], axis=1),
+            ]
+        ).astype(int64)
+
+    def _find_nearest(
+        self, locations: ndarray[float], k: int
+    ) -> tuple[ndarray[int], ndarray[float]]:
+        """
+        Find the k nearest base stations of the locations. The rings of grid cells around each
+        location are searched outwards, until the k-th nearest base station found is closer
+        than any base station in the rings not yet searched.
+
+        Parameters
+        ----------
+        locations : ndarray[float]
+            The locations of the vehicles.
+        k : int
+            The number of base stations to find.
+
+        Returns
+        -------
+        tuple[ndarray[int], ndarray[float]]
+            The base station columns and the distances, sorted by the distance, the ties by
+            the activation order.
+        """
+        location_count = len(locations)
+        station_count = len(self._base_station_ids)
+        cells = floor((locations - self._grid_origin) / self._grid_cell_size).astype(
+            int64
+        )
+
+        # The rings before the first one that meets the grid have no base stations, and the
+        # whole grid is searched by the last ring.
+        last_cells = self._grid_shape - 1
+        rings = maximum(maximum(-cells, cells - last_cells), 0).max(axis=1)
+        last_rings = maximum(cells, last_cells - cells).max(axis=1)
+
+        # The k nearest base stations found so far, padded with columns past the last one.
+        columns = full((location_count, k), station_count, dtype=int64)
+        distances = full((location_count, k), inf)
+
+        pending = arange(location_count)
+        while len(pending) > 0:
+            for ring in unique(rings[pending]).tolist():
+                rows = pending[rings[pending] == ring]
+                self._merge_ring(rows, ring, cells, locations, columns, distances)
+
+            # The base stations of the next ring are at least the ring distance away.
+            is_done = (
+                distances[pending, k - 1] < rings[pending] * self._grid_cell_size
+            ) | (rings[pending] >= last_rings[pending])
+            rings[pending] += 1
+            pending = pending[~is_done]
+
+        return columns, distances
+
+    def _merge_ring(
+        self,
+        rows: ndarray[int],
+        ring: int,
+        cells: ndarray[int],
+        locations: ndarray[float],
+        columns: ndarray[int],
+        distances: ndarray[float],
+    ) -> None:
+        """
+        Merge the base stations in a ring of grid cells into the nearest base stations found
+        for the locations.
+
+        Parameters
+        ----------
+        rows : ndarray[int]
+            The rows of the locations, in increasing order.
+        ring : int
+            The distance of the ring in cells.
+        cells : ndarray[int]
+            The grid cells of all the locations.
+        locations : ndarray[float]
+            All the locations.
+        columns : ndarray[int]
+            The nearest base station columns of all the locations, updated in place.
+        distances : ndarray[float]
+            The distances to the nearest base stations, updated in place.
+        """
+        k = columns.shape[1]
+        offsets = self._ring_offsets(ring)
+
+        # Grid cells of the ring that are within the grid.
+        ring_cells = cells[rows][:, None, :] + offsets[None, :, :]
+        in_grid = (
+            (ring_cells >= 0).all(axis=2) & (ring_cells < self._grid_shape).all(axis=2)
+        ).ravel()
+        cell_rows = repeat(rows, len(offsets))[in_grid]
+        ring_cells = ring_cells.reshape(-1, 2)[in_grid]
+        cell_keys = ring_cells[:, 0] * self._grid_shape[1] + ring_cells[:, 1]
+
+        # Expand the base stations of each cell.
+        start = searchsorted(self._grid_keys, cell_keys, side="left")
+        counts = searchsorted(self._grid_keys, cell_keys, side="right") - start
+        candidate_starts = repeat(start - (cumsum(counts) - counts), counts)
+        candidate_rows = repeat(cell_rows, counts)
+        candidate_columns = self._grid_columns[candidate_starts + arange(counts.sum())]
+        differences = (
+            locations[candidate_rows] - self._base_station_points[candidate_columns]
+        )
+        candidate_distances = hypot(differences[:, 0], differences[:, 1])
+
+        # Keep the k nearest of the found and the new base stations of each location.
+        all_rows = concatenate([repeat(rows, k), candidate_rows])
+        all_columns = concatenate([columns[rows].ravel(), candidate_columns])
+        all_distances = concatenate([distances[rows].ravel(), candidate_distances])
+        order = lexsort((all_columns, all_distances, all_rows))
+
+        row_counts = bincount(searchsorted(rows, all_rows), minlength=len(rows))
+        row_starts = repeat(cumsum(row_counts) - row_counts, k)
+        kept = order[row_starts + tile(arange(k), len(rows))]
+        columns[rows] = all_columns[kept].reshape(-1, k)
+        distances[rows] = all_distances[kept].reshape(-1, k)
+
+    def select_n_stations_for_vehicle(self, vehicle_id: int, n: int) -> ndarray[int]:
+        """
+        Select base stations for the vehicle.
+        """
+        logger.debug(f"Looking up base stations for vehicle {vehicle_id}")
+
+        if vehicle_id not in self._vehicle_rows:
+            return empty(0, dtype=int)
+
+        row = self._vehicle_rows[vehicle_id]
+        return self._nearest_stations[row, :n]
+
+    def select_stations_for_vehicles(self, vehicle_ids: ndarray[int]) -> ndarray[int]:
+        """
+        Select the nearest base station of several vehicles at once.
+
+        Parameters
+        ----------
+        vehicle_ids : ndarray[int]
+            The ids of the vehicles.
+
+        Returns
+        -------
+        ndarray[int]
+            The nearest base station of each vehicle, -1 for the vehicles without any.
+        """
+        rows = fromiter(
+            (self._vehicle_rows.get(vehicle_id, -1) for vehicle_id in vehicle_ids),
+            dtype=int,
+            count=len(vehicle_ids),
+        )
+
+        selected_stations = full(len(rows), -1, dtype=int)
+        if self._nearest_stations.shape[1] > 0:
+            found = rows >= 0
+            selected_stations[found] = self._nearest_stations[rows[found], 0]
+        return selected_stations
+
+    def select_n_distances_for_vehicle(self, vehicle_id: int, n: int) -> ndarray[float]:
+        """
+        Get the distances to the n nearest base stations of the vehicle.
+        """
+        if vehicle_id not in self._vehicle_rows:
+            return empty(0)
+
+        row = self._vehicle_rows[vehicle_id]
+        return self._nearest_distances[row, :n]
+
 
 class TraceVehicleNeighbourFinder(Agent):
     def __init__(self, v2v_links_df: DataFrame):
@@ -96,35 +474,24 @@ class TraceVehicleNeighbourFinder(Agent):
         super().__init__(0, None)
         self._v2v_links_df: DataFrame = v2v_links_df
 
-        self._v2v_links_data: dict = {}
-        self._neighbour_distances: dict = {}
+        self._v2v_links_table: LinkTable | None = None
 
-        self._filtered_v2v_links_data: dict = {}
-        self._filtered_neighbour_distances: dict = {}
+        # Rows of the links at the current time step
+        self._v2v_links_window: tuple[int, int] = (0, 0)
         self.current_time: int = -1
 
         self._create_v2v_links_data()
 
     def _create_v2v_links_data(self) -> None:
         """
-        Create the v2b links data.
+        Create the v2v links data.
         """
-        # Convert the v2b links df to dictionary
-        self._v2v_links_data = (
-            self._v2v_links_df.groupby(cc.TIME_STEP)
-            .apply(lambda x: dict(zip(x[cc.VEHICLE_ID], x[cc.NEIGHBOURS])))
-            .to_dict()
-        )
-
-        self._neighbour_distances = (
-            self._v2v_links_df.groupby(cc.TIME_STEP)
-            .apply(lambda x: dict(zip(x[cc.VEHICLE_ID], x[cc.DISTANCES])))
-            .to_dict()
-        )
+        # Convert the neighbour links to flat arrays sorted by time step once.
+        self._v2v_links_table = LinkTable(self._v2v_links_df, cc.NEIGHBOURS)
 
         del self._v2v_links_df
 
-    def update_base_station_links(self, v2v_links: DataFrame) -> None:
+    def update_vehicle_links(self, v2v_links: DataFrame) -> None:
         """
         Update the vehicle neighbour links.
         """
@@ -135,14 +502,7 @@ class TraceVehicleNeighbourFinder(Agent):
         """
         Step through the neighbour finder.
         """
-        self._filtered_v2v_links_data.clear()
-        if self.current_time not in self._v2v_links_data:
-            return
-
-        self._filtered_v2v_links_data = self._v2v_links_data[self.current_time]
-        self._filtered_neighbour_distances = self._neighbour_distances[
-            self.current_time
-        ]
+        self._v2v_links_window = self._v2v_links_table.time_window(self.current_time)
 
     def find_vehicles(self, vehicle_id: int) -> ndarray[int]:
         """
@@ -150,16 +510,185 @@ class TraceVehicleNeighbourFinder(Agent):
         """
         logger.debug(f"Looking up neighbours for vehicle {vehicle_id}")
 
-        if len(self._filtered_v2v_links_data) == 0:
+        row = self._v2v_links_table.find_row(vehicle_id, self._v2v_links_window)
+        if row < 0:
             return empty(0, dtype=int)
 
-        if vehicle_id not in self._filtered_v2v_links_data:
+        # Get the neighbours for the vehicle.
+        return self._v2v_links_table.targets(row)
+
+    def find_neighbour_links(
+        self, vehicle_ids: ndarray[int]
+    ) -> tuple[ndarray[int], ndarray[int]]:
+        """
+        Find the neighbours of several vehicles at once.
+
+        Parameters
+        ----------
+        vehicle_ids : ndarray[int]
+            The ids of the vehicles.
+
+        Returns
+        -------
+        tuple[ndarray[int], ndarray[int]]
+            The position of the vehicle in the given ids and the id of the neighbour, for every
+            link in order.
+        """
+        rows = self._v2v_links_table.find_rows(
+            asarray(vehicle_ids, dtype=int), self._v2v_links_window
+        )
+        return self._v2v_links_table.targets_of_rows(rows)
+
+
+class RangeVehicleNeighbourFinder(Agent):
+    def __init__(self, radius: float):
+        """
+        Initialize the range based vehicle neighbour finder. The neighbours are computed in
+        every step from the current locations of the vehicles, so no v2v links are needed.
+
+        Parameters
+        ----------
+        radius : float
+            The communication range of the vehicles, must be positive.
+        """
+        super().__init__(0, None)
+        if not radius > 0:
+            raise InvalidModelParameterError(
+                constants.RANGE_V2V, constants.RADIUS, radius
+            )
+        self._radius: float = float(radius)
+
+        # Current locations of the active vehicles
+        self._vehicle_ids: ndarray[int] = empty(0, dtype=int)
+        self._locations: ndarray[float] = empty((0, 2))
+
+        # Neighbours of each vehicle, sorted by the distance
+        self._vehicle_rows: dict[int, int] = {}
+        self._neighbour_offsets: ndarray[int] = zeros(1, dtype=int)
+        self._neighbours: ndarray[int] = empty(0, dtype=int)
+
+        self.current_time: int = -1
+
+    def update_vehicle_locations(
+        self, vehicle_ids: ndarray[int], locations: ndarray[float]
+    ) -> None:
+        """
+        Update the locations of the active vehicles.
+
+        Parameters
+        ----------
+        vehicle_ids : ndarray[int]
+            The ids of the active vehicles.
+        locations : ndarray[float]
+            The locations of the vehicles, one row per vehicle.
+        """
+        self._vehicle_ids = asarray(vehicle_ids, dtype=int)
+        self._locations = asarray(locations, dtype=float).reshape(-1, 2)
+
+    def step(self) -> None:
+        """
+        Step through the neighbour finder.
+        """
+        sources, targets = self._find_pairs_in_range()
+
+        vehicle_count = len(self._vehicle_ids)
+        self._vehicle_rows = dict(zip(self._vehicle_ids.tolist(), range(vehicle_count)))
+
+        self._neighbour_offsets = zeros(vehicle_count + 1, dtype=int)
+        cumsum(
+            bincount(sources, minlength=vehicle_count),
+            out=self._neighbour_offsets[1:],
+        )
+        self._neighbours = self._vehicle_ids[targets]
+
+    def _find_pairs_in_range(self) -> tuple[ndarray[int], ndarray[int]]:
+        """
+        Find the pairs of vehicles within the range. The vehicles are put into a uniform grid
+        with the cell size of the range, so only the vehicles in the same and the adjacent
+        cells are compared.
+
+        Returns
+        -------
+        tuple[ndarray[int], ndarray[int]]
+            The rows of the vehicles and their neighbours, sorted by the vehicle row and the
+            distance to the neighbour.
+        """
+        vehicle_count = len(self._vehicle_ids)
+        if vehicle_count == 0:
+            return empty(0, dtype=int), empty(0, dtype=int)
+
+        # Cell keys of the vehicles, shifted so that the adjacent cells have valid keys.
+        cells = floor(self._locations / self._radius).astype(int64)
+        cells -= cells.min(axis=0) - 1
+        grid_height = cells[:, 1].max() + 2
+        cell_keys = cells[:, 0] * grid_height + cells[:, 1]
+
+        order = argsort(cell_keys, kind="stable")
+        sorted_keys = cell_keys[order]
+
+        rows = arange(vehicle_count)
+        sources: list[ndarray[int]] = []
+        targets: list[ndarray[int]] = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                neighbour_keys = cell_keys + dx * grid_height + dy
+                start = searchsorted(sorted_keys, neighbour_keys, side="left")
+                counts = searchsorted(sorted_keys, neighbour_keys, side="right") - start
+
+                # Expand the candidates of each vehicle in the adjacent cell.
+                candidate_starts = repeat(start - (cumsum(counts) - counts), counts)
+                sources.append(repeat(rows, counts))
+                targets.append(order[candidate_starts + arange(counts.sum())])
+
+        source_rows = concatenate(sources)
+        target_rows = concatenate(targets)
+        differences = self._locations[target_rows] - self._locations[source_rows]
+        distances = hypot(differences[:, 0], differences[:, 1])
+
+        in_range = (distances <= self._radius) & (source_rows != target_rows)
+        source_rows = source_rows[in_range]
+        target_rows = target_rows[in_range]
+        distances = distances[in_range]
+
+        sort_order = lexsort((target_rows, distances, source_rows))
+        return source_rows[sort_order], target_rows[sort_order]
+
+    def find_vehicles(self, vehicle_id: int) -> ndarray[int]:
+        """
+        Find vehicles that are neighbour for the given vehicle.
+        """
+        logger.debug(f"Looking up neighbours for vehicle {vehicle_id}")
+
+        if vehicle_id not in self._vehicle_rows:
             return empty(0, dtype=int)
 
         # Get the neighbours for the vehicle.
-        neighbours: str = self._filtered_v2v_links_data[vehicle_id]
-
-        # Split the neighbours string into a numpy array of integers.
-        neighbours: ndarray[int] = array(neighbours.split(" ")).astype(int)
+        row = self._vehicle_rows[vehicle_id]
+        return self._neighbours[
+            self._neighbour_offsets[row] : self._neighbour_offsets[row + 1]
+        ]
 
-        return neighbours
+    def find_neighbour_links(
+        self, vehicle_ids: ndarray[int]
+    ) -> tuple[ndarray[int], ndarray[int]]:
+        """
+        Find the neighbours of several vehicles at once.
+
+        Parameters
+        ----------
+        vehicle_ids : ndarray[int]
+            The ids of the vehicles.
+
+        Returns
+        -------
+        tuple[ndarray[int], ndarray[int]]
+            The position of the vehicle in the given ids and the id of the neighbour, for every
+            link in order.
+        """
+        rows = fromiter(
+            (self._vehicle_rows.get(vehicle_id, -1) for vehicle_id in vehicle_ids),
+            dtype=int,
+            count=len(vehicle_ids),
+        )
+        positions, value_indices = expand_csr_rows(self._neighbour_offsets, rows)
+        return positions, self._neighbours[value_indices]
@@ -1,12 +1,25 @@
 import logging
 
 from mesa import Agent
-from pandas import DataFrame, concat
+from numpy import (
+    argsort,
+    asarray,
+    concatenate,
+    empty,
+    full,
+    isnan,
+    nan,
+    ndarray,
+    searchsorted,
+    unique,
+)
+from pandas import DataFrame
 
 import src.core.common_constants as cc
 import src.core.constants as constants
+from src.core.exceptions import MissingVehiclePositionError
 
-__all__ = ["StaticMobilityModel", "TraceMobilityModel"]
+__all__ = ["StaticMobilityModel", "TraceMobilityModel", "TracePositionStore"]
 logger = logging.getLogger(__name__)
 
 
@@ -52,6 +65,166 @@ class StaticMobilityModel(Agent):
         self._current_location = new_position
 
 
+class TracePositionStore:
+    def __init__(self, initial_capacity: int = 1024):
+        """
+        Initialize the trace position store shared by all the trace driven vehicles. The rows
+        of the streamed trace data are kept sorted by time step with the slot of the vehicle,
+        and the current location of every vehicle slot is kept in one matrix.
+
+        Parameters
+        ----------
+        initial_capacity : int, optional
+            The number of vehicle slots to allocate initially, by default 1024.
+        """
+        self._vehicle_slots: dict[int, int] = {}
+        self._locations: ndarray[float] = full((initial_capacity, 2), nan)
+
+        # Trace rows sorted by the time step, the consumed time steps are dropped on each update.
+        self._time_steps: ndarray[int] = empty(0, dtype=int)
+        self._slots: ndarray[int] = empty(0, dtype=int)
+        self._positions: ndarray[float] = empty((0, 2), dtype=float)
+
+        # Time step of the current locations
+        self._current_time: int = -1
+
+    def slot_of(self, vehicle_id: int) -> int:
+        """
+        Get the slot of the vehicle, a new slot is assigned to unknown vehicles.
+
+        Parameters
+        ----------
+        vehicle_id : int
+            The id of the vehicle.
+
+        Returns
+        -------
+        int
+            The slot of the vehicle.
+        """
+        slot = self._vehicle_slots.get(vehicle_id)
+        if slot is not None:
+            return slot
+
+        slot = len(self._vehicle_slots)
+        if slot == len(self._locations):
+            self._locations = concatenate(
+                [self._locations, full(self._locations.shape, nan)]
+            )
+        self._vehicle_slots[vehicle_id] = slot
+        return slot
+
+    def _slots_of(self, vehicle_ids: ndarray[int]) -> ndarray[int]:
+        """
+        Get the slots of the vehicles, with one lookup per distinct vehicle.
+
+        Parameters
+        ----------
+        vehicle_ids : ndarray[int]
+            The ids of the vehicles.
+
+        Returns
+        -------
+        ndarray[int]
+            The slots of the vehicles.
+        """
+        distinct_ids, inverse = unique(vehicle_ids, return_inverse=True)
+        distinct_slots = asarray(
+            [self.slot_of(vehicle_id) for vehicle_id in distinct_ids.tolist()],
+            dtype=int,
+        )
+        return distinct_slots[inverse]
+
+    def add_positions(self, vehicle_trace_data: DataFrame) -> None:
+        """
+        Add the newly streamed trace data of all the vehicles. The positions before the current
+        time are dropped, and the new positions are merged in time order.
+
+        Parameters
+        ----------
+        vehicle_trace_data : DataFrame
+            The trace data of the vehicles.
+        """
+        is_pending = self._time_steps >= self._current_time
+        time_steps = concatenate(
+            [
+                self._time_steps[is_pending],
+                vehicle_trace_data[cc.TIME_STEP].to_numpy().astype(int),
+            ]
+        )
+        slots = concatenate(
+            [
+                self._slots[is_pending],
+                self._slots_of(vehicle_trace_data[cc.VEHICLE_ID].to_numpy(dtype=int)),
+            ]
+        )
+        positions = concatenate(
+            [
+                self._positions[is_pending],
+                vehicle_trace_data[[cc.X, cc.Y]].to_numpy(dtype=float),
+            ]
+        )
+
+        # The stable sort keeps the latest position last when a time step is repeated.
+        time_order = argsort(time_steps, kind="stable")
+        self._time_steps = time_steps[time_order]
+        self._slots = slots[time_order]
+        self._positions = positions[time_order]
+
+    def move_to(self, time_step: int) -> None:
+        """
+        Move all the vehicles with a position at the time step in one scatter. Vehicles without
+        a position at the time step keep their previous location.
+
+        Parameters
+        ----------
+        time_step : int
+            The time step.
+        """
+        if time_step == self._current_time:
+            return
+
+        start = searchsorted(self._time_steps, time_step, side="left")
+        end = searchsorted(self._time_steps, time_step, side="right")
+        self._locations[self._slots[start:end]] = self._positions[start:end]
+        self._current_time = time_step
+
+    def location(self, slot: int) -> tuple[float, float] | None:
+        """
+        Get the current location of the vehicle slot.
+
+        Parameters
+        ----------
+        slot : int
+            The slot of the vehicle.
+
+        Returns
+        -------
+        tuple[float, float] | None
+            The location, or None if the vehicle has no position yet.
+        """
+        x, y = self._locations[slot].tolist()
+        if isnan(x):
+            return None
+        return x, y
+
+    def locations_of(self, slots: ndarray[int]) -> ndarray[float]:
+        """
+        Get the current locations of the vehicle slots.
+
+        Parameters
+        ----------
+        slots : ndarray[int]
+            The slots of the vehicles.
+
+        Returns
+        -------
+        ndarray[float]
+            The locations, NaN for the vehicles without a position yet.
+        """
+        return self._locations[slots]
+
+
 class TraceMobilityModel(Agent):
     def __init__(self):
         """
@@ -62,20 +235,11 @@ class TraceMobilityModel(Agent):
 
         self.current_time: int = 0
         self._current_location: list[float] = []
-        self._positions_df: DataFrame = DataFrame()
-        self._positions: dict = {}
 
-    def _prepare_positions(self) -> None:
-        """
-        Prepare the positions.
-        """
-        self._positions_df[cc.TIME_STEP] = self._positions_df[cc.TIME_STEP].astype(int)
-        self._positions = dict(
-            zip(
-                self._positions_df[cc.TIME_STEP],
-                list(zip(self._positions_df[cc.X], self._positions_df[cc.Y])),
-            )
-        )
+        # Positions shared by all the trace driven vehicles
+        self._trace_positions: TracePositionStore | None = None
+        self._trace_slot: int = -1
+        self._vehicle_id: int = -1
 
     @property
     def type(self) -> str:
@@ -87,27 +251,32 @@ class TraceMobilityModel(Agent):
         """Get the current location."""
         return self._current_location
 
-    def update_positions(self, new_positions_df: DataFrame) -> None:
+    def set_trace_positions(
+        self, trace_positions: TracePositionStore, vehicle_id: int
+    ) -> None:
         """
-        Update the positions.
+        Set the shared trace positions to read the positions of the vehicle from.
 
         Parameters
         ----------
-        new_positions_df : DataFrame
-            The new positions.
+        trace_positions : TracePositionStore
+            The trace positions of all the vehicles.
+        vehicle_id : int
+            The id of the vehicle.
         """
-        self._positions_df = concat(
-            [self._positions_df, new_positions_df], ignore_index=True
-        )
-        self._prepare_positions()
+        self._trace_positions = trace_positions
+        self._trace_slot = trace_positions.slot_of(vehicle_id)
+        self._vehicle_id = vehicle_id
 
     def step(self) -> None:
         """
         Step through the model.
         """
-        # Check if the current time is in the positions dataframe
-        if self.current_time in self._positions:
-            self._current_location = self._positions[self.current_time]
+        # The first vehicle in the time step moves all the vehicles in the store.
+        self._trace_positions.move_to(self.current_time)
+
+        location = self._trace_positions.location(self._trace_slot)
+        if location is not None:
+            self._current_location = location
         elif not self._current_location:
-            logger.error(f"Missing position for time step {self.current_time}")
-            exit(1)
+            raise MissingVehiclePositionError([self._vehicle_id], self.current_time)
@@ -4,6 +4,7 @@ from pandas import DataFrame
 
 import src.core.constants as constants
 from src.core.exceptions import ModelTypeNotImplementedError
+from src.device.payload import DataTypeRegistry
 from src.models.collector import ControllerCollector, VehicleCollector
 from src.models.composer import *
 from src.models.finder import *
@@ -46,13 +47,15 @@ class ModelFactory:
                 raise NotImplementedError("Other mobility models are not implemented.")
 
     @staticmethod
-    def create_vehicle_data_composer(data_composer_data: dict) -> VehicleDataComposer:
+    def create_vehicle_data_composer(
+        data_composer_data: dict, data_type_registry: DataTypeRegistry
+    ) -> VehicleDataComposer:
         """
         Create the data composer model.
         """
         match data_composer_data[constants.MODEL_NAME]:
             case constants.SIMPLE_VEHICLE_DATA_COMPOSER:
-                return VehicleDataComposer(data_composer_data)
+                return VehicleDataComposer(data_composer_data, data_type_registry)
             case _:
                 raise ModelTypeNotImplementedError(
                     constants.DATA_COMPOSER,
@@ -62,13 +65,24 @@ class ModelFactory:
     @staticmethod
     def create_vehicle_data_simplifier(
         data_simplifier_data: dict,
-    ) -> VehicleDataSimplifier:
+        data_type_registry: DataTypeRegistry,
+    ) -> (
+        VehicleDataSimplifier
+        | PerTypeVehicleDataSimplifier
+        | PriorityVehicleDataSimplifier
+    ):
         """
         Create the data simplifier model.
         """
         match data_simplifier_data[constants.MODEL_NAME]:
             case constants.SIMPLE_VEHICLE_DATA_SIMPLIFIER:
                 return VehicleDataSimplifier(data_simplifier_data)
+            case constants.PER_TYPE_VEHICLE_DATA_SIMPLIFIER:
+                return PerTypeVehicleDataSimplifier(
+                    data_simplifier_data, data_type_registry
+                )
+            case constants.PRIORITY_VEHICLE_DATA_SIMPLIFIER:
+                return PriorityVehicleDataSimplifier(data_simplifier_data)
             case _:
                 raise ModelTypeNotImplementedError(
                     constants.DATA_SIMPLIFIER,
@@ -126,13 +140,14 @@ class ModelFactory:
     @staticmethod
     def create_controller_collector(
         controller_collector_data: dict,
+        data_type_registry: DataTypeRegistry,
     ) -> ControllerCollector:
         """
         Create the controller collector model.
         """
         match controller_collector_data[constants.MODEL_NAME]:
             case constants.SIMPLE_CONTROLLER_DATA_COLLECTOR:
-                return ControllerCollector()
+                return ControllerCollector(data_type_registry)
             case _:
                 raise ModelTypeNotImplementedError(
                     constants.DATA_COLLECTOR,
@@ -142,7 +157,7 @@ class ModelFactory:
     @staticmethod
     def create_basestation_finder(
         base_station_links_df: DataFrame, model_data: dict
-    ) -> NearestNBaseStationFinder:
+    ) -> NearestNBaseStationFinder | NearestPositionBaseStationFinder:
         """
         Create the base station finder.
         """
@@ -150,6 +165,11 @@ class ModelFactory:
             case constants.NEAREST_V2B:
                 logger.debug(f"Creating nearest base station finder.")
                 return NearestNBaseStationFinder(base_station_links_df)
+            case constants.NEAREST_POSITION_V2B:
+                logger.debug(f"Creating nearest position base station finder.")
+                return NearestPositionBaseStationFinder(
+                    model_data.get(constants.STATION_COUNT, 1)
+                )
             case _:
                 raise ModelTypeNotImplementedError(
                     constants.BASE_STATION_FINDER, model_data[constants.MODEL_NAME]
@@ -158,13 +178,14 @@ class ModelFactory:
     @staticmethod
     def create_vehicle_data_collector(
         vehicle_data_collector_data: dict,
+        data_type_registry: DataTypeRegistry,
     ) -> VehicleCollector:
         """
         Create the vehicle data collector model.
         """
         match vehicle_data_collector_data[constants.MODEL_NAME]:
             case constants.SIMPLE_VEHICLE_DATA_COLLECTOR:
-                return VehicleCollector()
+                return VehicleCollector(data_type_registry)
             case _:
                 raise ModelTypeNotImplementedError(
                     constants.DATA_COLLECTOR,
@@ -175,13 +196,17 @@ class ModelFactory:
     def create_vehicle_neighbour_finder(
         v2v_links: DataFrame,
         vehicle_neighbour_finder_data: dict,
-    ) -> TraceVehicleNeighbourFinder:
+    ) -> TraceVehicleNeighbourFinder | RangeVehicleNeighbourFinder:
         """
         Create the vehicle neighbour finder model.
         """
         match vehicle_neighbour_finder_data[constants.MODEL_NAME]:
             case constants.TRACE_V2V:
                 return TraceVehicleNeighbourFinder(v2v_links)
+            case constants.RANGE_V2V:
+                return RangeVehicleNeighbourFinder(
+                    vehicle_neighbour_finder_data[constants.RADIUS]
+                )
             case _:
                 raise ModelTypeNotImplementedError(
                     constants.NEIGHBOUR_FINDER,
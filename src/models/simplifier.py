@@ -1,31 +1,176 @@
+from numpy import argsort, clip, cumsum, divide, empty_like, full, ndarray, ones_like
+
 import src.core.constants as constants
-from src.device.payload import VehiclePayload, BaseStationPayload
+from src.core.exceptions import UnknownDataTypeError
+from src.device.payload import BaseStationPayload, DataTypeRegistry
 
-__all__ = ["VehicleDataSimplifier", "BaseStationDataSimplifier"]
+__all__ = [
+    "VehicleDataSimplifier",
+    "PerTypeVehicleDataSimplifier",
+    "PriorityVehicleDataSimplifier",
+    "BaseStationDataSimplifier",
+]
 
 
 class VehicleDataSimplifier:
     def __init__(self, model_data: dict):
         """
-        Simplify the vehicle data.
+        Simplify the vehicle data by compressing all the data types with a fixed ratio.
         """
         self._retention_ratio: float = model_data[constants.RETENTION_FACTOR]
         self._compression_ratio: float = model_data[constants.COMPRESSION_FACTOR]
 
-    def simplify_data(self, veh_payload: VehiclePayload) -> VehiclePayload:
+    @property
+    def key(self) -> tuple:
+        """Get the key of the simplifier, equal for the simplifiers with the same parameters."""
+        return type(self), self._compression_ratio
+
+    def simplify_batch(
+        self,
+        data_sizes: ndarray[float],
+        data_counts: ndarray[float],
+        data_priorities: ndarray[int],
+    ) -> tuple[ndarray[float], ndarray[float]]:
         """
-        Simplify the vehicle data.
+        Simplify the data of many vehicles at once.
+
+        Parameters
+        ----------
+        data_sizes : ndarray[float]
+            The data sizes, with a row for each vehicle and a column for each data type.
+        data_counts : ndarray[float]
+            The data counts, in the same layout as the data sizes.
+        data_priorities : ndarray[int]
+            The priority of each data type.
+
+        Returns
+        -------
+        tuple[ndarray[float], ndarray[float]]
+            The simplified data sizes and counts.
         """
-        # Simplify the data.
-        for idx in range(len(veh_payload.data_payload_list)):
-            veh_payload.data_payload_list[idx].data_size = (
-                veh_payload.data_payload_list[idx].data_size * self._compression_ratio
-            )
-            veh_payload.data_payload_list[idx].count = (
-                veh_payload.data_payload_list[idx].count * self._compression_ratio
-            )
-
-        return veh_payload
+        return (
+            data_sizes * self._compression_ratio,
+            data_counts * self._compression_ratio,
+        )
+
+
+class PerTypeVehicleDataSimplifier:
+    def __init__(self, model_data: dict, data_type_registry: DataTypeRegistry):
+        """
+        Simplify the vehicle data by compressing each data type with its own ratio. The data
+        types missing from the ratio table are compressed with the default ratio, the ratios
+        of data types without data sources raise an UnknownDataTypeError.
+
+        Parameters
+        ----------
+        model_data : dict
+            The model data of the simplifier from the config file.
+        data_type_registry : DataTypeRegistry
+            The registry of the data types of the simulation.
+        """
+        self._compression_ratios: ndarray[float] = full(
+            data_type_registry.count, model_data[constants.COMPRESSION_FACTOR]
+        )
+        for data_type, ratio in model_data[constants.COMPRESSION_FACTORS].items():
+            data_type_id = data_type_registry.id_of(data_type)
+            if data_type_id < 0:
+                raise UnknownDataTypeError(data_type, constants.DATA_SIMPLIFIER)
+            self._compression_ratios[data_type_id] = ratio
+
+    @property
+    def key(self) -> tuple:
+        """Get the key of the simplifier, equal for the simplifiers with the same parameters."""
+        return type(self), tuple(self._compression_ratios.tolist())
+
+    def simplify_batch(
+        self,
+        data_sizes: ndarray[float],
+        data_counts: ndarray[float],
+        data_priorities: ndarray[int],
+    ) -> tuple[ndarray[float], ndarray[float]]:
+        """
+        Simplify the data of many vehicles at once.
+
+        Parameters
+        ----------
+        data_sizes : ndarray[float]
+            The data sizes, with a row for each vehicle and a column for each data type.
+        data_counts : ndarray[float]
+            The data counts, in the same layout as the data sizes.
+        data_priorities : ndarray[int]
+            The priority of each data type.
+
+        Returns
+        -------
+        tuple[ndarray[float], ndarray[float]]
+            The simplified data sizes and counts.
+        """
+        return (
+            data_sizes * self._compression_ratios,
+            data_counts * self._compression_ratios,
+        )
+
+
+class PriorityVehicleDataSimplifier:
+    def __init__(self, model_data: dict):
+        """
+        Simplify the vehicle data by retaining a share of the data of each vehicle, filled
+        with the data types in the order of their priority, and compressing the retained data.
+        A lower priority value is a higher priority.
+        """
+        self._retention_ratio: float = model_data[constants.RETENTION_FACTOR]
+        self._compression_ratio: float = model_data[constants.COMPRESSION_FACTOR]
+
+    @property
+    def key(self) -> tuple:
+        """Get the key of the simplifier, equal for the simplifiers with the same parameters."""
+        return type(self), self._retention_ratio, self._compression_ratio
+
+    def simplify_batch(
+        self,
+        data_sizes: ndarray[float],
+        data_counts: ndarray[float],
+        data_priorities: ndarray[int],
+    ) -> tuple[ndarray[float], ndarray[float]]:
+        """
+        Simplify the data of many vehicles at once.
+
+        Parameters
+        ----------
+        data_sizes : ndarray[float]
+            The data sizes, with a row for each vehicle and a column for each data type.
+        data_counts : ndarray[float]
+            The data counts, in the same layout as the data sizes.
+        data_priorities : ndarray[int]
+            The priority of each data type.
+
+        Returns
+        -------
+        tuple[ndarray[float], ndarray[float]]
+            The simplified data sizes and counts.
+        """
+        # Fill the retained share of each vehicle with the data types in the priority order.
+        priority_order = argsort(data_priorities, kind="stable")
+        ordered_sizes = data_sizes[:, priority_order]
+        retained_budget = self._retention_ratio * data_sizes.sum(axis=1, keepdims=True)
+        size_before = cumsum(ordered_sizes, axis=1) - ordered_sizes
+
+        retained_sizes = empty_like(data_sizes)
+        retained_sizes[:, priority_order] = clip(
+            retained_budget - size_before, 0.0, ordered_sizes
+        )
+
+        # Retain the same share of the units of each data type.
+        retained_share = divide(
+            retained_sizes,
+            data_sizes,
+            out=ones_like(data_sizes),
+            where=data_sizes > 0,
+        )
+        return (
+            retained_sizes * self._compression_ratio,
+            data_counts * retained_share * self._compression_ratio,
+        )
 
 
 class BaseStationDataSimplifier:
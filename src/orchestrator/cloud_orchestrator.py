@@ -1,8 +1,10 @@
 import logging
 
 from mesa import Agent
+from numpy import argsort, empty, fromiter, full, ndarray, r_, unique
 from pandas import DataFrame
 
+import src.core.common_constants as cc
 import src.core.constants as constants
 from src.device.base_station import BaseStation
 from src.device.controller import CentralController
@@ -34,18 +36,27 @@ class CloudOrchestrator(Agent):
         # Uplink data generated at the basestations
         self.data_at_basestations: dict[int, BaseStationPayload] = {}
 
-        # Uplink base station data along with the target controllers
-        self.uplink_basestations_data: dict[int, dict[int, BaseStationPayload]] = {}
+        # Uplink base station data grouped by the target controllers, with the order of the
+        # base stations and the offsets of each controller.
+        self._uplink_basestation_ids: ndarray[int] = empty(0, dtype=int)
+        self._controller_order: ndarray[int] = empty(0, dtype=int)
+        self._assigned_controllers: ndarray[int] = empty(0, dtype=int)
+        self._controller_offsets: ndarray[int] = full(1, 0, dtype=int)
 
         # Downlink response created at the controllers
         self.downlink_response_at_controllers: dict[
             int, dict[int, BaseStationResponse]
         ] = {}
 
-        # Prepare the dict with second column as the key and the third column as the value
-        self._base_station_controller_dict = {
-            row[1]: row[2] for row in self._controller_links_df.values
-        }
+        # Slots of the base stations and the controllers in the mapping arrays
+        self._base_station_slots: dict[int, int] = {}
+        self._controller_slots: dict[int, int] = {}
+        self._controller_ids: ndarray[int] = empty(0, dtype=int)
+
+        # Controller slot of each base station slot, -1 if the base station is not linked
+        self._base_station_controller: ndarray[int] = empty(0, dtype=int)
+
+        self._prepare_network_mappings(self._controller_links_df)
 
         self._create_models(model_data)
 
@@ -128,12 +139,71 @@ class CloudOrchestrator(Agent):
         None
         """
         self._controller_links_df = b2c_links
+        self._prepare_network_mappings(b2c_links)
 
-    def _prepare_network_mappings(self) -> None:
+    def _prepare_network_mappings(self, b2c_links: DataFrame) -> None:
         """
-        Prepare the base station controller mapping.
+        Update the base station controller mapping with the links. The new base stations and
+        controllers get the next free slots, the links of the known base stations are
+        overwritten.
+
+        Parameters
+        ----------
+        b2c_links : DataFrame
+            The B2C links.
         """
-        pass
+        if b2c_links.empty:
+            return
+
+        base_station_slots = self._get_slots(
+            b2c_links[cc.BASE_STATION_ID].to_numpy(dtype=int), self._base_station_slots
+        )
+        controller_ids = b2c_links[cc.CONTROLLER_ID].to_numpy(dtype=int)
+        controller_slots = self._get_slots(controller_ids, self._controller_slots)
+
+        # Grow the mapping arrays for the new slots.
+        if len(self._base_station_slots) > len(self._base_station_controller):
+            new_mapping = full(len(self._base_station_slots), -1, dtype=int)
+            new_mapping[
+                : len(self._base_station_controller)
+            ] = self._base_station_controller
+            self._base_station_controller = new_mapping
+        if len(self._controller_slots) > len(self._controller_ids):
+            new_controller_ids = empty(len(self._controller_slots), dtype=int)
+            new_controller_ids[: len(self._controller_ids)] = self._controller_ids
+            self._controller_ids = new_controller_ids
+
+        self._controller_ids[controller_slots] = controller_ids
+        self._base_station_controller[base_station_slots] = controller_slots
+
+    @staticmethod
+    def _get_slots(device_ids: ndarray[int], slots: dict[int, int]) -> ndarray[int]:
+        """
+        Get the slots of the devices, adding the new devices to the slots.
+
+        Parameters
+        ----------
+        device_ids : ndarray[int]
+            The ids of the devices.
+        slots : dict[int, int]
+            The slots of the known devices, updated in place.
+
+        Returns
+        -------
+        ndarray[int]
+            The slots of the devices.
+        """
+        unique_ids, inverse = unique(device_ids, return_inverse=True)
+        for device_id in unique_ids.tolist():
+            if device_id not in slots:
+                slots[device_id] = len(slots)
+
+        unique_slots = fromiter(
+            (slots[device_id] for device_id in unique_ids.tolist()),
+            dtype=int,
+            count=len(unique_ids),
+        )
+        return unique_slots[inverse]
 
     def get_total_data_at_controllers(self) -> float:
         """
@@ -238,29 +308,53 @@ class CloudOrchestrator(Agent):
 
     def _assign_target_controllers(self) -> None:
         """
-        Assign target controllers for each base station.
+        Assign target controllers for all the base stations at once and group the base
+        stations by their controller.
         """
         logger.debug(f"Assigning target controllers.")
-        # Clear the previous data
-        self.uplink_basestations_data.clear()
-
-        for base_station_id, base_station_data in self.data_at_basestations.items():
-            # Find the controller for the base station
-            controller_id = self._base_station_controller_dict[base_station_id]
-
-            if controller_id not in self.uplink_basestations_data:
-                self.uplink_basestations_data[controller_id] = {}
-            self.uplink_basestations_data[controller_id][
-                base_station_id
-            ] = base_station_data
+        self._uplink_basestation_ids = fromiter(
+            self.data_at_basestations.keys(),
+            dtype=int,
+            count=len(self.data_at_basestations),
+        )
+
+        # Find the controller of each base station
+        base_station_slots = fromiter(
+            (
+                self._base_station_slots[base_station_id]
+                for base_station_id in self._uplink_basestation_ids.tolist()
+            ),
+            dtype=int,
+            count=len(self._uplink_basestation_ids),
+        )
+        controller_slots = self._base_station_controller[base_station_slots]
+        assert (controller_slots >= 0).all(), "Base stations without a controller."
+
+        # Group the base stations by the controller, keeping their order.
+        self._controller_order = argsort(controller_slots, kind="stable")
+        assigned_slots, group_starts = unique(
+            controller_slots[self._controller_order], return_index=True
+        )
+        self._assigned_controllers = self._controller_ids[assigned_slots]
+        self._controller_offsets = r_[group_starts, len(controller_slots)]
 
     def _send_data_to_controllers(self) -> None:
         """
         Send data to controllers.
         """
         logger.debug(f"Sending data to controllers.")
-        for controller_id, base_station_data in self.uplink_basestations_data.items():
-            self._controllers[controller_id].received_data = base_station_data
+        for group, controller_id in enumerate(self._assigned_controllers.tolist()):
+            base_station_ids = self._uplink_basestation_ids[
+                self._controller_order[
+                    self._controller_offsets[group] : self._controller_offsets[
+                        group + 1
+                    ]
+                ]
+            ].tolist()
+            self._controllers[controller_id].received_data = {
+                base_station_id: self.data_at_basestations[base_station_id]
+                for base_station_id in base_station_ids
+            }
             # Consume the wired network bandwidth in the base station.
             self._controllers[controller_id].use_network_for_uplink()
 
@@ -275,6 +369,10 @@ class CloudOrchestrator(Agent):
         # Send data to base stations
         self._send_data_to_basestations()
 
+        # The payloads are recycled at the end of the step, do not keep them.
+        self.data_at_basestations.clear()
+        self.downlink_response_at_controllers.clear()
+
     def _collect_data_from_controllers(self) -> None:
         """
         Collect data from each controller.
@@ -287,6 +385,7 @@ class CloudOrchestrator(Agent):
             ] = controller.downlink_response
             # Controller has to consume the wired bandwidth
             controller.use_network_for_downlink()
+            controller.release_step_data()
 
     def _send_data_to_basestations(self) -> None:
         """
@@ -1,13 +1,32 @@
 import logging
 
 from mesa import Agent
+from numpy import (
+    argsort,
+    asarray,
+    bincount,
+    empty,
+    flatnonzero,
+    fromiter,
+    ndarray,
+    r_,
+    searchsorted,
+    unique,
+    zeros,
+)
 from pandas import DataFrame
 
 import src.core.constants as constants
 from src.device.base_station import BaseStation
-from src.device.payload import VehiclePayload, VehicleResponse
+from src.device.payload import PayloadBatch, VehiclePayload, VehicleResponse
 from src.device.vehicle import Vehicle
-from src.models.finder import NearestNBaseStationFinder
+from src.device.vehicle_engine import ColumnarVehicleEngine
+from src.models.finder import (
+    NearestNBaseStationFinder,
+    NearestPositionBaseStationFinder,
+    RangeVehicleNeighbourFinder,
+    TraceVehicleNeighbourFinder,
+)
 from src.models.model_factory import ModelFactory
 
 logger = logging.getLogger(__name__)
@@ -19,6 +38,7 @@ class EdgeOrchestrator(Agent):
         vehicle_links_df: DataFrame,
         base_station_links_df: DataFrame,
         model_data: dict,
+        vehicle_engine: ColumnarVehicleEngine | None = None,
     ):
         """
         Initialize the edge orchestrator.
@@ -31,6 +51,8 @@ class EdgeOrchestrator(Agent):
             The links between the base stations.
         model_data : dict
             The model data.
+        vehicle_engine : ColumnarVehicleEngine | None, optional
+            The columnar vehicle engine, if the vehicles are not run as individual agents.
         """
         super().__init__(990000, None)
         self.type: str = constants.EDGE_ORCHESTRATOR
@@ -38,11 +60,14 @@ class EdgeOrchestrator(Agent):
 
         self._vehicles: dict[int, Vehicle] = {}
         self._base_stations: dict[int, BaseStation] = {}
+        self._vehicle_engine: ColumnarVehicleEngine | None = vehicle_engine
 
         self._vehicle_links: DataFrame = vehicle_links_df
         self._base_station_links: DataFrame = base_station_links_df
 
-        self._base_station_finder: NearestNBaseStationFinder | None = None
+        self._base_station_finder: (
+            NearestNBaseStationFinder | NearestPositionBaseStationFinder | None
+        ) = None
 
         # Uplink data generated at the vehicles
         self.uplink_data_at_vehicles: dict[int, VehiclePayload] = {}
@@ -50,8 +75,13 @@ class EdgeOrchestrator(Agent):
         # Sidelink data generated at the vehicles
         self.sidelink_data_at_vehicles: dict[int, VehiclePayload] = {}
 
-        # Uplink vehicle data along with the target base stations
-        self.all_vehicles_uplink_data: dict[int, dict[int, VehiclePayload]] = {}
+        # Uplink vehicle data along with the target base stations, the vehicles are grouped
+        # by the base station with the order and the offsets of each base station.
+        self._uplink_vehicle_data: PayloadBatch = PayloadBatch.empty(-1)
+        self._serving_basestations: ndarray[int] = empty(0, dtype=int)
+        self._basestation_order: ndarray[int] = empty(0, dtype=int)
+        self._assigned_basestations: ndarray[int] = empty(0, dtype=int)
+        self._basestation_offsets: ndarray[int] = zeros(1, dtype=int)
 
         # Downlink data arrived at the base stations from the controllers
         self.downlink_response_at_basestations: dict[
@@ -84,6 +114,8 @@ class EdgeOrchestrator(Agent):
         """
         Get the active vehicle count.
         """
+        if self._vehicle_engine is not None:
+            return self._vehicle_engine.active_count
         return len(self._vehicles)
 
     def active_base_station_count(self) -> int:
@@ -109,25 +141,34 @@ class EdgeOrchestrator(Agent):
         Add a new base station.
         """
         self._base_stations[base_station.unique_id] = base_station
+        if isinstance(self._base_station_finder, NearestPositionBaseStationFinder):
+            self._base_station_finder.add_base_station(
+                base_station.unique_id, base_station.location
+            )
 
     def remove_base_station(self, base_station_id: int) -> None:
         """
         Remove the base station.
         """
         self._base_stations.pop(base_station_id)
+        if isinstance(self._base_station_finder, NearestPositionBaseStationFinder):
+            self._base_station_finder.remove_base_station(base_station_id)
 
     def update_v2v_links(self, v2v_links: DataFrame) -> None:
         """
         Update the V2V links.
         """
         self._vehicle_links = v2v_links
+        if isinstance(self._neighbour_finder, TraceVehicleNeighbourFinder):
+            self._neighbour_finder.update_vehicle_links(v2v_links)
 
     def update_v2b_links(self, v2b_links: DataFrame) -> None:
         """
         Update the V2B links.
         """
         self._base_station_links = v2b_links
-        self._base_station_finder.update_base_station_links(v2b_links)
+        if isinstance(self._base_station_finder, NearestNBaseStationFinder):
+            self._base_station_finder.update_base_station_links(v2b_links)
 
     def _create_models(self, model_data: dict):
         """
@@ -150,6 +191,9 @@ class EdgeOrchestrator(Agent):
         This is the second step in the overall simulation.
         """
         logger.debug(f"Uplink stage at time {self.model.current_time}")
+        # Pass the vehicle locations to the models that work on the positions.
+        self._update_model_vehicle_locations()
+
         # Step through the models.
         self._base_station_finder.current_time = self.model.current_time
         self._base_station_finder.step()
@@ -171,6 +215,35 @@ class EdgeOrchestrator(Agent):
         # Send sidelink data to other vehicles
         self._transmit_sidelink_data()
 
+    def _update_model_vehicle_locations(self) -> None:
+        """
+        Update the finders that work on the positions with the current locations of the
+        active vehicles.
+        """
+        position_models = [
+            finder
+            for finder in (self._base_station_finder, self._neighbour_finder)
+            if isinstance(
+                finder, (NearestPositionBaseStationFinder, RangeVehicleNeighbourFinder)
+            )
+        ]
+        if len(position_models) == 0:
+            return
+
+        if self._vehicle_engine is not None:
+            vehicle_ids = self._vehicle_engine.active_vehicle_ids
+            locations = self._vehicle_engine.locations[
+                self._vehicle_engine.active_slots
+            ]
+        else:
+            vehicle_ids = asarray(list(self._vehicles.keys()), dtype=int)
+            locations = asarray(
+                [vehicle.location for vehicle in self._vehicles.values()]
+            )
+
+        for position_model in position_models:
+            position_model.update_vehicle_locations(vehicle_ids, locations)
+
     def _collect_sidelink_vehicle_data(self) -> None:
         """
         Collect the sidelink data from the vehicles.
@@ -178,6 +251,13 @@ class EdgeOrchestrator(Agent):
         logger.debug(f"Collecting sidelink data from vehicles")
         self.sidelink_data_at_vehicles.clear()
 
+        if self._vehicle_engine is not None:
+            active_slots = self._vehicle_engine.active_slots
+            self._vehicle_engine.use_network(
+                active_slots, self._vehicle_engine.sidelink_data_size[active_slots]
+            )
+            return
+
         for vehicle_id, vehicle in self._vehicles.items():
             self.sidelink_data_at_vehicles[vehicle_id] = vehicle.sidelink_payload
             # Consume the network bandwidth in the vehicle.
@@ -189,7 +269,14 @@ class EdgeOrchestrator(Agent):
         """
         logger.debug(f"Collecting uplink data from vehicles")
         self.uplink_data_at_vehicles.clear()
-        self._vehicles_in_range = len(self._vehicles)
+        self._vehicles_in_range = self.active_vehicle_count()
+
+        if self._vehicle_engine is not None:
+            active_slots = self._vehicle_engine.active_slots
+            self._vehicle_engine.use_network(
+                active_slots, self._vehicle_engine.uplink_data_size[active_slots]
+            )
+            return
 
         for vehicle_id, vehicle in self._vehicles.items():
             self.uplink_data_at_vehicles[vehicle_id] = vehicle.uplink_payload
@@ -198,37 +285,78 @@ class EdgeOrchestrator(Agent):
 
     def _assign_target_basestations(self) -> None:
         """
-        Find the base stations for the vehicles.
+        Find the base stations for all the vehicles at once and group the vehicles by their
+        base station.
         """
         logger.debug(f"Assigning target base stations")
-        # Prepare a dictionary with the payloads to send.
-        self.all_vehicles_uplink_data.clear()
-        for vehicle_id, vehicle_data in self.uplink_data_at_vehicles.items():
-            # Find the base station for the vehicle
-            base_station_ids = self._base_station_finder.select_n_stations_for_vehicle(
-                vehicle_id, 1
-            )
+        if self._vehicle_engine is not None:
+            self._assign_target_basestations_in_engine()
+            return
+
+        vehicle_ids = fromiter(
+            self.uplink_data_at_vehicles.keys(),
+            dtype=int,
+            count=len(self.uplink_data_at_vehicles),
+        )
+        self._uplink_vehicle_data = PayloadBatch.from_payloads(
+            self.model.current_time, list(self.uplink_data_at_vehicles.values())
+        )
+        self._group_vehicles_by_basestation(
+            self._base_station_finder.select_stations_for_vehicles(vehicle_ids)
+        )
 
-            # Update the vehicle with the selected base station
-            base_station_id = base_station_ids[0]
+        # Update the vehicles with the selected base station
+        for vehicle_id, base_station_id in zip(
+            vehicle_ids.tolist(), self._serving_basestations.tolist()
+        ):
             self._vehicles[vehicle_id].selected_bs = base_station_id
 
-            if base_station_id not in self.all_vehicles_uplink_data:
-                self.all_vehicles_uplink_data[base_station_id] = {}
-            self.all_vehicles_uplink_data[base_station_id][vehicle_id] = vehicle_data
-
-            logger.debug(
-                f"Vehicle {vehicle_id} is assigned to base station {base_station_id} at time "
-                + f"{self.model.current_time}"
+    def _assign_target_basestations_in_engine(self) -> None:
+        """
+        Find the base stations for the vehicles in the columnar vehicle engine.
+        """
+        active_slots = self._vehicle_engine.active_slots
+        self._uplink_vehicle_data = self._vehicle_engine.uplink_batch(active_slots)
+        self._group_vehicles_by_basestation(
+            self._base_station_finder.select_stations_for_vehicles(
+                self._uplink_vehicle_data.sources
             )
+        )
+        self._vehicle_engine.selected_bs[active_slots] = self._serving_basestations
+
+    def _group_vehicles_by_basestation(
+        self, serving_basestations: ndarray[int]
+    ) -> None:
+        """
+        Group the vehicles by their serving base station. The vehicles of each base station
+        keep their order.
+
+        Parameters
+        ----------
+        serving_basestations : ndarray[int]
+            The serving base station of each vehicle.
+        """
+        assert (serving_basestations >= 0).all(), "Vehicles without a base station."
+        self._serving_basestations = serving_basestations
+
+        self._basestation_order = argsort(serving_basestations, kind="stable")
+        self._assigned_basestations, group_starts = unique(
+            serving_basestations[self._basestation_order], return_index=True
+        )
+        self._basestation_offsets = r_[group_starts, len(serving_basestations)]
 
     def _send_data_to_basestations(self) -> None:
         """
         Send data to the base stations.
         """
         logger.debug(f"Sending data to base stations")
-        for base_station_id, vehicle_data in self.all_vehicles_uplink_data.items():
-            self._base_stations[base_station_id].set_uplink_vehicle_data(vehicle_data)
+        for group, base_station_id in enumerate(self._assigned_basestations.tolist()):
+            vehicle_indices = self._basestation_order[
+                self._basestation_offsets[group] : self._basestation_offsets[group + 1]
+            ]
+            self._base_stations[base_station_id].set_uplink_vehicle_data(
+                self._uplink_vehicle_data.take(vehicle_indices)
+            )
             # Consume the wireless network bandwidth in the base station.
             self._base_stations[base_station_id].use_wireless_for_uplink()
 
@@ -243,6 +371,10 @@ class EdgeOrchestrator(Agent):
         # Send data to vehicles
         self._send_data_to_vehicles()
 
+        # The payloads are recycled at the end of the step, do not keep them.
+        self.uplink_data_at_vehicles.clear()
+        self.downlink_response_at_basestations.clear()
+
     def _collect_data_from_basestations(self):
         """
         Collect data from the base stations.
@@ -257,12 +389,17 @@ class EdgeOrchestrator(Agent):
 
             # Consume the wireless network bandwidth in the base station.
             base_station.use_wireless_for_downlink()
+            base_station.release_step_data()
 
     def _send_data_to_vehicles(self):
         """
         Send data to the vehicles.
         """
         logger.debug(f"Sending data to vehicles")
+        if self._vehicle_engine is not None:
+            self._send_data_to_engine_vehicles()
+            return
+
         for (
             base_station_id,
             base_station_data,
@@ -273,30 +410,162 @@ class EdgeOrchestrator(Agent):
                 # Consume the network bandwidth in the vehicle.
                 self._vehicles[vehicle_id].use_network_for_downlink()
 
+    def _send_data_to_engine_vehicles(self):
+        """
+        Send data to the vehicles in the columnar vehicle engine.
+        """
+        for base_station_data in self.downlink_response_at_basestations.values():
+            if len(base_station_data) == 0:
+                continue
+
+            slots = self._vehicle_engine.slots_of(list(base_station_data.keys()))
+            assert (slots >= 0).all(), "Vehicles missing at base station."
+            downlink_data = asarray(
+                [veh_data.downlink_data for veh_data in base_station_data.values()]
+            )
+
+            self._vehicle_engine.set_downlink_data(slots, downlink_data)
+            # Consume the network bandwidth in the vehicles.
+            self._vehicle_engine.use_network(slots, downlink_data)
+
     def _transmit_sidelink_data(self):
         """
         Transmit the sidelink data.
         """
         self._total_side_link_data = 0.0
-        for vehicle_id, vehicle_data in self.sidelink_data_at_vehicles.items():
-            this_vehicle = self._vehicles[vehicle_id]
-            neighbour_ids = self._neighbour_finder.find_vehicles(vehicle_id)
+        if self._vehicle_engine is not None:
+            self._transmit_sidelink_data_in_engine()
+            return
+
+        if len(self.sidelink_data_at_vehicles) == 0:
+            return
+
+        # Find the neighbours of all the vehicles at once.
+        vehicle_ids = fromiter(
+            self.sidelink_data_at_vehicles.keys(),
+            dtype=int,
+            count=len(self.sidelink_data_at_vehicles),
+        )
+        payloads = list(self.sidelink_data_at_vehicles.values())
+        senders, neighbour_ids = self._neighbour_finder.find_neighbour_links(
+            vehicle_ids
+        )
+        if len(neighbour_ids) == 0:
+            return
+
+        # Consume the network bandwidth in both vehicles, once per vehicle.
+        sorted_order = argsort(vehicle_ids)
+        receivers = sorted_order[
+            searchsorted(vehicle_ids, neighbour_ids, sorter=sorted_order)
+        ]
+        assert (vehicle_ids[receivers] == neighbour_ids).all(), "Vehicles missing."
+        sidelink_data = PayloadBatch.from_payloads(self.model.current_time, payloads)
+        link_data_sizes = sidelink_data.total_data_sizes[senders]
+        transferred_data = bincount(
+            senders, weights=link_data_sizes, minlength=len(vehicle_ids)
+        ) + bincount(receivers, weights=link_data_sizes, minlength=len(vehicle_ids))
+
+        for vehicle_idx in flatnonzero(transferred_data).tolist():
+            self._vehicles[vehicle_ids[vehicle_idx]].use_network_for_sidelink(
+                transferred_data[vehicle_idx]
+            )
 
-            if len(neighbour_ids) == 0:
-                continue
+        # Send the data to the neighbours, summed over the senders of each vehicle.
+        received_data = self._sum_sidelink_data_by_receiver(
+            sidelink_data, senders, receivers
+        )
+        sender_counts = bincount(receivers, minlength=len(vehicle_ids))
+        for vehicle_idx in flatnonzero(sender_counts).tolist():
+            self._vehicles[vehicle_ids[vehicle_idx]].set_sidelink_received_data(
+                received_data.take(slice(vehicle_idx, vehicle_idx + 1)),
+                int(sender_counts[vehicle_idx]),
+            )
 
-            for neighbour_id in neighbour_ids:
-                assert (
-                    neighbour_id in self._vehicles
-                ), f"Vehicle {neighbour_id} missing."
+        self._total_side_link_data = float(link_data_sizes.sum())
 
-                # Send the data to the neighbour
-                self._vehicles[neighbour_id].add_sidelink_received_data(vehicle_data)
+    @staticmethod
+    def _sum_sidelink_data_by_receiver(
+        sidelink_data: PayloadBatch, senders: ndarray[int], receivers: ndarray[int]
+    ) -> PayloadBatch:
+        """
+        Sum the sidelink data sent over the links by the receiving vehicle.
 
-                # Consume the network bandwidth in both vehicles.
-                this_vehicle.use_network_for_sidelink(vehicle_data.total_data_size)
-                self._vehicles[neighbour_id].use_network_for_sidelink(
-                    vehicle_data.total_data_size
+        Parameters
+        ----------
+        sidelink_data : PayloadBatch
+            The sidelink payloads of the vehicles.
+        senders : ndarray[int]
+            The row of the sending vehicle of each link.
+        receivers : ndarray[int]
+            The row of the receiving vehicle of each link.
+
+        Returns
+        -------
+        PayloadBatch
+            The data received by each vehicle, in the same rows as the sidelink payloads.
+        """
+        vehicle_count = len(sidelink_data)
+        data_type_count = sidelink_data.data_sizes.shape[1]
+        data_sizes = zeros((vehicle_count, data_type_count))
+        data_counts = zeros((vehicle_count, data_type_count))
+        data_present = zeros((vehicle_count, data_type_count), dtype=bool)
+        for data_type_id in range(data_type_count):
+            data_sizes[:, data_type_id] = bincount(
+                receivers,
+                weights=sidelink_data.data_sizes[senders, data_type_id],
+                minlength=vehicle_count,
+            )
+            data_counts[:, data_type_id] = bincount(
+                receivers,
+                weights=sidelink_data.data_counts[senders, data_type_id],
+                minlength=vehicle_count,
+            )
+            data_present[:, data_type_id] = (
+                bincount(
+                    receivers,
+                    weights=sidelink_data.data_present[senders, data_type_id],
+                    minlength=vehicle_count,
                 )
+                > 0
+            )
+
+        return PayloadBatch(
+            sidelink_data.timestamp,
+            sidelink_data.sources,
+            bincount(
+                receivers,
+                weights=sidelink_data.total_data_sizes[senders],
+                minlength=vehicle_count,
+            ),
+            data_sizes,
+            data_counts,
+            data_present,
+        )
+
+    def _transmit_sidelink_data_in_engine(self):
+        """
+        Transmit the sidelink data between the vehicles in the columnar vehicle engine. All
+        the links of the step are handled at once.
+        """
+        active_slots = self._vehicle_engine.active_slots
+        senders, neighbour_ids = self._neighbour_finder.find_neighbour_links(
+            self._vehicle_engine.active_vehicle_ids
+        )
+        if len(neighbour_ids) == 0:
+            return
+
+        neighbour_slots = self._vehicle_engine.slots_of(neighbour_ids)
+        assert (neighbour_slots >= 0).all(), "Neighbours of vehicles missing."
+
+        # Send the data to the neighbours
+        sender_slots = active_slots[senders]
+        link_data_sizes = self._vehicle_engine.sidelink_data_size[sender_slots]
+        self._vehicle_engine.add_sidelink_received_data(
+            neighbour_slots, link_data_sizes
+        )
+
+        # Consume the network bandwidth in both vehicles.
+        self._vehicle_engine.use_network(sender_slots, link_data_sizes)
+        self._vehicle_engine.use_network(neighbour_slots, link_data_sizes)
 
-                self._total_side_link_data += vehicle_data.total_data_size
+        self._total_side_link_data = float(link_data_sizes.sum())
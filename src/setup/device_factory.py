@@ -1,16 +1,23 @@
 import logging
 from random import choices
 
-from numpy import asarray
-from pandas import DataFrame, Series
+from numpy import asarray, flatnonzero, r_
+from pandas import DataFrame
 
 import src.core.common_constants as cc
 import src.core.constants as constants
 from src.device.activation import ActivationSettings
 from src.device.base_station import BaseStation
 from src.device.controller import CentralController
-from src.device.hardware import ComputingHardware, NetworkHardware
+from src.device.hardware import (
+    ComputingHardware,
+    NetworkCapacityLedger,
+    NetworkHardware,
+)
+from src.device.payload import DataTypeRegistry
 from src.device.vehicle import Vehicle
+from src.device.vehicle_engine import ColumnarVehicleEngine
+from src.models.mobility import TracePositionStore
 
 logger = logging.getLogger(__name__)
 
@@ -23,12 +30,26 @@ class DeviceFactory:
         controller_activations_data: DataFrame,
         sim_start_time: int,
         sim_end_time: int,
+        vehicle_engine: ColumnarVehicleEngine | None = None,
+        trace_positions: TracePositionStore | None = None,
+        network_ledger: NetworkCapacityLedger | None = None,
+        data_type_registry: DataTypeRegistry | None = None,
     ):
         """
         Initialize the device factory object.
+
+        When the columnar vehicle engine is given, the vehicles are added to the engine
+        instead of being created as individual agents. The streamed trace data is added to
+        the trace positions shared by all the trace driven vehicles. The network hardware of
+        all the devices is added to the network capacity ledger. The data types of the
+        devices are taken from the data type registry of the simulation.
         """
-        # Store the activations data
-        self._veh_activations: DataFrame = vehicle_activations_data
+        # Store the activations data, the vehicle activations are grouped by vehicle.
+        self._veh_activations: DataFrame = DataFrame()
+        self._veh_activation_index: dict[int, tuple[int, int]] = {}
+        self._veh_activations, self._veh_activation_index = self._create_id_index(
+            vehicle_activations_data, cc.VEHICLE_ID
+        )
         self._bs_activations: DataFrame = base_station_activations_data
         self._controller_activations: DataFrame = controller_activations_data
 
@@ -41,6 +62,29 @@ class DeviceFactory:
         self._base_stations: dict[int, BaseStation] = {}
         self._controllers: dict[int, CentralController] = {}
 
+        # Devices created by the last call to the create_new_* methods
+        self._new_vehicle_ids: list[int] = []
+        self._new_base_station_ids: list[int] = []
+        self._new_controller_ids: list[int] = []
+
+        # Columnar engine that holds all the vehicles, if enabled
+        self._vehicle_engine: ColumnarVehicleEngine | None = vehicle_engine
+
+        # Positions of all the trace driven vehicles
+        self._trace_positions: TracePositionStore = (
+            trace_positions if trace_positions is not None else TracePositionStore()
+        )
+
+        # Capacity of the network hardware of all the devices
+        self._network_ledger: NetworkCapacityLedger = (
+            network_ledger if network_ledger is not None else NetworkCapacityLedger()
+        )
+
+        # Data types generated by the vehicles
+        self._data_type_registry: DataTypeRegistry = (
+            data_type_registry if data_type_registry is not None else DataTypeRegistry()
+        )
+
     @property
     def vehicles(self) -> dict[int, Vehicle]:
         """Get the vehicles in the simulation."""
@@ -56,6 +100,111 @@ class DeviceFactory:
         """Get the controllers in the simulation."""
         return self._controllers
 
+    @property
+    def trace_positions(self) -> TracePositionStore:
+        """Get the positions of the trace driven vehicles."""
+        return self._trace_positions
+
+    @property
+    def new_vehicle_ids(self) -> list[int]:
+        """Get the vehicles created from the last streamed data."""
+        return self._new_vehicle_ids
+
+    @property
+    def new_base_station_ids(self) -> list[int]:
+        """Get the base stations created from the last streamed data."""
+        return self._new_base_station_ids
+
+    @property
+    def new_controller_ids(self) -> list[int]:
+        """Get the controllers created from the last streamed data."""
+        return self._new_controller_ids
+
+    @staticmethod
+    def _create_id_index(
+        data_df: DataFrame, id_column: str
+    ) -> tuple[DataFrame, dict[int, tuple[int, int]]]:
+        """
+        Group the rows of each id with one stable sort, and index the rows of each id.
+
+        Parameters
+        ----------
+        data_df : DataFrame
+            The data to group.
+        id_column : str
+            The column with the ids.
+
+        Returns
+        -------
+        tuple[DataFrame, dict[int, tuple[int, int]]]
+            The grouped data and the start and stop row of each id.
+        """
+        if data_df.empty:
+            return data_df, {}
+
+        grouped_df = data_df.sort_values(id_column, kind="stable")
+        ids = grouped_df[id_column].to_numpy()
+
+        group_starts = r_[0, flatnonzero(ids[1:] != ids[:-1]) + 1]
+        group_stops = r_[group_starts[1:], len(ids)]
+        id_index = dict(
+            zip(
+                ids[group_starts].tolist(),
+                zip(group_starts.tolist(), group_stops.tolist()),
+            )
+        )
+        return grouped_df, id_index
+
+    @staticmethod
+    def _get_id_rows(
+        grouped_df: DataFrame, id_index: dict[int, tuple[int, int]], device_id: int
+    ) -> DataFrame:
+        """
+        Get the rows of the id from the grouped data.
+
+        Parameters
+        ----------
+        grouped_df : DataFrame
+            The data grouped by id.
+        id_index : dict[int, tuple[int, int]]
+            The start and stop row of each id.
+        device_id : int
+            The id.
+
+        Returns
+        -------
+        DataFrame
+            The rows of the id.
+        """
+        start, stop = id_index.get(device_id, (0, 0))
+        return grouped_df.iloc[start:stop]
+
+    def _create_vehicle_activation_settings(
+        self, vehicle_id: int
+    ) -> ActivationSettings:
+        """
+        Create the activation settings of the vehicle from the activation data.
+
+        Parameters
+        ----------
+        vehicle_id : int
+            The ID of the vehicle.
+
+        Returns
+        -------
+        ActivationSettings
+            The activation settings of the vehicle.
+        """
+        this_activation_data: DataFrame = self._get_id_rows(
+            self._veh_activations, self._veh_activation_index, vehicle_id
+        )
+        return ActivationSettings(
+            this_activation_data[cc.START_TIME].values,
+            this_activation_data[cc.END_TIME].values,
+            self._sim_start_time,
+            self._sim_end_time,
+        )
+
     @staticmethod
     def _create_computing_hardware(computing_hardware_data: dict) -> ComputingHardware:
         """
@@ -63,12 +212,15 @@ class DeviceFactory:
         """
         return ComputingHardware(computing_hardware_data)
 
-    @staticmethod
-    def _create_networking_hardware(networking_hardware: dict) -> NetworkHardware:
+    def _create_networking_hardware(
+        self, networking_hardware: dict, hardware_class: str
+    ) -> NetworkHardware:
         """
-        Create the networking hardware.
+        Create the networking hardware in the network capacity ledger.
         """
-        return NetworkHardware(networking_hardware)
+        return NetworkHardware(
+            networking_hardware, self._network_ledger, hardware_class
+        )
 
     def create_vehicles(
         self, vehicle_trace_data: DataFrame, vehicle_models: dict
@@ -96,6 +248,9 @@ class DeviceFactory:
         logger.debug(f"Vehicle Weights: {veh_weights}")
         logger.debug(f"Vehicle Types: {vehicle_types}")
 
+        # Add the trace data of all the vehicles to the shared trace positions.
+        self._trace_positions.add_positions(vehicle_trace_data)
+
         # Create the vehicles.
         for vehicle_id in vehicle_ids:
             logger.debug(f"Creating vehicle {vehicle_id}")
@@ -104,32 +259,45 @@ class DeviceFactory:
             selected_vehicle_models = vehicle_models[veh_choice].copy()
 
             # Create activation settings from the activation data.
-            this_activation_data: Series = self._veh_activations[
-                self._veh_activations[cc.VEHICLE_ID] == vehicle_id
-            ]
-
-            this_activation_settings = ActivationSettings(
-                this_activation_data[cc.START_TIME].values,
-                this_activation_data[cc.END_TIME].values,
-                self._sim_start_time,
-                self._sim_end_time,
+            this_activation_settings = self._create_vehicle_activation_settings(
+                vehicle_id
             )
 
+            if self._vehicle_engine is not None:
+                # Add the vehicle to the engine, the engine reads the shared trace positions.
+                self._vehicle_engine.add_vehicle(
+                    vehicle_id, veh_choice, this_activation_settings
+                )
+                continue
+
             # Create the vehicle.
             self._vehicles[vehicle_id] = self._create_vehicle(
                 vehicle_id, this_activation_settings, selected_vehicle_models
             )
-
-            # Update the vehicle trace data.
-            this_vehicle_trace: DataFrame = vehicle_trace_data[
-                vehicle_trace_data[cc.VEHICLE_ID] == vehicle_id
-            ]
-            self._vehicles[vehicle_id].update_mobility_data(this_vehicle_trace)
+            self._set_trace_positions(
+                self._vehicles[vehicle_id], selected_vehicle_models
+            )
 
             logger.debug(f"Created vehicle {vehicle_id} of type {veh_choice}")
 
-    @staticmethod
+    def _set_trace_positions(self, vehicle: Vehicle, vehicle_models: dict) -> None:
+        """
+        Let the vehicle read its positions from the shared trace positions, if it is trace
+        driven.
+
+        Parameters
+        ----------
+        vehicle : Vehicle
+            The vehicle.
+        vehicle_models : dict
+            The model data of the vehicle.
+        """
+        mobility_name = vehicle_models[constants.MOBILITY][constants.MODEL_NAME]
+        if mobility_name == constants.TRACE_MOBILITY:
+            vehicle.update_mobility_data(self._trace_positions)
+
     def _create_vehicle(
+        self,
         vehicle_id: int,
         activation_settings: ActivationSettings,
         vehicle_models: dict,
@@ -157,8 +325,8 @@ class DeviceFactory:
         )
 
         # Create the networking hardware.
-        wireless_hardware = DeviceFactory._create_networking_hardware(
-            vehicle_models[constants.NETWORKING_HARDWARE]
+        wireless_hardware = self._create_networking_hardware(
+            vehicle_models[constants.NETWORKING_HARDWARE], constants.VEHICLE_WIRELESS
         )
 
         return Vehicle(
@@ -167,6 +335,7 @@ class DeviceFactory:
             wireless_hardware,
             activation_settings,
             vehicle_models,
+            self._data_type_registry,
         )
 
     def create_base_stations(
@@ -221,13 +390,15 @@ class DeviceFactory:
         )
 
         # Create wired hardware.
-        wired_hardware = DeviceFactory._create_networking_hardware(
-            base_station_models_data[constants.NETWORKING_HARDWARE][constants.WIRED]
+        wired_hardware = self._create_networking_hardware(
+            base_station_models_data[constants.NETWORKING_HARDWARE][constants.WIRED],
+            constants.BASE_STATION_WIRED,
         )
 
         # Create wireless hardware.
-        wireless_hardware = DeviceFactory._create_networking_hardware(
-            base_station_models_data[constants.NETWORKING_HARDWARE][constants.WIRELESS]
+        wireless_hardware = self._create_networking_hardware(
+            base_station_models_data[constants.NETWORKING_HARDWARE][constants.WIRELESS],
+            constants.BASE_STATION_WIRELESS,
         )
 
         # Create activation settings from the activation data.
@@ -292,8 +463,9 @@ class DeviceFactory:
         )
 
         # Create wired hardware.
-        wired_hardware = DeviceFactory._create_networking_hardware(
-            controller_models_data[constants.NETWORKING_HARDWARE]
+        wired_hardware = self._create_networking_hardware(
+            controller_models_data[constants.NETWORKING_HARDWARE],
+            constants.CONTROLLER_WIRED,
         )
 
         # Create activation settings from the activation data.
@@ -313,6 +485,7 @@ class DeviceFactory:
             wired_hardware,
             this_activation_settings,
             controller_models_data,
+            self._data_type_registry,
         )
 
     def create_new_vehicles(
@@ -322,6 +495,7 @@ class DeviceFactory:
         Update the vehicles based on the new trace data.
         """
         ue_list = vehicle_trace_data[cc.VEHICLE_ID].unique()
+        self._new_vehicle_ids = []
 
         # Get the weights of the vehicle types.
         vehicle_weights = [
@@ -330,13 +504,16 @@ class DeviceFactory:
         ]
         vehicle_types = list(vehicle_models.keys())
 
+        # Add the trace data of all the vehicles to the shared trace positions.
+        self._trace_positions.add_positions(vehicle_trace_data)
+
+        if self._vehicle_engine is not None:
+            self._create_new_engine_vehicles(ue_list, vehicle_types, vehicle_weights)
+            return
+
         for vehicle_id in ue_list:
-            this_vehicle_trace: DataFrame = vehicle_trace_data[
-                vehicle_trace_data[cc.VEHICLE_ID] == vehicle_id
-            ]
             if vehicle_id in self._vehicles:
-                # Already exists, update the trace data and continue
-                self._vehicles[vehicle_id].update_mobility_data(this_vehicle_trace)
+                # Already exists, the trace data is read from the shared trace positions.
                 continue
 
             # Randomly select the type of the vehicle and get the respective model set.
@@ -344,23 +521,54 @@ class DeviceFactory:
             selected_vehicle_models = vehicle_models[type_choice].copy()
 
             # Create the activation settings.
-            this_activation_data: Series = self._veh_activations[
-                self._veh_activations[cc.VEHICLE_ID] == vehicle_id
-            ]
-
-            this_activation_settings = ActivationSettings(
-                this_activation_data[cc.START_TIME].values,
-                this_activation_data[cc.END_TIME].values,
-                self._sim_start_time,
-                self._sim_end_time,
+            this_activation_settings = self._create_vehicle_activation_settings(
+                vehicle_id
             )
 
-            # Create the vehicle and update the trace data.
+            # Create the vehicle and let it read the shared trace positions.
             self._vehicles[vehicle_id] = self._create_vehicle(
                 vehicle_id, this_activation_settings, selected_vehicle_models
             )
+            self._new_vehicle_ids.append(vehicle_id)
+
+            self._set_trace_positions(
+                self._vehicles[vehicle_id], selected_vehicle_models
+            )
+
+    def _create_new_engine_vehicles(
+        self,
+        vehicle_ids: list[int],
+        vehicle_types: list[str],
+        vehicle_weights: list[float],
+    ) -> None:
+        """
+        Add the new vehicles to the columnar vehicle engine.
 
-            self._vehicles[vehicle_id].update_mobility_data(this_vehicle_trace)
+        Parameters
+        ----------
+        vehicle_ids : list[int]
+            The ids of the vehicles in the new trace data.
+        vehicle_types : list[str]
+            The vehicle types.
+        vehicle_weights : list[float]
+            The weights of the vehicle types.
+        """
+        for vehicle_id in vehicle_ids:
+            if self._vehicle_engine.has_vehicle(vehicle_id):
+                continue
+
+            # Randomly select the type of the vehicle.
+            type_choice = choices(vehicle_types, weights=vehicle_weights, k=1)[0]
+
+            # Create the activation settings.
+            this_activation_settings = self._create_vehicle_activation_settings(
+                vehicle_id
+            )
+
+            self._vehicle_engine.add_vehicle(
+                vehicle_id, type_choice, this_activation_settings
+            )
+            self._new_vehicle_ids.append(vehicle_id)
 
     def create_new_base_stations(
         self, base_station_data: DataFrame, base_station_models_data: dict
@@ -370,6 +578,7 @@ class DeviceFactory:
         """
         # Get the list of base stations in the simulation.
         base_station_list = base_station_data[cc.BASE_STATION_ID].unique()
+        self._new_base_station_ids = []
 
         for base_station_id in base_station_list:
             if base_station_id in self._base_stations:
@@ -388,6 +597,7 @@ class DeviceFactory:
             self._base_stations[base_station_id] = self._create_base_station(
                 base_station_id, base_station_position, base_station_models_data
             )
+            self._new_base_station_ids.append(base_station_id)
 
     def create_new_controllers(
         self, controller_data: DataFrame, controller_models_data: dict
@@ -397,6 +607,7 @@ class DeviceFactory:
         """
         # Get the list of controllers in the simulation.
         controller_list = controller_data[cc.CONTROLLER_ID].unique()
+        self._new_controller_ids = []
 
         for controller_id in controller_list:
             if controller_id in self._controllers:
@@ -413,3 +624,4 @@ class DeviceFactory:
             self._controllers[controller_id] = self._create_controller(
                 controller_id, controller_position, controller_models_data
             )
+            self._new_controller_ids.append(controller_id)
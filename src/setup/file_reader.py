@@ -1,10 +1,25 @@
 import logging
 from typing import Any
 
-from pandas import DataFrame, concat, read_csv
+import pyarrow.compute as pc
+from numpy import ndarray, searchsorted, zeros
+from pandas import DataFrame, read_csv
+from pyarrow import (
+    DataType,
+    RecordBatch,
+    Table,
+    concat_tables,
+    from_numpy_dtype,
+    ipc,
+    memory_map,
+)
+from pyarrow.csv import ConvertOptions, CSVStreamingReader, ReadOptions, open_csv
+from pyarrow.ipc import RecordBatchFileReader
 from pyarrow.parquet import ParquetFile
+from pyarrow.types import is_floating, is_integer, is_large_list, is_list
 
-from src.core.common_constants import PARQUET, TIME_STEP, CSV
+from src.core.common_constants import ARROW, PARQUET, TIME_STEP, CSV
+from src.core.exceptions import UnsortedInputDataError
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +38,26 @@ class ParquetDataReader:
         self._input_file_reader: ParquetFile = ParquetFile(input_file)
         self._total_row_groups: int = self._input_file_reader.num_row_groups
 
+        # List columns are kept as arrays, only the other columns are cast.
+        arrow_schema = self._input_file_reader.schema_arrow
+        self._column_dtypes = {
+            column: dtype
+            for column, dtype in column_dtypes.items()
+            if not (
+                is_list(arrow_schema.field(column).type)
+                or is_large_list(arrow_schema.field(column).type)
+            )
+        }
+
+        # Time index of the row groups, built from the statistics of the time step column.
+        self._row_group_min_times: ndarray[float] = zeros(self._total_row_groups)
+        self._row_group_max_times: ndarray[float] = zeros(self._total_row_groups)
+        self._has_time_steps: bool = TIME_STEP in arrow_schema.names
+        self._build_time_index()
+
+        # Rows of the current row group that are not yet returned.
         self._row_group_idx: int = 0
+        self._pending_rows: Table | None = None
         self._type = PARQUET
 
     @property
@@ -36,43 +70,110 @@ class ParquetDataReader:
         """Returns the data reader type."""
         return self._type
 
+    def _build_time_index(self) -> None:
+        """
+        Build the minimum and maximum time steps of each row group. The statistics in the file
+        metadata are used, the time step column is read only for row groups without them.
+        """
+        metadata = self._input_file_reader.metadata
+        if self._total_row_groups == 0 or not self._has_time_steps:
+            return
+
+        first_row_group = metadata.row_group(0)
+        time_column_idx = next(
+            column_idx
+            for column_idx in range(first_row_group.num_columns)
+            if first_row_group.column(column_idx).path_in_schema == TIME_STEP
+        )
+
+        for row_group_idx in range(self._total_row_groups):
+            row_group = metadata.row_group(row_group_idx)
+            statistics = row_group.column(time_column_idx).statistics
+            if row_group.num_rows == 0:
+                # Empty row groups are skipped without decoding anything.
+                min_time, max_time = -1, -1
+            elif statistics is not None and statistics.has_min_max:
+                min_time, max_time = statistics.min, statistics.max
+            else:
+                logger.debug(
+                    f"No statistics for row group {row_group_idx}, reading the time steps."
+                )
+                time_steps = self._input_file_reader.read_row_group(
+                    row_group_idx, columns=[TIME_STEP]
+                ).column(TIME_STEP)
+                min_time = pc.min(time_steps).as_py()
+                max_time = pc.max(time_steps).as_py()
+
+            self._row_group_min_times[row_group_idx] = min_time
+            self._row_group_max_times[row_group_idx] = max_time
+
+    def read_all_data(self) -> DataFrame:
+        """
+        Reads all data from the input file.
+
+        Returns
+        -------
+        pd.DataFrame
+            The data dataframe.
+        """
+        data_table = self._input_file_reader.read(
+            columns=self._column_names, use_threads=True
+        )
+        logger.debug(
+            f"Returning {data_table.num_rows} rows from the file {self._input_file}."
+        )
+        return data_table.to_pandas().astype(self._column_dtypes)
+
     def read_data_until_timestamp(self, timestamp: int) -> DataFrame:
         """
-        Stream the data from the input file until the timestamp.
+        Stream the data from the input file until the timestamp. Row groups that start after
+        the timestamp are not decoded, and the rows of a row group that crosses the timestamp
+        are kept in memory until the next call. Files without time steps are returned
+        completely with the first chunk.
         """
-        data_df = DataFrame()
+        if not self._has_time_steps:
+            if self._row_group_idx == self._total_row_groups:
+                return DataFrame()
+            self._row_group_idx = self._total_row_groups
+            return self.read_all_data()
+
         logger.debug(
             f"Trying to fetch data until timestamp {timestamp} from the file {self._input_file}."
         )
+        data_tables: list[Table] = []
         while self._row_group_idx < self._total_row_groups:
-            # Read the next row group from the input file and convert it to a pandas dataframe.
-            temp_data_df = self._input_file_reader.read_row_group(
-                self._row_group_idx, columns=self._column_names, use_threads=True
-            ).to_pandas()
-
-            logger.debug(f"Got data for row group {self._row_group_idx}.")
-            logger.debug(f"Number of rows in the row group is {len(temp_data_df)}.")
-
-            if temp_data_df.empty:
-                return data_df
+            if self._row_group_min_times[self._row_group_idx] >= timestamp:
+                break
 
-            # Set the column dtypes and get the maximum timestamp in the current chunk.
-            temp_data_df = temp_data_df.astype(self._column_dtypes)
-            max_timestamp = temp_data_df[TIME_STEP].max()
+            if self._pending_rows is None:
+                # Read only the required columns of the next row group.
+                self._pending_rows = self._input_file_reader.read_row_group(
+                    self._row_group_idx, columns=self._column_names, use_threads=True
+                )
+                logger.debug(f"Got data for row group {self._row_group_idx}.")
+                logger.debug(
+                    f"Number of rows in the row group is {self._pending_rows.num_rows}."
+                )
 
+            max_timestamp = self._row_group_max_times[self._row_group_idx]
             logger.debug(f"Maximum timestamp in the streamed data is {max_timestamp}.")
 
-            # Check if the maximum timestamp is less than the timestamp.
             if max_timestamp < timestamp:
-                # Add the entire data to the dataframe.
-                data_df = concat([data_df, temp_data_df], ignore_index=True)
+                # Add the remaining rows and move to the next row group.
+                data_tables.append(self._pending_rows)
+                self._pending_rows = None
                 self._row_group_idx += 1
             else:
-                # Add the data until the timestamp to the dataframe. Do not increment the row group index.
-                temp_data_df = temp_data_df[temp_data_df[TIME_STEP] < timestamp]
-                data_df = concat([data_df, temp_data_df], ignore_index=True)
+                # Add the rows until the timestamp and keep the rest for the next call.
+                is_before = pc.less(self._pending_rows.column(TIME_STEP), timestamp)
+                data_tables.append(self._pending_rows.filter(is_before))
+                self._pending_rows = self._pending_rows.filter(pc.invert(is_before))
                 break
 
+        if len(data_tables) == 0:
+            return DataFrame()
+
+        data_df = concat_tables(data_tables).to_pandas().astype(self._column_dtypes)
         logger.debug(
             f"Returning data until timestamp {timestamp} with {len(data_df)} rows."
         )
@@ -90,6 +191,16 @@ class CSVDataReader:
         self._column_names: list[str] = column_names
         self._column_dtypes: dict[str, Any] = column_dtypes
 
+        # The incremental reader is opened on the first streamed read. Files without time
+        # steps are returned completely with the first chunk.
+        self._csv_stream: CSVStreamingReader | None = None
+        self._has_time_steps: bool = TIME_STEP in column_names
+        self._is_stream_finished: bool = False
+
+        # Rows of the current batch that are not yet returned, and the timestamp until which
+        # the rows are already returned.
+        self._pending_rows: RecordBatch | None = None
+        self._streamed_timestamp: int | None = None
         self._type = CSV
 
     @property
@@ -119,3 +230,311 @@ class CSVDataReader:
         )
         logger.debug(f"Returning {len(data_df)} rows from the file {self._input_file}.")
         return data_df
+
+    def _open_csv_stream(self) -> CSVStreamingReader:
+        """
+        Open the incremental reader of the file. The column types are set explicitly, so that
+        every batch gets the same schema irrespective of the values in the first block.
+
+        Returns
+        -------
+        CSVStreamingReader
+            The incremental CSV reader.
+        """
+        return open_csv(
+            self._input_file,
+            read_options=ReadOptions(column_names=self._column_names, skip_rows=1),
+            convert_options=ConvertOptions(
+                column_types={
+                    column: from_numpy_dtype(column_dtype)
+                    for column, column_dtype in self._column_dtypes.items()
+                }
+            ),
+        )
+
+    def _read_next_batch(self) -> RecordBatch | None:
+        """
+        Read the next batch of rows from the file.
+
+        Returns
+        -------
+        RecordBatch | None
+            The next batch, or None when the whole file is read.
+        """
+        if self._is_stream_finished:
+            return None
+
+        if self._csv_stream is None:
+            self._csv_stream = self._open_csv_stream()
+
+        try:
+            return self._csv_stream.read_next_batch()
+        except StopIteration:
+            self._is_stream_finished = True
+            self._csv_stream.close()
+            return None
+
+    def _check_batch_order(self, data_batch: RecordBatch) -> None:
+        """
+        Check that the batch has no rows before the timestamp of the earlier calls, as these
+        rows belong to chunks that are already returned.
+
+        Parameters
+        ----------
+        data_batch : RecordBatch
+            The batch read from the file.
+        """
+        if self._streamed_timestamp is None or data_batch.num_rows == 0:
+            return
+
+        min_time_step = pc.min(data_batch.column(TIME_STEP)).as_py()
+        if min_time_step < self._streamed_timestamp:
+            raise UnsortedInputDataError(self._input_file, min_time_step)
+
+    def read_data_until_timestamp(self, timestamp: int) -> DataFrame:
+        """
+        Stream the data from the input file until the timestamp. The file is read in batches,
+        and the rows of a batch that crosses the timestamp are kept until the next call. The
+        file must be sorted by time step across the batches, a batch with rows before the
+        timestamp of an earlier call raises an UnsortedInputDataError.
+        """
+        if not self._has_time_steps:
+            if self._is_stream_finished:
+                return DataFrame()
+            self._is_stream_finished = True
+            return self.read_all_data()
+
+        logger.debug(
+            f"Trying to fetch data until timestamp {timestamp} from the file {self._input_file}."
+        )
+        data_batches: list[RecordBatch] = []
+        while True:
+            if self._pending_rows is None:
+                self._pending_rows = self._read_next_batch()
+                if self._pending_rows is None:
+                    break
+                self._check_batch_order(self._pending_rows)
+
+            is_before = pc.less(self._pending_rows.column(TIME_STEP), timestamp)
+            if pc.all(is_before).as_py():
+                # Add the remaining rows and move to the next batch.
+                data_batches.append(self._pending_rows)
+                self._pending_rows = None
+            else:
+                # Add the rows until the timestamp and keep the rest for the next call.
+                data_batches.append(self._pending_rows.filter(is_before))
+                self._pending_rows = self._pending_rows.filter(pc.invert(is_before))
+                break
+
+        self._streamed_timestamp = timestamp
+        if len(data_batches) == 0:
+            return DataFrame()
+
+        data_df = (
+            Table.from_batches(data_batches).to_pandas().astype(self._column_dtypes)
+        )
+        logger.debug(
+            f"Returning data until timestamp {timestamp} with {len(data_df)} rows."
+        )
+        return data_df
+
+
+class ArrowDataReader:
+    def __init__(
+        self, input_file: str, column_names: list[str], column_dtypes: dict[str, Any]
+    ):
+        """
+        Initialize the input data streamer for Arrow IPC and Feather files. The file is memory
+        mapped, so the returned data refers to the pages of the file instead of a decoded copy
+        and processes reading the same file share the page cache.
+        """
+        self._input_file: str = input_file
+        self._column_names: list[str] = column_names
+
+        self._input_file_reader: RecordBatchFileReader = ipc.open_file(
+            memory_map(input_file)
+        )
+        self._total_batches: int = self._input_file_reader.num_record_batches
+
+        # List columns and the numeric columns stored as their declared types are kept as they
+        # are, only the others are cast.
+        arrow_schema = self._input_file_reader.schema
+        self._column_dtypes: dict[str, Any] = {
+            column: dtype
+            for column, dtype in column_dtypes.items()
+            if not (
+                is_list(arrow_schema.field(column).type)
+                or is_large_list(arrow_schema.field(column).type)
+                or self._is_stored_as(arrow_schema.field(column).type, dtype)
+            )
+        }
+
+        # Files without time steps are returned completely with the first chunk.
+        self._has_time_steps: bool = TIME_STEP in arrow_schema.names
+
+        # Time index of the record batches, and whether the batch is sorted by time step.
+        self._batch_min_times: ndarray[float] = zeros(self._total_batches)
+        self._batch_max_times: ndarray[float] = zeros(self._total_batches)
+        self._batch_is_sorted: ndarray[bool] = zeros(self._total_batches, bool)
+        self._build_time_index()
+
+        self._batch_idx: int = 0
+        self._pending_rows: RecordBatch | None = None
+        self._type = ARROW
+
+    @property
+    def input_file(self) -> str:
+        """Returns the input file."""
+        return self._input_file
+
+    @property
+    def type(self) -> str:
+        """Returns the data reader type."""
+        return self._type
+
+    @staticmethod
+    def _is_stored_as(arrow_type: DataType, column_dtype: Any) -> bool:
+        """
+        Check if a numeric column is stored as its declared type, so it does not need a cast.
+
+        Parameters
+        ----------
+        arrow_type : DataType
+            The type of the column in the file.
+        column_dtype : Any
+            The declared type of the column.
+
+        Returns
+        -------
+        bool
+            True if the column is numeric and stored as the declared type, False otherwise.
+        """
+        if not (is_integer(arrow_type) or is_floating(arrow_type)):
+            return False
+        return arrow_type == from_numpy_dtype(column_dtype)
+
+    def _build_time_index(self) -> None:
+        """
+        Build the minimum and maximum time steps of each record batch. Only the time step
+        column of the mapped file is touched.
+        """
+        if not self._has_time_steps:
+            return
+
+        for batch_idx in range(self._total_batches):
+            time_steps = (
+                self._input_file_reader.get_batch(batch_idx)
+                .column(TIME_STEP)
+                .to_numpy(zero_copy_only=False)
+            )
+            if len(time_steps) == 0:
+                # Empty batches are skipped without reading anything.
+                self._batch_min_times[batch_idx] = -1
+                self._batch_max_times[batch_idx] = -1
+                self._batch_is_sorted[batch_idx] = True
+                continue
+
+            self._batch_min_times[batch_idx] = time_steps.min()
+            self._batch_max_times[batch_idx] = time_steps.max()
+            self._batch_is_sorted[batch_idx] = bool(
+                (time_steps[1:] >= time_steps[:-1]).all()
+            )
+
+    def _to_data_frame(self, data_table: Table) -> DataFrame:
+        """
+        Convert the table to a dataframe. The blocks are not consolidated, so the numeric
+        columns without nulls keep referring to the mapped file. Only the columns that need a
+        cast are converted, casting the whole dataframe would copy every column.
+        """
+        data_df = data_table.to_pandas(split_blocks=True)
+        for column, column_dtype in self._column_dtypes.items():
+            data_df[column] = data_df[column].astype(column_dtype)
+        return data_df
+
+    def read_all_data(self) -> DataFrame:
+        """
+        Reads all data from the input file.
+
+        Returns
+        -------
+        pd.DataFrame
+            The data dataframe.
+        """
+        data_table = self._input_file_reader.read_all().select(self._column_names)
+        logger.debug(
+            f"Returning {data_table.num_rows} rows from the file {self._input_file}."
+        )
+        return self._to_data_frame(data_table)
+
+    def _split_pending_rows(self, timestamp: int) -> RecordBatch:
+        """
+        Split the pending rows at the timestamp and keep the later rows pending. Sorted batches
+        are split with zero-copy slices, the others are filtered.
+
+        Parameters
+        ----------
+        timestamp : int
+            The timestamp.
+
+        Returns
+        -------
+        RecordBatch
+            The rows before the timestamp.
+        """
+        time_steps = self._pending_rows.column(TIME_STEP)
+        if self._batch_is_sorted[self._batch_idx]:
+            split_idx = int(
+                searchsorted(time_steps.to_numpy(zero_copy_only=False), timestamp)
+            )
+            rows_before = self._pending_rows.slice(0, split_idx)
+            self._pending_rows = self._pending_rows.slice(split_idx)
+            return rows_before
+
+        is_before = pc.less(time_steps, timestamp)
+        rows_before = self._pending_rows.filter(is_before)
+        self._pending_rows = self._pending_rows.filter(pc.invert(is_before))
+        return rows_before
+
+    def read_data_until_timestamp(self, timestamp: int) -> DataFrame:
+        """
+        Stream the data from the input file until the timestamp. Record batches that start
+        after the timestamp are not touched, and the rows of a record batch that crosses the
+        timestamp are kept until the next call.
+        """
+        if not self._has_time_steps:
+            if self._batch_idx == self._total_batches:
+                return DataFrame()
+            self._batch_idx = self._total_batches
+            return self.read_all_data()
+
+        logger.debug(
+            f"Trying to fetch data until timestamp {timestamp} from the file {self._input_file}."
+        )
+        data_batches: list[RecordBatch] = []
+        while self._batch_idx < self._total_batches:
+            if self._batch_min_times[self._batch_idx] >= timestamp:
+                break
+
+            if self._pending_rows is None:
+                self._pending_rows = self._input_file_reader.get_batch(
+                    self._batch_idx
+                ).select(self._column_names)
+
+            if self._batch_max_times[self._batch_idx] < timestamp:
+                # Add the remaining rows and move to the next record batch.
+                data_batches.append(self._pending_rows)
+                self._pending_rows = None
+                self._batch_idx += 1
+            else:
+                # Add the rows until the timestamp and keep the rest for the next call.
+                data_batches.append(self._split_pending_rows(timestamp))
+                break
+
+        if len(data_batches) == 0:
+            return DataFrame()
+
+        data_df = self._to_data_frame(Table.from_batches(data_batches))
+        logger.debug(
+            f"Returning data until timestamp {timestamp} with {len(data_df)} rows."
+        )
+        return data_df
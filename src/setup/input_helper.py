@@ -8,7 +8,7 @@ import src.core.common_constants as cc
 import src.core.constants as constants
 from src.core.exceptions import *
 from src.core.logger_config import LoggerConfig
-from src.setup.file_reader import CSVDataReader, ParquetDataReader
+from src.setup.file_reader import ArrowDataReader, CSVDataReader, ParquetDataReader
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +27,9 @@ class SimulationInputHelper:
         self.config_data: dict = {}
         self.project_path: str = dirname(config_file)
 
-        self.file_readers: dict[str, CSVDataReader | ParquetDataReader] = {}
+        self.file_readers: dict[
+            str, CSVDataReader | ParquetDataReader | ArrowDataReader
+        ] = {}
 
         self.vehicle_models_data: dict = {}
         self.base_station_models_data: dict = {}
@@ -148,14 +150,6 @@ class SimulationInputHelper:
             cc.VEHICLE_ACTIVATIONS_FILE,
         )
 
-        logger.debug("Creating file reader for v2v links file.")
-        self._create_new_file_reader(
-            input_files[cc.V2V_LINKS_FILE],
-            cc.V2V_LINKS_COLUMN_NAMES,
-            cc.V2V_LINKS_COLUMN_DTYPES,
-            cc.V2V_LINKS_FILE,
-        )
-
         logger.debug("Creating file reader for base stations file.")
         self._create_new_file_reader(
             input_files[cc.BASE_STATIONS_FILE],
@@ -164,14 +158,6 @@ class SimulationInputHelper:
             cc.BASE_STATIONS_FILE,
         )
 
-        logger.debug("Creating file reader for v2b links file.")
-        self._create_new_file_reader(
-            input_files[cc.V2B_LINKS_FILE],
-            cc.V2B_LINKS_COLUMN_NAMES,
-            cc.V2B_LINKS_COLUMN_DTYPES,
-            cc.V2B_LINKS_FILE,
-        )
-
         logger.debug("Creating file reader for controllers file.")
         self._create_new_file_reader(
             input_files[cc.CONTROLLERS_FILE],
@@ -200,6 +186,28 @@ class SimulationInputHelper:
         else:
             self._create_none_file_reader(cc.BASE_STATION_ACTIVATIONS_FILE)
 
+        if input_files[cc.V2V_LINKS_FILE] != "":
+            logger.debug("Creating file reader for v2v links file.")
+            self._create_new_file_reader(
+                input_files[cc.V2V_LINKS_FILE],
+                cc.V2V_LINKS_COLUMN_NAMES,
+                cc.V2V_LINKS_COLUMN_DTYPES,
+                cc.V2V_LINKS_FILE,
+            )
+        else:
+            self._create_none_file_reader(cc.V2V_LINKS_FILE)
+
+        if input_files[cc.V2B_LINKS_FILE] != "":
+            logger.debug("Creating file reader for v2b links file.")
+            self._create_new_file_reader(
+                input_files[cc.V2B_LINKS_FILE],
+                cc.V2B_LINKS_COLUMN_NAMES,
+                cc.V2B_LINKS_COLUMN_DTYPES,
+                cc.V2B_LINKS_FILE,
+            )
+        else:
+            self._create_none_file_reader(cc.V2B_LINKS_FILE)
+
         if input_files[cc.CONTROLLER_ACTIVATIONS_FILE] != "":
             logger.debug("Creating file reader for controller activations file.")
             self._create_new_file_reader(
@@ -247,6 +255,10 @@ class SimulationInputHelper:
             self.file_readers[file_key] = CSVDataReader(
                 file_path, column_names, column_dtypes
             )
+        elif file_type in cc.ARROW_FILE_EXTENSIONS:
+            self.file_readers[file_key] = ArrowDataReader(
+                file_path, column_names, column_dtypes
+            )
         else:
             raise UnsupportedInputFormatError(file_type)
 
@@ -0,0 +1,88 @@
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from pandas import DataFrame, concat
+
+logger = logging.getLogger(__name__)
+
+
+class InputDataPrefetcher:
+    def __init__(self, read_input_chunk: Callable[[int], dict[str, DataFrame]]):
+        """
+        Initialize the input data prefetcher. The next chunk of the input data is read in a
+        worker thread while the current chunk is being simulated.
+
+        Parameters
+        ----------
+        read_input_chunk : Callable[[int], dict[str, DataFrame]]
+            Function that reads the input data of all the files until the given timestamp.
+            The file readers must only be used by the prefetcher once it is started.
+        """
+        self._read_input_chunk: Callable[[int], dict[str, DataFrame]] = read_input_chunk
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="input_prefetcher"
+        )
+        self._pending_chunk: Future | None = None
+        self._pending_timestamp: int = -1
+
+    def prefetch(self, timestamp: int) -> None:
+        """
+        Start reading the input data until the timestamp in the background.
+
+        Parameters
+        ----------
+        timestamp : int
+            The timestamp until which the data is read.
+        """
+        if self._pending_chunk is not None:
+            logger.warning(
+                f"Prefetch until {self._pending_timestamp} is not consumed yet."
+            )
+            return
+
+        logger.debug(f"Prefetching input data until timestamp {timestamp}.")
+        self._pending_timestamp = timestamp
+        self._pending_chunk = self._executor.submit(self._read_input_chunk, timestamp)
+
+    def get_chunk(self, timestamp: int) -> dict[str, DataFrame]:
+        """
+        Get the input data until the timestamp. The prefetched chunk is returned as it is when
+        it covers the timestamp, the missing part is read in the calling thread otherwise.
+
+        Parameters
+        ----------
+        timestamp : int
+            The timestamp until which the data is needed.
+
+        Returns
+        -------
+        dict[str, DataFrame]
+            The input data of each file.
+        """
+        if self._pending_chunk is None:
+            return self._read_input_chunk(timestamp)
+
+        # Wait for the worker thread, this re-raises any error from the reader.
+        input_chunk = self._pending_chunk.result()
+        pending_timestamp = self._pending_timestamp
+        self._pending_chunk = None
+
+        if pending_timestamp < timestamp:
+            logger.debug(
+                f"Prefetched data until {pending_timestamp}, reading until {timestamp}."
+            )
+            remaining_chunk = self._read_input_chunk(timestamp)
+            for file_key, data_df in remaining_chunk.items():
+                input_chunk[file_key] = concat(
+                    [input_chunk[file_key], data_df], ignore_index=True
+                )
+
+        return input_chunk
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker thread. Any pending read is completed before returning.
+        """
+        self._executor.shutdown(wait=True)
+        self._pending_chunk = None
@@ -0,0 +1,287 @@
+import logging
+from os import makedirs
+from os.path import dirname, isabs, join, relpath
+
+import toml
+from numpy import argsort, flatnonzero, float32, int32, int64, ndarray, r_
+from pandas import DataFrame
+from pyarrow import ListArray, Table, array, ipc
+
+import src.core.common_constants as cc
+import src.core.constants as constants
+from src.core.link_table import link_column_to_csr
+from src.setup.file_reader import ArrowDataReader, CSVDataReader, ParquetDataReader
+from src.setup.input_helper import SimulationInputHelper
+
+logger = logging.getLogger(__name__)
+
+
+class ScenarioCompiler:
+    def __init__(self, config_file: str, bundle_dir: str = ""):
+        """
+        Initialize the scenario compiler. The input files of the scenario are converted once to
+        a bundle of Arrow IPC files that the simulation reads with memory mapping.
+
+        Parameters
+        ----------
+        config_file : str
+            The path to the config file of the scenario.
+        bundle_dir : str, optional
+            The directory of the bundle, by default a directory next to the config file.
+        """
+        self._config_file: str = config_file
+        self._bundle_dir: str = (
+            bundle_dir
+            if bundle_dir != ""
+            else join(dirname(config_file), constants.DEFAULT_BUNDLE_DIR)
+        )
+
+        self._input_helper: SimulationInputHelper = SimulationInputHelper(config_file)
+        self._data_stream_interval: int = -1
+
+    @property
+    def bundle_dir(self) -> str:
+        """Get the bundle directory."""
+        return self._bundle_dir
+
+    def compile(self) -> str:
+        """
+        Compile the scenario into the bundle.
+
+        Returns
+        -------
+        str
+            The path to the config file of the bundle.
+        """
+        self._input_helper.read_config_file()
+        self._input_helper.create_loggers()
+        self._input_helper.read_simulation_and_model_settings()
+        self._input_helper.create_file_readers()
+
+        self._data_stream_interval = self._input_helper.simulation_data[
+            constants.DATA_STREAMING_INTERVAL
+        ]
+
+        logger.info(f"Compiling the scenario into {self._bundle_dir}.")
+        makedirs(self._bundle_dir, exist_ok=True)
+
+        compiled_files: dict[str, str] = {}
+        for file_key, data_reader in self._input_helper.file_readers.items():
+            if data_reader is None:
+                continue
+
+            logger.info(f"Compiling the {file_key} file.")
+            compiled_files[file_key] = self._compile_file(file_key, data_reader)
+
+        return self._write_bundle_config(compiled_files)
+
+    def _compile_file(
+        self,
+        file_key: str,
+        data_reader: CSVDataReader | ParquetDataReader | ArrowDataReader,
+    ) -> str:
+        """
+        Convert an input file to an Arrow IPC file in the bundle.
+
+        Parameters
+        ----------
+        file_key : str
+            The file key.
+        data_reader : CSVDataReader | ParquetDataReader | ArrowDataReader
+            The reader of the input file.
+
+        Returns
+        -------
+        str
+            The name of the file in the bundle.
+        """
+        data_df = data_reader.read_all_data()
+
+        match file_key:
+            case cc.VEHICLE_TRACE_FILE:
+                data_table, batch_offsets = self._compile_vehicle_traces(data_df)
+            case cc.V2V_LINKS_FILE:
+                data_table, batch_offsets = self._compile_links(data_df, cc.NEIGHBOURS)
+            case cc.V2B_LINKS_FILE:
+                data_table, batch_offsets = self._compile_links(
+                    data_df, cc.BASE_STATIONS
+                )
+            case (
+                cc.VEHICLE_ACTIVATIONS_FILE
+                | cc.BASE_STATION_ACTIVATIONS_FILE
+                | cc.CONTROLLER_ACTIVATIONS_FILE
+            ):
+                data_table = self._compile_activations(data_df)
+                batch_offsets = r_[0, data_table.num_rows]
+            case _:
+                data_table = Table.from_pandas(data_df, preserve_index=False)
+                batch_offsets = r_[0, data_table.num_rows]
+
+        file_name = f"{file_key}.{cc.ARROW}"
+        self._write_bundle_file(
+            join(self._bundle_dir, file_name), data_table, batch_offsets
+        )
+        return file_name
+
+    def _stream_batch_offsets(self, time_steps: ndarray) -> ndarray[int]:
+        """
+        Get the row offsets of the record batches, one batch per data streaming interval.
+
+        Parameters
+        ----------
+        time_steps : ndarray
+            The sorted time steps of the rows.
+
+        Returns
+        -------
+        ndarray[int]
+            The offsets of the batches, including the end of the last batch.
+        """
+        intervals = time_steps // self._data_stream_interval
+        return r_[0, flatnonzero(intervals[1:] != intervals[:-1]) + 1, len(intervals)]
+
+    def _compile_vehicle_traces(self, trace_df: DataFrame) -> tuple[Table, ndarray]:
+        """
+        Group the rows of each vehicle within each streaming interval, so that they are
+        contiguous in every streamed chunk. The vehicles keep the order in which they first
+        appear, so the devices are created in the same order as from the original traces.
+
+        Parameters
+        ----------
+        trace_df : DataFrame
+            The vehicle trace data.
+
+        Returns
+        -------
+        tuple[Table, ndarray]
+            The trace table and the offsets of the record batches.
+        """
+        trace_df = trace_df.sort_values(cc.TIME_STEP, kind="stable")
+        intervals = trace_df[cc.TIME_STEP].to_numpy() // self._data_stream_interval
+        vehicle_groups = trace_df.groupby(
+            [intervals, trace_df[cc.VEHICLE_ID].to_numpy()], sort=False
+        ).ngroup()
+        trace_df = trace_df.iloc[argsort(vehicle_groups.to_numpy(), kind="stable")]
+
+        batch_offsets = self._stream_batch_offsets(trace_df[cc.TIME_STEP].to_numpy())
+        return Table.from_pandas(trace_df, preserve_index=False), batch_offsets
+
+    def _compile_links(
+        self, links_df: DataFrame, target_column: str
+    ) -> tuple[Table, ndarray]:
+        """
+        Sort the links by time step and store the link columns as list columns.
+
+        Parameters
+        ----------
+        links_df : DataFrame
+            The links data.
+        target_column : str
+            The column with the ids of the linked devices.
+
+        Returns
+        -------
+        tuple[Table, ndarray]
+            The links table and the offsets of the record batches.
+        """
+        links_df = links_df.sort_values([cc.TIME_STEP, cc.VEHICLE_ID], kind="stable")
+
+        target_offsets, targets = link_column_to_csr(links_df[target_column], int32)
+        distance_offsets, distances = link_column_to_csr(
+            links_df[cc.DISTANCES], float32
+        )
+
+        links_table = Table.from_pydict(
+            {
+                cc.VEHICLE_ID: array(links_df[cc.VEHICLE_ID].to_numpy()),
+                cc.TIME_STEP: array(links_df[cc.TIME_STEP].to_numpy()),
+                target_column: ListArray.from_arrays(
+                    target_offsets.astype(int32), targets
+                ),
+                cc.DISTANCES: ListArray.from_arrays(
+                    distance_offsets.astype(int32), distances
+                ),
+            }
+        )
+        batch_offsets = self._stream_batch_offsets(links_df[cc.TIME_STEP].to_numpy())
+        return links_table, batch_offsets
+
+    @staticmethod
+    def _compile_activations(activations_df: DataFrame) -> Table:
+        """
+        Convert the activation times to integers and group the intervals by device. The order
+        of the intervals of each device is kept.
+
+        Parameters
+        ----------
+        activations_df : DataFrame
+            The activation data.
+
+        Returns
+        -------
+        Table
+            The activation table.
+        """
+        activations_df = activations_df.astype(
+            {cc.START_TIME: int64, cc.END_TIME: int64}
+        ).sort_values(cc.VEHICLE_ID, kind="stable")
+        return Table.from_pandas(activations_df, preserve_index=False)
+
+    @staticmethod
+    def _write_bundle_file(
+        file_path: str, data_table: Table, batch_offsets: ndarray[int]
+    ) -> None:
+        """
+        Write the table as an uncompressed Arrow IPC file, so that it can be memory mapped.
+
+        Parameters
+        ----------
+        file_path : str
+            The path to the file.
+        data_table : Table
+            The data to write.
+        batch_offsets : ndarray[int]
+            The offsets of the record batches.
+        """
+        data_table = data_table.combine_chunks()
+        with ipc.new_file(file_path, data_table.schema) as writer:
+            for start, stop in zip(batch_offsets[:-1], batch_offsets[1:]):
+                writer.write_table(data_table.slice(start, stop - start))
+
+        logger.debug(
+            f"Wrote {data_table.num_rows} rows in {len(batch_offsets) - 1} batches to {file_path}."
+        )
+
+    def _write_bundle_config(self, compiled_files: dict[str, str]) -> str:
+        """
+        Write the config file of the bundle. The input files point to the compiled files, and
+        the relative output and log locations point to the same place as in the scenario.
+
+        Parameters
+        ----------
+        compiled_files : dict[str, str]
+            The name of the compiled file of each file key.
+
+        Returns
+        -------
+        str
+            The path to the config file of the bundle.
+        """
+        config_data = self._input_helper.config_data
+        for file_key, file_name in compiled_files.items():
+            config_data[constants.INPUT_FILES][file_key] = file_name
+
+        output_data = config_data[constants.OUTPUT_SETTINGS]
+        for location_key in [constants.OUTPUT_LOCATION, constants.LOG_LOCATION]:
+            if location_key in output_data and not isabs(output_data[location_key]):
+                output_data[location_key] = relpath(
+                    join(self._input_helper.project_path, output_data[location_key]),
+                    self._bundle_dir,
+                )
+
+        bundle_config_file = join(self._bundle_dir, constants.BUNDLE_CONFIG_FILE)
+        with open(bundle_config_file, "w") as f:
+            toml.dump(config_data, f)
+
+        logger.info(f"Bundle config file is written to {bundle_config_file}.")
+        return bundle_config_file
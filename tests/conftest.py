@@ -0,0 +1,229 @@
+from pathlib import Path
+
+import pytest
+from numpy import arange, argsort, hypot, minimum
+from numpy.random import default_rng
+from pandas import DataFrame
+
+import src.core.common_constants as cc
+
+VEHICLE_COUNT = 12
+BASE_STATION_COUNT = 3
+CONTROLLER_COUNT = 2
+END_TIME = 600
+TIME_STEP = 100
+SIDELINK_RANGE = 400.0
+
+SCENARIO_CONFIG = """
+[input_files]
+vehicle_traces = "vehicle_traces.parquet"
+vehicle_activations = "vehicle_activations.csv"
+v2v_links = "v2v_links.parquet"
+base_stations = "base_stations.csv"
+base_station_activations = ""
+v2b_links = "v2b_links.parquet"
+controllers = "controllers.csv"
+controller_activations = ""
+b2c_links = "b2c_links.csv"
+
+[simulation_settings]
+start_time = 0
+end_time = {end_time}
+time_step = {time_step}
+data_streaming_interval = 300
+vehicle_engine = "{vehicle_engine}"
+
+[output_settings]
+output_type = "csv"
+output_location = "{output_dir}"
+logging_level = "warning"
+log_overwrite = "yes"
+
+[space]
+x_min = 0.0
+x_max = 1000.0
+y_min = 0.0
+y_max = 1000.0
+
+[edge_orchestrator.base_station_finder]
+name = "nearest"
+[edge_orchestrator.neighbour_finder]
+name = "trace"
+
+[cloud_orchestrator]
+name = "simple"
+
+[vehicles.car]
+ratio = 0.6
+computing_hardware = {{cpu = 1, gpu = 1, memory = 1, battery = 1, storage = 1}}
+networking_hardware = {{capacity = 1000000.0, max_connections = 10}}
+mobility = {{name = "trace"}}
+simplifier = {{name = "simple", retention_factor = 0.5, compression_factor = 0.8}}
+collector = {{name = "simple"}}
+[vehicles.car.composer]
+name = "simple"
+data_source = [
+  {{data_type = "image", data_size = 2.0, data_counts = 0.01, priority = 1, side_link = "yes"}},
+  {{data_type = "lidar", data_size = 5.0, data_counts = 0.02, priority = 2, side_link = "no"}},
+]
+
+[vehicles.bus]
+ratio = 0.4
+computing_hardware = {{cpu = 1, gpu = 1, memory = 1, battery = 1, storage = 1}}
+networking_hardware = {{capacity = 1000000.0, max_connections = 10}}
+mobility = {{name = "trace"}}
+simplifier = {{name = "simple", retention_factor = 0.5, compression_factor = 0.5}}
+collector = {{name = "simple"}}
+[vehicles.bus.composer]
+name = "simple"
+data_source = [
+  {{data_type = "image", data_size = 3.0, data_counts = 0.01, priority = 1, side_link = "yes"}},
+  {{data_type = "radar", data_size = 1.0, data_counts = 0.05, priority = 3, side_link = "yes"}},
+]
+
+[base_stations]
+computing_hardware = {{cpu = 1, gpu = 1, memory = 1, battery = 1, storage = 1}}
+mobility = {{name = "static"}}
+composer = {{name = "simple"}}
+simplifier = {{name = "simple"}}
+[base_stations.networking_hardware]
+wired = {{capacity = 1e9, max_connections = 10}}
+wireless = {{capacity = 1e9, max_connections = 10}}
+
+[controllers]
+computing_hardware = {{cpu = 1, gpu = 1, memory = 1, battery = 1, storage = 1}}
+networking_hardware = {{capacity = 1e9, max_connections = 10}}
+mobility = {{name = "static"}}
+composer = {{name = "simple"}}
+collector = {{name = "simple"}}
+"""
+
+
+def _write_scenario_data(scenario_dir: Path) -> None:
+    """
+    Write the input files of a small scenario with random vehicle positions.
+
+    Parameters
+    ----------
+    scenario_dir : Path
+        The directory to write the input files to.
+    """
+    rng = default_rng(0)
+    time_steps = arange(0, END_TIME + TIME_STEP, TIME_STEP)
+    vehicle_ids = arange(VEHICLE_COUNT)
+    start_times = rng.integers(0, 3, VEHICLE_COUNT) * TIME_STEP
+    end_times = minimum(
+        start_times + rng.integers(2, 5, VEHICLE_COUNT) * TIME_STEP, END_TIME
+    )
+
+    base_stations = DataFrame(
+        {
+            cc.BASE_STATION_ID: 1000 + arange(BASE_STATION_COUNT),
+            cc.X: rng.uniform(0, 1000, BASE_STATION_COUNT),
+            cc.Y: rng.uniform(0, 1000, BASE_STATION_COUNT),
+        }
+    )
+    controllers = DataFrame(
+        {
+            cc.CONTROLLER_ID: 2000 + arange(CONTROLLER_COUNT),
+            cc.X: rng.uniform(0, 1000, CONTROLLER_COUNT),
+            cc.Y: rng.uniform(0, 1000, CONTROLLER_COUNT),
+        }
+    )
+    b2c_links = DataFrame(
+        {
+            cc.LINK_ID: arange(BASE_STATION_COUNT),
+            cc.BASE_STATION_ID: base_stations[cc.BASE_STATION_ID],
+            cc.CONTROLLER_ID: 2000 + arange(BASE_STATION_COUNT) % CONTROLLER_COUNT,
+        }
+    )
+
+    trace_rows, v2b_rows, v2v_rows = [], [], []
+    for time_step in time_steps:
+        locations = rng.uniform(0, 1000, (VEHICLE_COUNT, 2))
+        is_active = (start_times <= time_step) & (time_step <= end_times)
+        for vehicle_id in vehicle_ids:
+            x, y = locations[vehicle_id]
+            trace_rows.append((float(time_step), vehicle_id, x, y))
+
+            distances = hypot(base_stations[cc.X] - x, base_stations[cc.Y] - y)
+            order = argsort(distances.to_numpy())
+            v2b_rows.append(
+                (
+                    vehicle_id,
+                    int(time_step),
+                    " ".join(str(1000 + idx) for idx in order),
+                    " ".join(f"{distances[idx]:.2f}" for idx in order),
+                )
+            )
+
+            if not is_active[vehicle_id]:
+                continue
+            neighbour_distances = hypot(locations[:, 0] - x, locations[:, 1] - y).round(
+                2
+            )
+            neighbours = [
+                neighbour_id
+                for neighbour_id in vehicle_ids
+                if neighbour_id != vehicle_id
+                and is_active[neighbour_id]
+                and neighbour_distances[neighbour_id] < SIDELINK_RANGE
+            ]
+            if len(neighbours) > 0:
+                v2v_rows.append(
+                    (
+                        vehicle_id,
+                        int(time_step),
+                        " ".join(map(str, neighbours)),
+                        " ".join(
+                            f"{neighbour_distances[idx]:.2f}" for idx in neighbours
+                        ),
+                    )
+                )
+
+    DataFrame(trace_rows, columns=cc.VEHICLE_TRACE_COLUMN_NAMES).to_parquet(
+        scenario_dir / "vehicle_traces.parquet", row_group_size=20, index=False
+    )
+    DataFrame(v2b_rows, columns=cc.V2B_LINKS_COLUMN_NAMES).to_parquet(
+        scenario_dir / "v2b_links.parquet", row_group_size=20, index=False
+    )
+    DataFrame(v2v_rows, columns=cc.V2V_LINKS_COLUMN_NAMES).to_parquet(
+        scenario_dir / "v2v_links.parquet", row_group_size=20, index=False
+    )
+    DataFrame(
+        {
+            cc.VEHICLE_ID: vehicle_ids,
+            cc.START_TIME: start_times.astype(str),
+            cc.END_TIME: end_times.astype(str),
+        }
+    ).to_csv(scenario_dir / "vehicle_activations.csv", index=False)
+    base_stations.to_csv(scenario_dir / "base_stations.csv", index=False)
+    controllers.to_csv(scenario_dir / "controllers.csv", index=False)
+    b2c_links.to_csv(scenario_dir / "b2c_links.csv", index=False)
+
+
+@pytest.fixture(scope="session")
+def scenario_dir(tmp_path_factory) -> Path:
+    """Directory with the input files of a small scenario."""
+    scenario_dir = tmp_path_factory.mktemp("scenario")
+    _write_scenario_data(scenario_dir)
+    return scenario_dir
+
+
+@pytest.fixture(scope="session")
+def scenario_config(scenario_dir):
+    """Factory of the config files of the small scenario for a vehicle engine."""
+
+    def write_config(vehicle_engine: str) -> str:
+        config_file = scenario_dir / f"config_{vehicle_engine}.toml"
+        config_file.write_text(
+            SCENARIO_CONFIG.format(
+                end_time=END_TIME,
+                time_step=TIME_STEP,
+                vehicle_engine=vehicle_engine,
+                output_dir=(scenario_dir / f"output_{vehicle_engine}").as_posix(),
+            )
+        )
+        return str(config_file)
+
+    return write_config
@@ -0,0 +1,64 @@
+import numpy as np
+
+import src.core.constants as constants
+from src.core.activation_calendar import ActivationCalendar, EventQueue
+
+
+def test_event_queue_pops_events_in_time_order():
+    event_queue = EventQueue()
+    event_queue.add_events(np.array([20, 0, 10, 0]), np.array([4, 1, 3, 2]))
+
+    assert len(event_queue) == 4
+    assert event_queue.pop_events(0).tolist() == [1, 2]
+    assert event_queue.pop_events(10).tolist() == [3]
+    assert len(event_queue.pop_events(15)) == 0
+    assert event_queue.pop_events(20).tolist() == [4]
+    assert len(event_queue) == 0
+
+
+def test_event_queue_pops_past_due_events():
+    event_queue = EventQueue()
+    event_queue.add_events(np.array([5, 10, 30]), np.array([1, 2, 3]))
+
+    # The event at 5 falls between the time steps and is popped with the next one.
+    assert event_queue.pop_events(10).tolist() == [1, 2]
+    assert event_queue.pop_events(40).tolist() == [3]
+
+
+def test_event_queue_merges_added_events_with_pending_events():
+    event_queue = EventQueue()
+    event_queue.add_events(np.array([0, 20]), np.array([1, 2]))
+    assert event_queue.pop_events(0).tolist() == [1]
+
+    event_queue.add_events(np.array([10, 20]), np.array([3, 4]))
+
+    assert len(event_queue) == 3
+    assert event_queue.pop_events(10).tolist() == [3]
+    assert event_queue.pop_events(20).tolist() == [2, 4]
+
+
+def test_activation_calendar_keeps_device_types_apart():
+    activation_calendar = ActivationCalendar(
+        [constants.VEHICLES, constants.BASE_STATIONS]
+    )
+    activation_calendar.add_devices(
+        constants.VEHICLES,
+        [1, 2],
+        [np.array([0, 50]), np.array([10])],
+        [np.array([20, 60]), np.array([30])],
+    )
+    activation_calendar.add_devices(
+        constants.BASE_STATIONS, [100], [np.array([0])], [np.array([60])]
+    )
+
+    assert activation_calendar.pop_activations(constants.VEHICLES, 0).tolist() == [1]
+    assert activation_calendar.pop_activations(constants.BASE_STATIONS, 0).tolist() == [
+        100
+    ]
+    assert activation_calendar.pop_activations(constants.VEHICLES, 10).tolist() == [2]
+    assert activation_calendar.pop_deactivations(constants.VEHICLES, 20).tolist() == [1]
+    assert activation_calendar.pop_deactivations(constants.VEHICLES, 30).tolist() == [2]
+    assert activation_calendar.pop_activations(constants.VEHICLES, 50).tolist() == [1]
+    assert activation_calendar.pop_deactivations(
+        constants.BASE_STATIONS, 60
+    ).tolist() == [100]
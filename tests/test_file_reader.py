@@ -0,0 +1,129 @@
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pytest
+from pandas import DataFrame, concat
+from pyarrow import ipc
+
+import src.core.common_constants as cc
+from src.setup.file_reader import ArrowDataReader, CSVDataReader, ParquetDataReader
+
+# Rows of each row group or record batch, so that the time steps cross the batches.
+BATCH_SIZE = 4
+
+
+def _write_parquet(data_df: DataFrame, file_path: Path) -> None:
+    data_df.to_parquet(file_path, row_group_size=BATCH_SIZE, index=False)
+
+
+def _write_arrow(data_df: DataFrame, file_path: Path) -> None:
+    data_table = pa.Table.from_pandas(data_df, preserve_index=False)
+    with ipc.new_file(file_path, data_table.schema) as writer:
+        for data_batch in data_table.to_batches(max_chunksize=BATCH_SIZE):
+            writer.write_batch(data_batch)
+
+
+def _write_csv(data_df: DataFrame, file_path: Path) -> None:
+    data_df.to_csv(file_path, index=False)
+
+
+READERS = {
+    "parquet": (ParquetDataReader, _write_parquet),
+    "arrow": (ArrowDataReader, _write_arrow),
+    "csv": (CSVDataReader, _write_csv),
+}
+
+
+@pytest.fixture
+def trace_data() -> DataFrame:
+    """Trace of three vehicles over ten time steps, sorted by the time step."""
+    time_steps = np.repeat(np.arange(10), 3)
+    return DataFrame(
+        {
+            cc.TIME_STEP: time_steps.astype(float),
+            cc.VEHICLE_ID: np.tile(np.arange(3), 10),
+            cc.X: np.arange(30, dtype=float),
+            cc.Y: -np.arange(30, dtype=float),
+        }
+    )
+
+
+def _create_reader(reader_type: str, data_df: DataFrame, tmp_path: Path, columns):
+    reader_class, write_file = READERS[reader_type]
+    file_path = tmp_path / f"data.{reader_type}"
+    write_file(data_df, file_path)
+    column_names, column_dtypes = columns
+    return reader_class(str(file_path), column_names, column_dtypes)
+
+
+@pytest.mark.parametrize("reader_type", READERS.keys())
+def test_read_data_until_timestamp_splits_at_boundaries(
+    reader_type, trace_data, tmp_path
+):
+    data_reader = _create_reader(
+        reader_type,
+        trace_data,
+        tmp_path,
+        (cc.VEHICLE_TRACE_COLUMN_NAMES, cc.VEHICLE_TRACE_COLUMN_DTYPES),
+    )
+
+    chunks = []
+    previous_timestamp = 0
+    for timestamp in [3, 3, 7, 100]:
+        chunk = data_reader.read_data_until_timestamp(timestamp)
+        if not chunk.empty:
+            assert (chunk[cc.TIME_STEP] >= previous_timestamp).all()
+            assert (chunk[cc.TIME_STEP] < timestamp).all()
+            chunks.append(chunk)
+        previous_timestamp = timestamp
+
+    assert [len(chunk) for chunk in chunks] == [9, 12, 9]
+    assert data_reader.read_data_until_timestamp(200).empty
+
+    streamed_data = concat(chunks, ignore_index=True)[trace_data.columns]
+    assert streamed_data.equals(trace_data)
+    assert streamed_data[cc.VEHICLE_ID].dtype == np.int64
+    assert streamed_data[cc.TIME_STEP].dtype == np.float64
+
+
+@pytest.mark.parametrize("reader_type", READERS.keys())
+def test_file_without_time_steps_is_read_once(reader_type, tmp_path):
+    base_stations = DataFrame(
+        {cc.BASE_STATION_ID: [10, 11], cc.X: [1.0, 2.0], cc.Y: [3.0, 4.0]}
+    )
+    data_reader = _create_reader(
+        reader_type,
+        base_stations,
+        tmp_path,
+        (cc.BASE_STATION_COLUMN_NAMES, cc.BASE_STATION_COLUMN_DTYPES),
+    )
+
+    assert data_reader.read_data_until_timestamp(0).equals(base_stations)
+    assert data_reader.read_data_until_timestamp(10).empty
+
+
+def test_arrow_reader_casts_columns_not_stored_as_declared_types(tmp_path):
+    v2v_links = pa.table(
+        {
+            cc.VEHICLE_ID: pa.array([1.0, 2.0, 1.0]),
+            cc.TIME_STEP: pa.array([0, 0, 1], type=pa.int32()),
+            cc.NEIGHBOURS: pa.array([[2], [1], []], type=pa.large_list(pa.int64())),
+            cc.DISTANCES: pa.array(
+                [[1.5], [1.5], []], type=pa.large_list(pa.float64())
+            ),
+        }
+    )
+    file_path = tmp_path / "v2v_links.arrow"
+    with ipc.new_file(file_path, v2v_links.schema) as writer:
+        writer.write_table(v2v_links)
+
+    data_reader = ArrowDataReader(
+        str(file_path), cc.V2V_LINKS_COLUMN_NAMES, cc.V2V_LINKS_COLUMN_DTYPES
+    )
+    links_df = data_reader.read_data_until_timestamp(1)
+
+    assert links_df[cc.VEHICLE_ID].dtype == np.int64
+    assert links_df[cc.TIME_STEP].dtype == np.int64
+    assert links_df[cc.VEHICLE_ID].tolist() == [1, 2]
+    assert [list(neighbours) for neighbours in links_df[cc.NEIGHBOURS]] == [[2], [1]]
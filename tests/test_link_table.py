@@ -0,0 +1,90 @@
+import numpy as np
+from pandas import DataFrame, Series
+
+import src.core.common_constants as cc
+from src.core.link_table import LinkTable, expand_csr_rows, link_column_to_csr
+
+
+def test_link_column_to_csr_splits_strings():
+    offsets, values = link_column_to_csr(Series(["1 2", "", "3"]), np.int32)
+
+    assert offsets.tolist() == [0, 2, 2, 3]
+    assert values.tolist() == [1, 2, 3]
+    assert values.dtype == np.int32
+
+
+def test_link_column_to_csr_flattens_lists():
+    offsets, values = link_column_to_csr(
+        Series([np.array([0.5, 1.5]), None, [2.5]]), np.float32
+    )
+
+    assert offsets.tolist() == [0, 2, 2, 3]
+    assert values.tolist() == [0.5, 1.5, 2.5]
+    assert values.dtype == np.float32
+
+
+def test_link_column_to_csr_of_empty_column():
+    offsets, values = link_column_to_csr(Series([], dtype=object), np.int32)
+
+    assert offsets.tolist() == [0]
+    assert len(values) == 0
+
+
+def test_expand_csr_rows_skips_negative_rows():
+    offsets = np.array([0, 2, 2, 5])
+
+    positions, value_indices = expand_csr_rows(offsets, np.array([2, -1, 0, 1]))
+
+    assert positions.tolist() == [0, 0, 0, 2, 2]
+    assert value_indices.tolist() == [2, 3, 4, 0, 1]
+
+
+def _create_link_table() -> LinkTable:
+    # The rows are not sorted, the table sorts them by time step and vehicle id.
+    links_df = DataFrame(
+        {
+            cc.VEHICLE_ID: [7, 3, 3, 5],
+            cc.TIME_STEP: [10, 10, 0, 10],
+            cc.BASE_STATIONS: ["101 102", "103", "104 105", ""],
+            cc.DISTANCES: ["1.0 2.0", "3.0", "4.0 5.0", ""],
+        }
+    )
+    return LinkTable(links_df, cc.BASE_STATIONS)
+
+
+def test_link_table_time_window():
+    link_table = _create_link_table()
+
+    assert len(link_table) == 4
+    assert link_table.time_window(0) == (0, 1)
+    assert link_table.time_window(10) == (1, 4)
+    assert link_table.time_window(5) == (0, 0)
+    assert link_table.time_window(20) == (0, 0)
+
+
+def test_link_table_finds_rows_in_window():
+    link_table = _create_link_table()
+    window = link_table.time_window(10)
+
+    assert link_table.find_row(3, window) == 1
+    assert link_table.find_row(4, window) == -1
+    assert link_table.find_rows(np.array([7, 4, 5, 3]), window).tolist() == [
+        3,
+        -1,
+        2,
+        1,
+    ]
+
+
+def test_link_table_targets_and_distances():
+    link_table = _create_link_table()
+    rows = link_table.find_rows(np.array([7, 5, 3]), link_table.time_window(10))
+
+    assert link_table.targets(rows[0]).tolist() == [101, 102]
+    assert link_table.distances(rows[0]).tolist() == [1.0, 2.0]
+    assert len(link_table.targets(rows[1])) == 0
+    assert link_table.first_targets(np.r_[rows, -1]).tolist() == [101, -1, 103, -1]
+
+    positions, targets = link_table.targets_of_rows(rows)
+    assert positions.tolist() == [0, 0, 2]
+    assert targets.tolist() == [101, 102, 103]
@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+import pytest
+from pandas import DataFrame
+
+import src.core.constants as constants
+from src.core.simulation import Simulation
+
+
+def _run_simulation(config_file: str) -> tuple[DataFrame, DataFrame]:
+    """
+    Run the simulation and get the collected model and agent data.
+
+    Parameters
+    ----------
+    config_file : str
+        The path to the config file.
+
+    Returns
+    -------
+    tuple[DataFrame, DataFrame]
+        The model data and the agent data.
+    """
+    # The vehicle types are drawn at random, the same seed gives the same types.
+    random.seed(1)
+    np.random.seed(1)
+
+    simulation = Simulation(config_file)
+    simulation.setup_simulation()
+    simulation.run()
+
+    data_collector = simulation._simulation_model.data_collector
+    return (
+        data_collector.get_model_vars_dataframe(),
+        data_collector.get_agent_vars_dataframe().sort_index(),
+    )
+
+
+def _normalize(value):
+    """Round the floats of a collected value, the engines add the sizes in other orders."""
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, float):
+        return None if np.isnan(value) else round(value, 6)
+    return value
+
+
+def _assert_same_data(expected: DataFrame, actual: DataFrame) -> None:
+    """Assert that the collected data is the same up to the float rounding."""
+    assert list(actual.columns) == list(expected.columns)
+    assert actual.index.equals(expected.index)
+    for column in expected.columns:
+        assert [_normalize(value) for value in actual[column]] == [
+            _normalize(value) for value in expected[column]
+        ], column
+
+
+@pytest.fixture(scope="module")
+def agent_results(scenario_config) -> tuple[DataFrame, DataFrame]:
+    return _run_simulation(scenario_config(constants.AGENT_VEHICLE_ENGINE))
+
+
+@pytest.fixture(scope="module")
+def columnar_results(scenario_config) -> tuple[DataFrame, DataFrame]:
+    return _run_simulation(scenario_config(constants.COLUMNAR_VEHICLE_ENGINE))
+
+
+def test_model_data_matches_agent_vehicles(agent_results, columnar_results):
+    agent_model_data, _ = agent_results
+    columnar_model_data, _ = columnar_results
+
+    assert agent_model_data["total_data"].sum() > 0
+    _assert_same_data(agent_model_data, columnar_model_data)
+
+
+def test_agent_data_matches_agent_vehicles(agent_results, columnar_results):
+    _, agent_data = agent_results
+    _, columnar_data = columnar_results
+
+    assert len(agent_data) > 0
+    _assert_same_data(agent_data, columnar_data)